@@ -0,0 +1,80 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    bench_aio.py
+
+    Benchmarks event loop latency while compressing: compress_bytes called
+    on the loop against huffpress.aio.compress_stream, measured by a
+    ticker task that should wake up every millisecond.
+"""
+
+import asyncio
+import time
+from bfuncs import read_file
+from huffpress import aio
+from huffpress.auxi.modes import Format
+from huffpress.press.compress import compress_bytes
+
+TICK = 0.001
+
+
+class NullWriter:
+    """
+    Stands in for an asyncio.StreamWriter, discarding the output
+    """
+    def write(self, data: bytes):
+        pass
+
+    async def drain(self):
+        pass
+
+
+async def ticker(lags: list):
+    """
+    Records how late every tick of the event loop is
+
+    :param lags: list the lags in seconds are appended to
+    """
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def measure(work) -> None:
+    """
+    Runs a coroutine next to the ticker and prints the loop lag
+
+    :param work: zero argument coroutine function
+    """
+    lags: list = []
+    tick = asyncio.ensure_future(ticker(lags))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    title = await work()
+    total = time.perf_counter() - start
+    tick.cancel()
+    lags = lags or [total]
+    print(f"{title:<40} total {total * 1000:10.2f} ms   "
+          f"max loop lag {max(lags) * 1000:10.2f} ms")
+
+
+async def main(data: bytes):
+    async def blocking():
+        compress_bytes(data, fmt=Format.BLOCKS)
+        return "compress_bytes on the loop"
+
+    async def streaming():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        await aio.compress_stream(reader, NullWriter())
+        return "aio.compress_stream"
+
+    await measure(blocking)
+    await measure(streaming)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(read_file("d.txt") + read_file("u.exe") +
+                     read_file("i.txt")))
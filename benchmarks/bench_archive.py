@@ -0,0 +1,82 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    bench_archive.py
+
+    Benchmarks bundling a directory of many tiny files: compress_file of
+    every file (one .hac each, with its own header and table) against one
+    archive, and one solid archive sharing tables between the small files,
+    and reading a single member back against decompressing its own file.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from bfuncs import timeit, report
+from huffpress.auxi.modes import Format
+from huffpress.press.archive import create_archive, open_archive
+from huffpress.press.compress import compress_file
+from huffpress.press.decompress import decompress_file
+
+
+def make_files(path: str, count: int):
+    """
+    Writes small JSON files sharing a shape
+
+    :param path: directory to write to
+    :param count: number of files
+    """
+    os.makedirs(path)
+    for i in range(count):
+        with open(os.path.join(path, f"{i}.json"), "w") as f:
+            json.dump({"id": i, "user": f"user{i % 97}", "event": "click",
+                       "page": f"/items/{i * 7 % 1000}", "ok": i % 3 > 0},
+                      f)
+
+
+def bench_archive(count: int):
+    """
+    Times compressing every file on its own against archiving them, and
+    reading one file back, and prints the total compressed sizes
+
+    :param count: number of files
+    """
+    tmp = tempfile.mkdtemp()
+    try:
+        src = os.path.join(tmp, "files")
+        make_files(src, count)
+        paths = [os.path.join(src, name) for name in sorted(os.listdir(src))]
+        old, _ = timeit(lambda: [compress_file(path, fmt=Format.CANONICAL)
+                                 for path in paths])
+        sizes = sum(os.path.getsize(f"{path}.hac") for path in paths)
+        new, _ = timeit(lambda: create_archive(
+            paths, os.path.join(tmp, "a.hac")))
+        report(f"{count} files compress vs archive", old, new)
+        solid, _ = timeit(lambda: create_archive(
+            paths, os.path.join(tmp, "s.hac"), solid=True))
+        report(f"{count} files compress vs solid archive", old, solid)
+
+        name = os.path.basename(paths[count // 2])
+        old, _ = timeit(lambda: decompress_file(f"{paths[count // 2]}.hac",
+                                                os.path.join(tmp, "out")))
+        with open(os.path.join(tmp, "out"), "rb") as f:
+            expected = f.read()
+
+        directory, arc = timeit(lambda: open_archive(
+            os.path.join(tmp, "s.hac")), repeat=1)
+        with arc:
+            new, res = timeit(lambda: arc.read(name))
+        assert res == expected
+        report("read one member", old, new)
+        print(f"{'':<40} total size files "
+              f"{sum(map(os.path.getsize, paths))}  compress_file {sizes}  "
+              f"archive {os.path.getsize(os.path.join(tmp, 'a.hac'))}  "
+              f"solid {os.path.getsize(os.path.join(tmp, 's.hac'))}  "
+              f"directory read {directory * 1000:.2f} ms")
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    bench_archive(2000)
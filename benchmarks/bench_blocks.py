@@ -0,0 +1,37 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    bench_blocks.py
+
+    Compares the compressed size and speed of the blocks format at several
+    block sizes with the single stream canonical format, on mixed content
+    (text followed by a binary) where per-block tables fit local statistics.
+"""
+
+from bfuncs import timeit, read_file, report
+from huffpress.auxi.modes import Format
+from huffpress.press.compress import compress_bytes
+from huffpress.press.decompress import decompress_bytes
+
+
+def bench_blocks(block_size: int, data: bytes):
+    """
+    Compresses data in the blocks format and prints the size against the
+    canonical format
+
+    :param block_size: original size of the blocks
+    :param data: input data
+    """
+    old, single = timeit(lambda: compress_bytes(data, fmt=Format.CANONICAL))
+    new, blocks = timeit(lambda: compress_bytes(data, fmt=Format.BLOCKS,
+                                                block_size=block_size))
+    assert decompress_bytes(blocks) == data
+    report(f"{block_size >> 10} KiB blocks compress", old, new)
+    print(f"{'':<40} size single stream {len(single) / len(data):.4f}  "
+          f"blocks {len(blocks) / len(data):.4f}")
+
+
+if __name__ == "__main__":
+    mixed = read_file("d.txt") + read_file("u.exe") + read_file("i.txt")
+    for size in [1 << 14, 1 << 16, 1 << 18, 1 << 20]:
+        bench_blocks(size, mixed)
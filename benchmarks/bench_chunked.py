@@ -0,0 +1,90 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    bench_chunked.py
+
+    Benchmarks compressing and decompressing data arriving in 64 KiB chunks
+    with Compressor and Decompressor against buffering the whole payload
+    for compress_bytes and decompress_bytes, timing both and measuring
+    their peak memory.
+"""
+
+import tracemalloc
+from bfuncs import timeit, read_file, report
+from huffpress.auxi.modes import Format
+from huffpress.press.compress import compress_bytes, Compressor
+from huffpress.press.decompress import decompress_bytes, Decompressor
+
+CHUNK = 1 << 16
+
+
+def chunks(data: bytes):
+    """
+    Splits data into chunks, as read from a socket or a pipe
+
+    :param data: input data
+    :return: iterator of chunks
+    """
+    return (data[start: start + CHUNK] for start in range(0, len(data), CHUNK))
+
+
+def peak(fun) -> float:
+    """
+    Peak memory of calling fun()
+
+    :param fun: zero argument function
+    :return: peak memory in MiB
+    """
+    tracemalloc.start()
+    fun()
+    res = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return res / (1 << 20)
+
+
+def bench_chunked(data: bytes):
+    """
+    Times and measures the peak memory of chunked against whole payload
+    compression and decompression, discarding the output as it is produced
+
+    :param data: input data
+    """
+    def whole_compress():
+        buf = bytearray()
+        for chunk in chunks(data):
+            buf += chunk
+        return len(compress_bytes(buf, fmt=Format.BLOCKS))
+
+    def chunked_compress():
+        comp = Compressor()
+        size = sum(len(comp.compress(chunk)) for chunk in chunks(data))
+        return size + len(comp.flush())
+
+    comp_data = compress_bytes(data, fmt=Format.BLOCKS)
+
+    def whole_decompress():
+        buf = bytearray()
+        for chunk in chunks(comp_data):
+            buf += chunk
+        return len(decompress_bytes(buf))
+
+    def chunked_decompress():
+        decomp = Decompressor()
+        size = sum(len(decomp.decompress(chunk))
+                   for chunk in chunks(comp_data))
+        return size + len(decomp.flush())
+
+    for title, old_fun, new_fun in [
+            ("compress", whole_compress, chunked_compress),
+            ("decompress", whole_decompress, chunked_decompress)]:
+        old, old_size = timeit(old_fun, repeat=1)
+        new, new_size = timeit(new_fun, repeat=1)
+        assert old_size == new_size
+        report(f"chunked {title}", old, new)
+        print(f"{'':<40} peak memory whole {peak(old_fun):8.1f} MiB  "
+              f"chunked {peak(new_fun):8.1f} MiB")
+
+
+if __name__ == "__main__":
+    bench_chunked((read_file("d.txt") + read_file("u.exe") +
+                   read_file("i.txt")) * 4)
@@ -0,0 +1,58 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    bench_codec.py
+
+    Benchmarks per-message latency and size of small JSON messages: a Codec
+    built once from a sample against compress_bytes of every message, which
+    rebuilds the codes each time (and stores such small messages), and
+    against decoding with tables rebuilt for every message.
+"""
+
+import json
+from bfuncs import timeit, report
+from huffpress.auxi.modes import Format
+from huffpress.press.codec import Codec
+from huffpress.press.compress import compress_bytes
+from huffpress.press.decompress import decompress_bytes
+
+
+def messages(count: int):
+    """
+    Small JSON events sharing a shape
+
+    :param count: number of messages
+    :return: list of encoded messages
+    """
+    return [json.dumps({"id": i, "user": f"user{i % 97}", "event": "click",
+                        "page": f"/items/{i * 7 % 1000}", "ok": i % 3 > 0}
+                       ).encode() for i in range(count)]
+
+
+def bench_codec(msgs):
+    """
+    Times encoding every message with a codec against the canonical
+    format, and decoding against rebuilding the tables of the codec for
+    every message, and prints the average sizes
+
+    :param msgs: messages
+    """
+    codec = Codec.from_sample(b"".join(msgs[:100]))
+    old, comp = timeit(lambda: [compress_bytes(m, fmt=Format.CANONICAL)
+                                for m in msgs])
+    new, enc = timeit(lambda: [codec.encode(m) for m in msgs])
+    report(f"{len(msgs)} messages encode", old, new)
+    old, dec = timeit(lambda: [Codec(codec.lengths).decode(e)
+                               for e in enc])
+    new, res = timeit(lambda: [codec.decode(e) for e in enc])
+    assert dec == res == msgs
+    assert [decompress_bytes(c) for c in comp] == msgs
+    report(f"{len(msgs)} messages decode", old, new)
+    print(f"{'':<40} average size message "
+          f"{sum(map(len, msgs)) / len(msgs):.1f}  canonical "
+          f"{sum(map(len, comp)) / len(msgs):.1f}  codec "
+          f"{sum(map(len, enc)) / len(msgs):.1f}")
+
+
+if __name__ == "__main__":
+    bench_codec(messages(2000))
@@ -0,0 +1,57 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    bench_codes.py
+
+    Benchmarks code table generation: one tree traversal (build_code_table)
+    against the original per-term recursive encode, next to the cost of
+    encoding the input itself.
+"""
+
+from bfuncs import timeit, random_term_freq, read_file, report
+from huffpress.huff.hfunctions import (
+    calc_term_freq, build_leaves, sort_tree, build_tree, encode
+    )
+from huffpress.huff.htypes import InputData, HuffCode
+from huffpress.press.compress import create_huff_sequence
+
+
+def per_term_encode(leaves, tree) -> HuffCode:
+    """
+    The original encode(Leaves, HuffNode): one root-to-leaf walk per term
+
+    :param leaves: initial leaves
+    :param tree: Huffman tree
+    :return: Huffman codes
+    """
+    res = HuffCode(data={})
+    for term in leaves.data:
+        res.data.update(encode(term, tree).data)
+    return res
+
+
+def bench_codes(term_freq, title: str, inp_data=None):
+    """
+    Times code generation both ways and optionally the input encoding
+
+    :param term_freq: TermFreq to build the tree from
+    :param title: benchmark name
+    :param inp_data: InputData to encode with the resulting codes (optional)
+    """
+    leaves = build_leaves(term_freq)
+    tree = build_tree(sort_tree(leaves))
+    old, old_codes = timeit(lambda: per_term_encode(leaves, tree), repeat=1)
+    new, new_codes = timeit(lambda: encode(leaves, tree))
+    assert old_codes == new_codes
+    report(title, old, new)
+    if inp_data is not None:
+        enc, _ = timeit(lambda: create_huff_sequence(new_codes, inp_data),
+                        repeat=1)
+        print(f"{'':<40} encoding input takes {enc * 1000:10.2f} ms")
+
+
+if __name__ == "__main__":
+    u_exe = InputData(data=read_file("u.exe"))
+    bench_codes(calc_term_freq(u_exe), "u.exe (256 symbols)", u_exe)
+    bench_codes(random_term_freq(1024), "random 1024 symbols")
+    bench_codes(random_term_freq(4096), "random 4096 symbols")
@@ -0,0 +1,54 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    bench_context.py
+
+    Benchmarks the order-1 context format against the canonical format:
+    compression and decompression times, and the output sizes, for the
+    test files and for a range of numbers of context tables.
+"""
+
+from bfuncs import timeit, read_file, report
+from huffpress.auxi.modes import Format
+from huffpress.press.compress import compress_bytes
+from huffpress.press.decompress import decompress_bytes
+
+
+def bench_context(name: str):
+    """
+    Times canonical against context compression and decompression of a
+    test file and prints both sizes
+
+    :param name: file name in tests/files
+    """
+    data = read_file(name)
+    old, canonical = timeit(lambda: compress_bytes(data,
+                                                   fmt=Format.CANONICAL))
+    new, context = timeit(lambda: compress_bytes(data, fmt=Format.CONTEXT))
+    report(f"{name} compress", old, new)
+    old, res = timeit(lambda: decompress_bytes(canonical))
+    new, ctx_res = timeit(lambda: decompress_bytes(context))
+    assert res == ctx_res == data
+    report(f"{name} decompress", old, new)
+    print(f"{'':<40} size input {len(data)}  canonical {len(canonical)}  "
+          f"context {len(context)} "
+          f"({100 * (len(context) - len(canonical)) / len(canonical):+.1f}%)")
+
+
+def bench_tables(name: str):
+    """
+    Prints the context format size of a test file by number of tables
+
+    :param name: file name in tests/files
+    """
+    data = read_file(name)
+    sizes = [(tables, len(compress_bytes(data, fmt=Format.CONTEXT,
+                                         context_tables=tables)))
+             for tables in (1, 2, 4, 8, 16, 32)]
+    print(f"{name} size by tables  " +
+          "  ".join(f"{tables}: {size}" for tables, size in sizes))
+
+if __name__ == "__main__":
+    for file_name in ("d.txt", "j.txt", "u.exe"):
+        bench_context(file_name)
+    bench_tables("d.txt")
@@ -0,0 +1,154 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    bench_decode.py
+
+    Benchmarks the table-driven decoder against the original bit at a time
+    decoder (a dictionary probe after every bit of a '0'/'1' string), and the
+    BitReader input path against the original expansion of the compressed
+    bytes into a '0'/'1' string. The original pipeline runs on the layout
+    from before the JSON format header (map at the end of the data).
+"""
+
+import tracemalloc
+from typing import Tuple
+from bfuncs import timeit, read_file, report
+from huffpress.auxi.basen import to_basen, to_dec
+from huffpress.huff.htypes import HuffCode
+from huffpress.press.compress import compress_bytes, add_huff_map
+from huffpress.press.decompress import (
+    reverse_final_sequence, reverse_huff_sequence, decompress_bytes,
+    read_huff_map, unpack_huff_map
+    )
+
+
+def list_extract_huff_map(inp_bytes: bytes) -> Tuple[HuffCode, int]:
+    """
+    The original extract_huff_map (reversed copies of the whole input)
+
+    :param inp_bytes: compressed data without a header
+    :return: Huffman map and the length of the map and its length digits
+    """
+    rev_str = list(inp_bytes)
+    rev_str.reverse()
+    rev_bytes = bytearray(rev_str)
+    huff_len_bytes = []
+    for r in rev_bytes:
+        if r == ord('}'):
+            break
+        huff_len_bytes.append(r)
+    huff_len_bytes.reverse()
+    huff_len = to_dec(list(map(lambda x: chr(x), huff_len_bytes)), 36)
+    len_of_len = len(huff_len_bytes)
+    huff_dic_str = inp_bytes[-(huff_len + len_of_len): -len_of_len]
+    return unpack_huff_map(huff_dic_str), len_of_len + len(huff_dic_str)
+
+
+def string_final_sequence(bstr: bytes) -> str:
+    """
+    The original reverse_final_sequence
+
+    :param bstr: padding-count byte followed by the compressed sequence
+    :return: binary string of the Huffman encoded sequence
+    """
+    data = list(bstr)
+    rem = data[0]
+    data = data[1:]
+    fbin = ""
+    for dec in data:
+        dbin = to_basen(dec)
+        vbin = "".join(list(map(str, dbin))).rjust(8, "0")
+        fbin += vbin
+    fbin = fbin[:-rem]
+    return fbin
+
+
+def peak_memory(fun) -> float:
+    """
+    Peak memory allocated by fun()
+
+    :param fun: zero argument function
+    :return: peak memory in MiB
+    """
+    tracemalloc.start()
+    fun()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+def bitwise_huff_sequence(huff_map: HuffCode, seq: str) -> bytearray:
+    """
+    The original reverse_huff_sequence
+
+    :param huff_map: Huffman map
+    :param seq: input binary string of Huffman encoded sequence
+    :return: decoded bytearray
+    """
+    term = ""
+    res = []
+    huff_trn = {v: k for k, v in huff_map.data.items()}
+    for sq in seq:
+        term += sq
+        val = huff_trn.get(term)
+        if val is not None:
+            res.append(val)
+            term = ""
+    return bytearray(res)
+
+
+def bitwise_decompress(comp: bytes) -> bytearray:
+    """
+    The original decompress_bytes pipeline
+
+    :param comp: compressed data without a header
+    :return: decompressed data
+    """
+    huff_map, rem = list_extract_huff_map(comp)
+    return bitwise_huff_sequence(huff_map, string_final_sequence(comp[:-rem]))
+
+
+def bench_decode(name: str):
+    """
+    Times decoding of the Huffman sequence alone and whole decompression
+
+    :param name: file name in tests/files
+    """
+    inp = read_file(name)
+    comp = bytes(compress_bytes(inp))
+    huff_map, body = read_huff_map(comp)
+    body = bytes(body)
+    legacy = bytes(add_huff_map(bytearray(body), huff_map))
+    seq = reverse_final_sequence(body)
+
+    old, _ = timeit(lambda: list_extract_huff_map(legacy))
+    new, _ = timeit(lambda: read_huff_map(comp))
+    report(f"{name} locate map (header)", old, new)
+    new, _ = timeit(lambda: read_huff_map(legacy))
+    report(f"{name} locate map (no header)", old, new)
+
+    old, old_res = timeit(lambda: string_final_sequence(body), repeat=1)
+    new, new_res = timeit(lambda: reverse_final_sequence(body))
+    assert old_res == new_res == seq
+    report(f"{name} reverse final sequence", old, new)
+
+    old, old_res = timeit(lambda: bitwise_huff_sequence(huff_map, seq),
+                          repeat=1)
+    new, new_res = timeit(lambda: reverse_huff_sequence(huff_map, seq))
+    assert old_res == new_res == inp
+    report(f"{name} decode sequence", old, new)
+
+    old, old_res = timeit(lambda: bitwise_decompress(legacy), repeat=1)
+    new, new_res = timeit(lambda: decompress_bytes(comp))
+    assert old_res == new_res == inp
+    report(f"{name} decompress_bytes", old, new)
+    print(f"{'':<40} peak memory old "
+          f"{peak_memory(lambda: bitwise_decompress(legacy)):8.2f} MiB  new "
+          f"{peak_memory(lambda: decompress_bytes(comp)):8.2f} MiB  "
+          f"(output {len(inp) / 2 ** 20:.2f} MiB)")
+
+
+if __name__ == "__main__":
+    bench_decode("d.txt")
+    bench_decode("j.txt")
+    bench_decode("u.exe")
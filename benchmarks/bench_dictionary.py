@@ -0,0 +1,44 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    bench_dictionary.py
+
+    Benchmarks compressing short lines one at a time with a dictionary
+    trained on other lines of the same corpus against compressing every
+    line on its own with compress_bytes, comparing time and total size.
+"""
+
+from bfuncs import timeit, read_file, report
+from huffpress.auxi.modes import Format
+from huffpress.press.codec import train
+from huffpress.press.compress import compress_bytes
+from huffpress.press.decompress import decompress_bytes
+
+
+def bench_dictionary(lines, fmt: Format):
+    """
+    Trains a dictionary on the even lines and compresses the odd lines with
+    and without it
+
+    :param lines: non-empty lines of a text corpus
+    :param fmt: format of the lines compressed on their own
+    """
+    dictionary = train(lines[::2])
+    test = lines[1::2]
+    old, plain = timeit(lambda: [compress_bytes(line, fmt=fmt)
+                                 for line in test])
+    new, comp = timeit(lambda: [compress_bytes(line, dictionary=dictionary)
+                                for line in test])
+    assert [decompress_bytes(c, dictionary=dictionary)
+            for c in comp] == test
+    report(f"{len(test)} lines vs {fmt.name}", old, new)
+    print(f"{'':<40} total size lines {sum(map(len, test))}  "
+          f"{fmt.name} {sum(map(len, plain))}  "
+          f"dictionary {sum(map(len, comp))} "
+          f"(file {len(dictionary.to_bytes())} bytes)")
+
+
+if __name__ == "__main__":
+    corpus = [line for line in read_file("d.txt").split(b"\n") if line]
+    bench_dictionary(corpus, Format.JSON)
+    bench_dictionary(corpus, Format.CANONICAL)
@@ -0,0 +1,67 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    bench_digram.py
+
+    Benchmarks the digram format (2-byte symbols) against the canonical
+    format: compression and decompression times and output sizes of the
+    text test files, and building the Huffman tree of a 65536 symbol
+    alphabet with the two-queue builder against the heap it replaces.
+"""
+
+import heapq
+from bfuncs import timeit, read_file, report, random_term_freq
+from huffpress.auxi.modes import Format
+from huffpress.huff.hfunctions import build_huff_tree
+from huffpress.press.compress import compress_bytes
+from huffpress.press.decompress import decompress_bytes
+
+
+def heap_merge(term_freq):
+    """
+    Merges the nodes of a Huffman tree with a heap (the build_huff_tree
+    loop before the two queues), returning the merged frequencies
+
+    :param term_freq: term frequencies
+    :return: list of merged node frequencies
+    """
+    freqs = list(term_freq.tf.values())
+    heap = [(freq, rank, idx) for rank, (idx, freq) in
+            enumerate(sorted(enumerate(freqs), key=lambda pair: pair[1]))]
+    merged = []
+    for idx in range(len(freqs), 2 * len(freqs) - 1):
+        first, _, _ = heapq.heappop(heap)
+        second, _, _ = heapq.heappop(heap)
+        merged.append(first + second)
+        heapq.heappush(heap, (first + second, idx, idx))
+    return merged
+
+
+def bench_digram(name: str):
+    """
+    Times canonical against digram compression and decompression of a
+    test file and prints both sizes
+
+    :param name: file name in tests/files
+    """
+    data = read_file(name)
+    old, canonical = timeit(lambda: compress_bytes(data,
+                                                   fmt=Format.CANONICAL))
+    new, digram = timeit(lambda: compress_bytes(data, fmt=Format.DIGRAM))
+    report(f"{name} compress", old, new)
+    old, res = timeit(lambda: decompress_bytes(canonical))
+    new, dig_res = timeit(lambda: decompress_bytes(digram))
+    assert res == dig_res == data
+    report(f"{name} decompress", old, new)
+    print(f"{'':<40} size input {len(data)}  canonical {len(canonical)}  "
+          f"digram {len(digram)} "
+          f"({100 * (len(digram) - len(canonical)) / len(canonical):+.1f}%)")
+
+
+if __name__ == "__main__":
+    for file_name in ("d.txt", "j.txt"):
+        bench_digram(file_name)
+    tf = random_term_freq(65536)
+    old, _ = timeit(lambda: heap_merge(tf))
+    new, _ = timeit(lambda: build_huff_tree(tf))
+    report("65536 symbol tree, heap vs two queues", old, new)
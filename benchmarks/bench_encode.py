@@ -0,0 +1,68 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    bench_encode.py
+
+    Benchmarks the bit packing encoder (huff.hencode) against the original
+    '0'/'1' string pipeline, in throughput and peak memory.
+"""
+
+import tracemalloc
+from bfuncs import timeit, read_file, report
+from huffpress.huff.htypes import InputData
+from huffpress.press.compress import (
+    create_huff_sequence, create_final_sequence, create_seq_bins,
+    compress_seq_bins, compress_bytes
+    )
+from huffpress.huff.hfunctions import create_huff_tree
+
+
+def string_compress(inp: bytes) -> bytearray:
+    """
+    The original compress_bytes pipeline (without the Huffman map)
+
+    :param inp: input bytes
+    :return: encoded bytes
+    """
+    input_data = InputData(data=inp)
+    encod_seq, _ = create_huff_tree(input_data)
+    huff_seq = create_huff_sequence(encod_seq, input_data)
+    return compress_seq_bins(create_seq_bins(create_final_sequence(huff_seq)))
+
+
+def peak_memory(fun) -> float:
+    """
+    Peak memory allocated by fun()
+
+    :param fun: zero argument function
+    :return: peak memory in MiB
+    """
+    tracemalloc.start()
+    fun()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+def bench_encode(name: str):
+    """
+    Times compression of a test file with both pipelines
+
+    :param name: file name in tests/files
+    """
+    inp = read_file(name)
+    size = len(inp) / 2 ** 20
+    old, old_res = timeit(lambda: string_compress(inp), repeat=1)
+    new, new_res = timeit(lambda: compress_bytes(inp))
+    assert new_res.startswith(old_res)
+    report(f"{name} compress", old, new)
+    print(f"{'':<40} old {size / old:8.2f} MB/s  new {size / new:8.2f} MB/s")
+    print(f"{'':<40} peak memory old "
+          f"{peak_memory(lambda: string_compress(inp)):8.2f} MiB  new "
+          f"{peak_memory(lambda: compress_bytes(inp)):8.2f} MiB  "
+          f"(input {size:.2f} MiB)")
+
+
+if __name__ == "__main__":
+    bench_encode("d.txt")
+    bench_encode("u.exe")
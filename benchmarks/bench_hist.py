@@ -0,0 +1,50 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    bench_hist.py
+
+    Benchmarks the byte histogram (NumPy and pure Python) against the
+    original Counter and dictionary rebuild in calc_term_freq.
+"""
+
+from collections import Counter
+from bfuncs import timeit, read_file, report
+import huffpress.auxi.histogram as histogram
+from huffpress.auxi.histogram import ByteHistogram
+
+
+def counter_term_freq(data: bytes) -> dict:
+    """
+    The original calc_term_freq
+
+    :param data: input bytes
+    :return: dictionary of byte counts
+    """
+    return {k if isinstance(k, int) else ord(str(k)): v
+            for k, v in dict(Counter(data)).items()}
+
+
+def bench_hist(name: str, repeat: int = 10):
+    """
+    Times the histogram of a test file repeated a number of times
+
+    :param name: file name in tests/files
+    :param repeat: number of copies of the file to count
+    """
+    data = read_file(name) * repeat
+    old, old_res = timeit(lambda: counter_term_freq(data))
+    numpy = histogram.np
+    if numpy is not None:
+        new, new_res = timeit(lambda: ByteHistogram(data))
+        assert new_res == old_res
+        report(f"{name} x{repeat} numpy", old, new)
+    histogram.np = None
+    new, new_res = timeit(lambda: ByteHistogram(data))
+    histogram.np = numpy
+    assert new_res == old_res
+    report(f"{name} x{repeat} pure python", old, new)
+
+
+if __name__ == "__main__":
+    bench_hist("d.txt")
+    bench_hist("u.exe")
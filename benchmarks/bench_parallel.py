@@ -0,0 +1,66 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    bench_parallel.py
+
+    Scaling curves of block compression and decompression with a pool of
+    worker processes, on copies of tests/files/d.txt: throughput and speedup
+    over (de)compressing the blocks in a single process (workers=1), for 2,
+    4, ... workers up to the number of cores.
+"""
+
+import os
+from bfuncs import timeit, read_file
+from huffpress.auxi.modes import Format
+from huffpress.press.compress import compress_bytes
+from huffpress.press.decompress import decompress_bytes
+
+SIZE = 1 << 25  # 32 MiB
+BLOCK_SIZE = 1 << 20
+
+
+def worker_counts():
+    """
+    Worker counts to benchmark: powers of 2 from 2 up to the number of
+    cores
+
+    :return: list of worker counts
+    """
+    cores = os.cpu_count() or 1
+    counts = [2]
+    while counts[-1] < cores:
+        counts.append(min(counts[-1] * 2, cores))
+    return counts
+
+
+def scaling_curve(title: str, fun, size: float):
+    """
+    Prints the time, throughput and speedup of fun(workers) for every
+    worker count, checking all results are equal
+
+    :param title: benchmark name
+    :param fun: function of the number of workers
+    :param size: input size in MiB
+    """
+    serial, expected = timeit(lambda: fun(1), repeat=1)
+    print(f"{title:<12} {serial * 1000:10.2f} ms "
+          f"{size / serial:8.2f} MB/s")
+    for workers in worker_counts():
+        best, res = timeit(lambda: fun(workers), repeat=1)
+        assert res == expected
+        print(f"{workers:>3} workers  {best * 1000:10.2f} ms "
+              f"{size / best:8.2f} MB/s   x{serial / best:6.2f}")
+
+
+if __name__ == "__main__":
+    text = read_file("d.txt")
+    data = text * (SIZE // len(text))
+    size = len(data) / 2 ** 20
+    print(f"{size:.0f} MiB, {BLOCK_SIZE >> 10} KiB blocks, "
+          f"{os.cpu_count()} cores")
+    scaling_curve("compress", lambda workers: compress_bytes(
+        data, fmt=Format.BLOCKS, block_size=BLOCK_SIZE, workers=workers),
+        size)
+    comp = compress_bytes(data, fmt=Format.BLOCKS, block_size=BLOCK_SIZE)
+    scaling_curve("decompress", lambda workers: decompress_bytes(
+        comp, workers=workers), size)
@@ -0,0 +1,58 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    bench_random.py
+
+    Benchmarks reading a small range from the middle of a compressed file
+    through the block index (huffpress.open) against decompressing the
+    whole file, at several block sizes.
+"""
+
+import os
+import tempfile
+import huffpress
+from bfuncs import timeit, read_file, report
+from huffpress.auxi.modes import Format
+from huffpress.press.compress import compress_bytes
+from huffpress.press.decompress import decompress_file
+
+
+def bench_random(data: bytes, block_size: int, length: int = 100):
+    """
+    Times reading length bytes from the middle of the compressed data with
+    read_range against a full decompression of the file
+
+    :param data: input data
+    :param block_size: original size of the blocks
+    :param length: number of bytes read
+    """
+    fd, path = tempfile.mkstemp(suffix=".hac")
+    with os.fdopen(fd, "wb") as f:
+        f.write(compress_bytes(data, fmt=Format.BLOCKS,
+                               block_size=block_size))
+    offset = len(data) // 2
+    try:
+        def whole() -> bytes:
+            out = decompress_file(path, f"{path}.out")
+            with open(out, "rb") as f:
+                f.seek(offset)
+                return f.read(length)
+
+        def ranged() -> bytes:
+            with huffpress.open(path) as f:
+                return f.read_range(offset, length)
+
+        old, expected = timeit(whole, repeat=1)
+        new, res = timeit(ranged)
+        assert res == expected == data[offset: offset + length]
+        report(f"{block_size >> 10} KiB blocks read_range", old, new)
+    finally:
+        for name in [path, f"{path}.out"]:
+            if os.path.exists(name):
+                os.remove(name)
+
+
+if __name__ == "__main__":
+    mixed = (read_file("d.txt") + read_file("u.exe") + read_file("i.txt")) * 8
+    for size in [1 << 14, 1 << 16, 1 << 20]:
+        bench_random(mixed, size)
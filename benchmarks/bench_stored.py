@@ -0,0 +1,68 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    bench_stored.py
+
+    Benchmarks the stored fallback on data Huffman coding cannot shrink
+    (a tiny file, random bytes): compress_bytes, which stores the data once
+    the code bit-lengths show it would expand, against the full encode it
+    replaces, with the output sizes of both.
+"""
+
+import os
+from bfuncs import timeit, read_file, report
+from huffpress.auxi.bitio import BitWriter
+from huffpress.auxi.modes import Format
+from huffpress.huff.hencode import encode_bits
+from huffpress.huff.hfunctions import calc_term_freq, code_bits
+from huffpress.huff.htypes import InputData
+from huffpress.press.compress import (
+    compress_bytes, create_huff_codes, create_encoder
+    )
+from huffpress.press.decompress import decompress_bytes
+
+
+def full_encode(data: bytes, fmt: Format) -> bytearray:
+    """
+    Compresses data with Huffman coding regardless of the output size (the
+    compress_bytes path before the stored fallback)
+
+    :param data: input data
+    :param fmt: Format.JSON or Format.CANONICAL
+    :return: compressed data
+    """
+    term_freq = calc_term_freq(InputData(data=data))
+    encod_seq, lengths = create_huff_codes(term_freq)
+    header, codes, rem = create_encoder(term_freq, encod_seq, lengths, fmt)
+    writer = BitWriter(len(header) +
+                       (code_bits(term_freq, lengths) + rem) // 8)
+    writer.write_bytes(header)
+    encode_bits(codes, data, writer)
+    writer.write(0, rem)
+    return writer.getvalue()
+
+
+def bench_stored(data: bytes, title: str, fmt: Format = Format.CANONICAL):
+    """
+    Times the full encode against compress_bytes and prints both sizes
+
+    :param data: input data
+    :param title: benchmark name
+    :param fmt: compressed data format
+    """
+    old, encoded = timeit(lambda: full_encode(data, fmt))
+    new, stored = timeit(lambda: compress_bytes(data, fmt=fmt))
+    assert decompress_bytes(stored) == data
+    report(title, old, new)
+    print(f"{'':<40} size input {len(data)}  encoded {len(encoded)}  "
+          f"stored {len(stored)}")
+
+
+if __name__ == "__main__":
+    bench_stored(read_file("i.txt"), "i.txt JSON", Format.JSON)
+    bench_stored(read_file("i.txt"), "i.txt canonical")
+    bench_stored(os.urandom(1 << 22), "4 MiB random bytes")
+    mixed = os.urandom(1 << 21) + read_file("d.txt")
+    new, blocks = timeit(lambda: compress_bytes(mixed, fmt=Format.BLOCKS))
+    print(f"{'random + d.txt blocks':<40} new {new * 1000:10.2f} ms   "
+          f"ratio {len(blocks) / len(mixed):.4f}")
@@ -0,0 +1,90 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    bench_stream.py
+
+    Benchmarks streaming file compression (two passes over chunks) and
+    decompression against reading and (de)compressing the whole file in
+    memory, in time and peak memory, on a large file made of copies of the
+    test files.
+"""
+
+import os
+import tempfile
+import tracemalloc
+from bfuncs import timeit, read_file, report
+from huffpress.press.compress import compress_file
+from huffpress.press.decompress import decompress_file
+
+SIZE = 1 << 25  # 32 MiB
+
+
+def peak_memory(fun) -> float:
+    """
+    Peak memory allocated by fun()
+
+    :param fun: zero argument function
+    :return: peak memory in MiB
+    """
+    tracemalloc.start()
+    fun()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+def bench_stream(buffer_size: int):
+    """
+    Times compression and decompression of a large file in memory and
+    streamed
+
+    :param buffer_size: streaming buffer size
+    """
+    data = read_file("d.txt") + read_file("u.exe")
+    with tempfile.TemporaryDirectory() as tmp:
+        name = os.path.join(tmp, "big.bin")
+        with open(name, "wb") as f:
+            for _ in range(SIZE // len(data)):
+                f.write(data)
+        size = os.path.getsize(name) / 2 ** 20
+
+        def whole():
+            return compress_file(name, stream=False)
+
+        def stream():
+            return compress_file(name, stream=True, buffer_size=buffer_size)
+
+        old, _ = timeit(whole, repeat=1)
+        with open(f"{name}.hac", "rb") as f:
+            whole_res = f.read()
+        new, _ = timeit(stream, repeat=1)
+        with open(f"{name}.hac", "rb") as f:
+            assert f.read() == whole_res
+        report(f"{size:.0f} MiB, {buffer_size >> 10} KiB buffer compress",
+               old, new)
+        print(f"{'':<40} peak memory in memory "
+              f"{peak_memory(whole):8.2f} MiB  streamed "
+              f"{peak_memory(stream):8.2f} MiB")
+
+        out = os.path.join(tmp, "big.out")
+
+        def whole_decomp():
+            return decompress_file(f"{name}.hac", out, stream=False)
+
+        def stream_decomp():
+            return decompress_file(f"{name}.hac", out, stream=True,
+                                   buffer_size=buffer_size)
+
+        old, _ = timeit(whole_decomp, repeat=1)
+        new, _ = timeit(stream_decomp, repeat=1)
+        with open(name, "rb") as f, open(out, "rb") as g:
+            assert f.read() == g.read()
+        report(f"{'':<29} decompress", old, new)
+        print(f"{'':<40} peak memory in memory "
+              f"{peak_memory(whole_decomp):8.2f} MiB  streamed "
+              f"{peak_memory(stream_decomp):8.2f} MiB")
+
+
+if __name__ == "__main__":
+    bench_stream(1 << 16)
+    bench_stream(1 << 20)
@@ -0,0 +1,75 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    bench_tree.py
+
+    Benchmarks the heap tree builder (Engine.HEAP) against the original
+    sorted list builder (Engine.SORTED) for byte inputs and large alphabets,
+    and the compact HuffTree (Engine.COMPACT) against the tree of
+    HuffNode's.
+"""
+
+import tracemalloc
+from bfuncs import timeit, random_term_freq, read_file, report
+from huffpress.huff.hfunctions import (
+    calc_term_freq, build_leaves, sort_tree, build_tree, build_tree_sorted,
+    build_huff_tree
+    )
+from huffpress.huff.htypes import InputData
+
+
+def bench_tree(term_freq, title: str, sorted_too: bool = True):
+    """
+    Times tree construction (leaves, sort and build) with both engines on
+    the same term frequencies
+
+    :param term_freq: TermFreq to build the tree from
+    :param title: benchmark name
+    :param sorted_too: set to False to skip the (slow) sorted engine
+    """
+    def run(builder):
+        return builder(sort_tree(build_leaves(term_freq)))
+
+    new, _ = timeit(lambda: run(build_tree))
+    if sorted_too:
+        old, _ = timeit(lambda: run(build_tree_sorted), repeat=1)
+        report(title, old, new)
+    else:
+        print(f"{title:<40} new {new * 1000:10.2f} ms")
+
+
+def bench_compact(term_freq, title: str):
+    """
+    Times and measures peak memory of building the compact HuffTree against
+    the HuffNode tree (leaves, sort and heap build)
+
+    :param term_freq: TermFreq to build the tree from
+    :param title: benchmark name
+    """
+    def nodes():
+        return build_tree(sort_tree(build_leaves(term_freq)))
+
+    def compact():
+        return build_huff_tree(term_freq)
+
+    old, _ = timeit(nodes)
+    new, _ = timeit(compact)
+    report(f"{title} compact", old, new)
+    for name, fun in [("HuffNode", nodes), ("HuffTree", compact)]:
+        tracemalloc.start()
+        fun()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{'':<40} {name} peak memory {peak / 1024:10.1f} KiB")
+
+
+if __name__ == "__main__":
+    bench_tree(calc_term_freq(InputData(data=read_file("u.exe"))),
+               "u.exe (256 symbols)")
+    bench_tree(random_term_freq(256), "random 256 symbols")
+    bench_tree(random_term_freq(1024), "random 1024 symbols")
+    bench_tree(random_term_freq(4096), "random 4096 symbols")
+    bench_tree(random_term_freq(65536), "random 65536 symbols",
+               sorted_too=False)
+    bench_compact(random_term_freq(256), "random 256 symbols")
+    bench_compact(random_term_freq(65536), "random 65536 symbols")
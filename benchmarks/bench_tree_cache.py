@@ -0,0 +1,60 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    bench_tree_cache.py
+
+    Benchmarks compressing and decompressing many small payloads of the
+    same kind with the Huffman tree cache disabled and enabled: payloads
+    with the same histogram, and near-identical payloads sharing a tree
+    through a quantized cache.
+"""
+
+from bfuncs import timeit, report, read_file
+from huffpress.auxi.modes import Format
+from huffpress.huff.hfunctions import enable_tree_cache, disable_tree_cache
+from huffpress.press.compress import compress_bytes
+from huffpress.press.decompress import decompress_bytes
+
+
+def round_trip(payloads):
+    """
+    Compresses and decompresses every payload in the canonical format
+
+    :param payloads: payloads
+    :return: sizes of the compressed payloads
+    """
+    sizes = []
+    for payload in payloads:
+        comp = compress_bytes(payload, fmt=Format.CANONICAL)
+        assert decompress_bytes(comp) == payload
+        sizes.append(len(comp))
+    return sizes
+
+
+def bench_tree_cache(title, payloads, quantize=0):
+    """
+    Times round trips of the payloads without and with the tree cache
+
+    :param title: benchmark title
+    :param payloads: payloads
+    :param quantize: bits of precision of the histogram keys
+    """
+    disable_tree_cache()
+    old, old_sizes = timeit(lambda: round_trip(payloads))
+    cache = enable_tree_cache(quantize=quantize)
+    try:
+        new, new_sizes = timeit(lambda: round_trip(payloads))
+    finally:
+        disable_tree_cache()
+    report(title, old, new)
+    print(f"{'':<40} hits {cache.hits}  misses {cache.misses}  size "
+          f"{sum(old_sizes)} -> {sum(new_sizes)}")
+
+
+if __name__ == "__main__":
+    data = read_file("d.txt")[:4096]
+    bench_tree_cache("200 x 4 KB same histogram", [data] * 200)
+    similar = [data[:i] + b"e" * (i % 8) + data[i + i % 8:]
+               for i in range(200)]
+    bench_tree_cache("200 x 4 KB similar, exact keys", similar)
+    bench_tree_cache("200 x 4 KB similar, quantize=6", similar, quantize=6)
@@ -0,0 +1,73 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    bfuncs.py
+
+    Benchmark helpers shared by the bench_*.py scripts. Run the scripts from
+    the repository root with the package importable, e.g.
+
+    PYTHONPATH=src python benchmarks/bench_tree.py
+"""
+
+import random
+import time
+from typing import Callable, Dict, Tuple
+from huffpress.huff.htypes import TermFreq
+
+FILES_DIR = "tests/files"
+
+
+def timeit(fun: Callable, repeat: int = 3) -> Tuple[float, object]:
+    """
+    Best wall-clock time of calling fun() repeat times
+
+    :param fun: zero argument function to time
+    :param repeat: number of runs, the fastest is reported
+    :return: (best time in seconds, result of the last call)
+    """
+    best = float("inf")
+    res = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        res = fun()
+        best = min(best, time.perf_counter() - start)
+    return best, res
+
+
+def random_term_freq(symbols: int, seed: int = 0) -> TermFreq:
+    """
+    Random (Zipf-like skewed) term frequency counts over a given alphabet size
+
+    :param symbols: number of unique terms
+    :param seed: random seed so runs are repeatable
+    :return: TermFreq with keys 0 .. symbols - 1
+    """
+    rnd = random.Random(seed)
+    tf: Dict[int, int] = {
+        term: int(100000 / (rank + 1)) + rnd.randint(1, 100)
+        for rank, term in enumerate(rnd.sample(range(symbols), symbols))
+        }
+    return TermFreq(tf=tf)
+
+
+def read_file(name: str) -> bytes:
+    """
+    Reads one of the test files
+
+    :param name: file name in tests/files
+    :return: file contents
+    """
+    with open(f"{FILES_DIR}/{name}", "rb") as f:
+        return f.read()
+
+
+def report(title: str, old: float, new: float):
+    """
+    Prints a single benchmark line with the speedup of new over old
+
+    :param title: benchmark name
+    :param old: old time in seconds
+    :param new: new time in seconds
+    """
+    print(f"{title:<40} old {old * 1000:10.2f} ms   "
+          f"new {new * 1000:10.2f} ms   x{old / new:8.1f}")
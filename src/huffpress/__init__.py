@@ -0,0 +1,7 @@
+from huffpress.press.codec import Codec, Dictionary, train  # noqa: F401
+from huffpress.press.compress import Compressor  # noqa: F401
+from huffpress.press.decompress import Decompressor  # noqa: F401
+from huffpress.press.hacfile import HacFile, open  # noqa: F401
+from huffpress.press.archive import (  # noqa: F401
+    Archive, create_archive, open_archive
+    )
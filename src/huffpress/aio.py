@@ -0,0 +1,200 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    aio.py
+
+    Contains asyncio coroutines compressing and decompressing without
+    blocking the event loop. The CPU heavy work (compressing and decoding
+    blocks, or whole payloads) runs in an executor: the loop's default
+    thread pool, or any concurrent.futures executor such as a
+    ProcessPoolExecutor for encoding on several cores. Streams are read in
+    chunks, several blocks are kept in flight, and every write waits for
+    the writer to drain, so a slow reader of the output slows down the
+    reading of the input instead of filling memory.
+"""
+
+import asyncio
+from collections import deque
+from concurrent.futures import Executor
+from functools import partial
+from typing import Deque, Dict, Optional
+from huffpress.auxi.modes import Format
+from huffpress.press.compress import (
+    compress_bytes, compress_block, BlocksWriter, BLOCK_SIZE, BUFFER_SIZE
+    )
+from huffpress.press.decompress import (
+    decompress_bytes, decode_payload, Decompressor
+    )
+
+MAX_PENDING = 4  # blocks compressed or decoded at a time
+
+
+async def compress_bytes_async(inp_bytes: bytes,
+                               executor: Optional[Executor] = None,
+                               fmt: Format = Format.JSON,
+                               max_code_len: Optional[int] = None,
+                               block_size: int = BLOCK_SIZE) -> bytearray:
+    """
+    Compresses input data bytes in an executor (see
+    press.compress.compress_bytes)
+
+    :param inp_bytes: input data bytes to be compressed
+    :param executor: executor to compress in (None for the loop's default)
+    :param fmt: compressed data format (see compress_bytes)
+    :param max_code_len: maximum code bit-length (see compress_bytes)
+    :param block_size: original size of the blocks of Format.BLOCKS
+    :return: Final compressed bytearray sequence
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        executor, partial(compress_bytes, inp_bytes, fmt=fmt,
+                          max_code_len=max_code_len, block_size=block_size))
+
+
+async def decompress_bytes_async(inp_bytes: bytes,
+                                 executor: Optional[Executor] = None
+                                 ) -> bytearray:
+    """
+    Decompresses data in an executor (see press.decompress.decompress_bytes)
+
+    :param inp_bytes: compressed data
+    :param executor: executor to decompress in (None for the loop's default)
+    :return: decompressed bytearray data
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        executor, decompress_bytes, inp_bytes)
+
+
+async def write(writer: asyncio.StreamWriter, data: bytes):
+    """
+    Writes data and waits for the writer to drain (back-pressure)
+
+    :param writer: output stream
+    :param data: data to write
+    """
+    if data:
+        writer.write(data)
+        await writer.drain()
+
+
+async def compress_stream(reader: asyncio.StreamReader,
+                          writer: asyncio.StreamWriter,
+                          executor: Optional[Executor] = None,
+                          max_code_len: Optional[int] = None,
+                          block_size: int = BLOCK_SIZE,
+                          buffer_size: int = BUFFER_SIZE,
+                          max_pending: int = MAX_PENDING) -> int:
+    """
+    Compresses a stream into the blocks format until the end of its input
+    (the output is the same as compress_bytes of all the input in the
+    blocks format). Blocks are compressed in the executor, up to
+    max_pending at a time, and written in order. The writer is not closed.
+
+    :param reader: input stream
+    :param writer: output stream
+    :param executor: executor compressing the blocks (None for the loop's
+                     default)
+    :param max_code_len: maximum code bit-length (see compress_bytes)
+    :param block_size: original size of the blocks
+    :param buffer_size: number of bytes read at a time
+    :param max_pending: maximum number of blocks compressed at a time
+    :return: number of compressed bytes written
+    """
+    loop = asyncio.get_running_loop()
+    blocks = BlocksWriter()
+    pending: Deque[asyncio.Future] = deque()
+    written = 0
+
+    async def write_next():
+        nonlocal written
+        raw_size, lengths, payload = await pending.popleft()
+        header = blocks.block_header(raw_size, lengths, len(payload))
+        await write(writer, header + payload)
+        written += len(header) + len(payload)
+
+    header = blocks.header(block_size)
+    await write(writer, header)
+    written += len(header)
+    buf = bytearray()
+    while True:
+        chunk = await reader.read(buffer_size)
+        buf += chunk
+        while len(buf) >= block_size or (buf and not chunk):
+            if len(pending) >= max_pending:
+                await write_next()
+            pending.append(loop.run_in_executor(
+                executor, compress_block, bytes(buf[:block_size]),
+                max_code_len))
+            del buf[:block_size]
+        if not chunk:
+            break
+    while pending:
+        await write_next()
+    end = blocks.end()
+    await write(writer, end)
+    return written + len(end)
+
+
+async def decompress_stream(reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter,
+                            executor: Optional[Executor] = None,
+                            buffer_size: int = BUFFER_SIZE,
+                            max_pending: int = MAX_PENDING) -> int:
+    """
+    Decompresses a stream until the end of the compressed data. Blocks of
+    the blocks format are decoded in the executor as soon as they arrive,
+    up to max_pending at a time, and written in order. The bitstream of
+    the other formats is decoded in the executor a chunk at a time (see
+    press.decompress.Decompressor).
+    The writer is not closed.
+
+    :param reader: input stream
+    :param writer: output stream
+    :param executor: executor decoding the blocks (None for the loop's
+                     default)
+    :param buffer_size: number of bytes read at a time
+    :param max_pending: maximum number of blocks decoded at a time
+    :return: number of decompressed bytes written
+    """
+    loop = asyncio.get_running_loop()
+    decomp = Decompressor()
+    pending: Deque[asyncio.Future] = deque()
+    lengths: Optional[Dict[int, int]] = None
+    written = 0
+
+    async def write_next():
+        nonlocal written
+        res = await pending.popleft()
+        await write(writer, res)
+        written += len(res)
+
+    while not decomp.eof:
+        chunk = await reader.read(buffer_size)
+        if not chunk:
+            break
+        blocks = decomp.split(chunk)
+        if decomp.blocks is False:  # bitstream of the other formats
+            res = await loop.run_in_executor(executor,
+                                             decomp.decode_sequence)
+            await write(writer, res)
+            written += len(res)
+            continue
+        for raw_size, own, payload in blocks:
+            if len(pending) >= max_pending:
+                await write_next()
+            if own == {}:  # stored block
+                stored: asyncio.Future = loop.create_future()
+                stored.set_result(payload)
+                pending.append(stored)
+                continue
+            if own is not None:
+                lengths = own
+            elif lengths is None:
+                raise ValueError("First block refers to a previous table")
+            pending.append(loop.run_in_executor(
+                executor, decode_payload, payload, raw_size, lengths))
+    while pending:
+        await write_next()
+    res = await loop.run_in_executor(executor, decomp.flush) \
+        if not decomp.blocks else decomp.flush()
+    await write(writer, res)
+    return written + len(res)
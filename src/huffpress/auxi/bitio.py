@@ -0,0 +1,391 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    bitio.py
+
+    Contains bit level writing of codes into bytes, and reading them back,
+    most significant bit first, and reading of files in chunks.
+"""
+
+from typing import BinaryIO, Iterator, Optional, Union
+
+ByteData = Union[bytes, bytearray, memoryview]
+
+
+class BitWriter(object):
+    """
+    Writes codes of any bit-length into a bytearray, most significant bit
+    first. Bits are accumulated in an integer and whole bytes are flushed
+    into the output buffer, which can be preallocated when the output size
+    is known in advance.
+
+    ...
+
+    Attributes
+    ----------
+    buf : bytearray
+        output buffer
+    pos : int
+        number of bytes written to buf
+    acc : int
+        accumulated bits not flushed yet
+    acc_bits : int
+        number of bits in acc
+
+    Methods
+    -------
+    write(code, length):
+        Writes the lowest length bits of code
+    write_bytes(data):
+        Writes whole bytes
+    drain():
+        Removes and returns the whole bytes written so far
+    getvalue():
+        Pads the last byte with 0's and returns the written bytes
+    """
+    __slots__ = ("buf", "pos", "acc", "acc_bits")
+
+    FLUSH_BITS = 64  # flush once this many bits are accumulated
+
+    def __init__(self, num_bytes: int = 0):
+        """
+        __init__(self, num_bytes: int = 0):
+
+        Constructs BitWriter with a preallocated output buffer
+
+        :param num_bytes: expected number of output bytes
+        """
+        self.buf = bytearray(num_bytes)
+        self.pos = 0
+        self.acc = 0
+        self.acc_bits = 0
+
+    @property
+    def num_bits(self) -> int:
+        """
+        @property
+        def num_bits(self) -> int:
+
+        Number of bits written so far
+
+        :return: number of bits
+        """
+        return 8 * self.pos + self.acc_bits
+
+    def write(self, code: int, length: int):
+        """
+        write(self, code: int, length: int):
+
+        Writes a code: the lowest length bits of code, most significant first
+
+        :param code: code (may be a large integer holding many codes)
+        :param length: bit-length of the code
+        """
+        self.acc = (self.acc << length) | code
+        self.acc_bits += length
+        if self.acc_bits >= self.FLUSH_BITS:
+            self.flush()
+
+    def write_bytes(self, data: bytes):
+        """
+        write_bytes(self, data: bytes):
+
+        Writes whole bytes
+
+        :param data: bytes to write
+        """
+        self.flush()
+        if self.acc_bits:
+            self.write(int.from_bytes(data, "big"), 8 * len(data))
+        else:
+            self.buf[self.pos: self.pos + len(data)] = data
+            self.pos += len(data)
+
+    def flush(self):
+        """
+        flush(self):
+
+        Moves all whole bytes accumulated into the output buffer
+        """
+        num_bytes = self.acc_bits >> 3
+        if num_bytes:
+            rem = self.acc_bits & 7
+            self.buf[self.pos: self.pos + num_bytes] = \
+                (self.acc >> rem).to_bytes(num_bytes, "big")
+            self.pos += num_bytes
+            self.acc &= (1 << rem) - 1
+            self.acc_bits = rem
+
+    def drain(self) -> bytearray:
+        """
+        drain(self) -> bytearray:
+
+        Removes and returns the whole bytes written so far, e.g. to write
+        them to a file while encoding continues. Bits not making up a whole
+        byte yet stay in the writer.
+
+        :return: written bytes
+        """
+        self.flush()
+        res = self.buf
+        if self.pos < len(res):
+            del res[self.pos:]
+        self.buf = bytearray()
+        self.pos = 0
+        return res
+
+    def getvalue(self) -> bytearray:
+        """
+        getvalue(self) -> bytearray:
+
+        Pads the last byte with 0's and returns the written bytes. The output
+        buffer itself is returned (no copy) when it was preallocated to the
+        exact size.
+
+        :return: written bytes
+        """
+        if self.acc_bits & 7:
+            self.write(0, 8 - (self.acc_bits & 7))
+        self.flush()
+        if self.pos < len(self.buf):
+            del self.buf[self.pos:]
+        return self.buf
+
+
+def read_chunks(f: BinaryIO, chunk_size: int) -> Iterator[bytes]:
+    """
+    Reads a file in chunks
+
+    :param f: file opened in binary mode
+    :param chunk_size: number of bytes read at a time
+    :return: iterator of chunks, all chunk_size bytes except the last
+    """
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+class BitReader(object):
+    """
+    Reads bits from a memoryview of bytes, most significant bit first,
+    without copying or expanding the input. Bytes are shifted into an
+    integer bit buffer (acc) a chunk at a time with refill; callers may read
+    acc and acc_bits directly and write back the number of bits left
+    unread, which is how the Huffman decoder consumes the bits.
+
+    ...
+
+    Attributes
+    ----------
+    data : memoryview
+        input bytes
+    pos : int
+        position of the next byte to shift into acc
+    end : int
+        position after the last byte of the bit sequence
+    acc : int
+        bit buffer (only the lowest acc_bits bits are unread)
+    acc_bits : int
+        number of unread bits in acc
+    padding : int
+        number of padding bits at the end of the sequence
+
+    Methods
+    -------
+    legacy(data):
+        Creates a BitReader for a sequence led by its padding-count byte
+    refill(num_bytes):
+        Shifts up to num_bytes more bytes into acc
+    pad(num_bits):
+        Shifts num_bits zero bits into acc
+    read(length):
+        Reads the next length bits
+    """
+    __slots__ = ("data", "pos", "end", "acc", "acc_bits", "padding")
+
+    def __init__(self, data: ByteData, num_bits: Optional[int] = None,
+                 start: int = 0):
+        """
+        __init__(self, data: ByteData, num_bits: Optional[int] = None,
+                 start: int = 0):
+
+        Constructs BitReader over a bit sequence in data
+
+        :param data: bytes, bytearray or memoryview holding the sequence
+        :param num_bits: number of bits in the sequence (default: all bits
+                         from start to the end of data)
+        :param start: byte position in data where the sequence starts
+        """
+        self.data = memoryview(data)
+        if num_bits is None:
+            num_bits = 8 * (len(self.data) - start)
+        self.pos = start
+        self.end = start + (num_bits + 7) // 8
+        self.acc = 0
+        self.acc_bits = 0
+        self.padding = 8 * (self.end - start) - num_bits
+
+    @classmethod
+    def legacy(cls, data: ByteData) -> "BitReader":
+        """
+        @classmethod
+        def legacy(cls, data: ByteData) -> "BitReader":
+
+        Creates a BitReader for a sequence whose first byte is the number of
+        padding bits at the end of the sequence (the JSON format body)
+
+        :param data: padding-count byte followed by the sequence
+        :return: BitReader
+        """
+        return cls(data, 8 * (len(data) - 1) - data[0], start=1)
+
+    @property
+    def bytes_left(self) -> int:
+        """
+        @property
+        def bytes_left(self) -> int:
+
+        Number of bytes not shifted into acc yet
+
+        :return: number of bytes
+        """
+        return self.end - self.pos
+
+    @property
+    def bits_left(self) -> int:
+        """
+        @property
+        def bits_left(self) -> int:
+
+        Number of unread bits of the sequence (padding excluded)
+
+        :return: number of bits
+        """
+        return 8 * self.bytes_left + self.acc_bits - self.padding
+
+    def refill(self, num_bytes: int) -> int:
+        """
+        refill(self, num_bytes: int) -> int:
+
+        Shifts up to num_bytes more bytes of the sequence into acc, dropping
+        the bits already read
+
+        :param num_bytes: maximum number of bytes
+        :return: number of bits added (0 at the end of the sequence)
+        """
+        chunk = self.data[self.pos: min(self.pos + num_bytes, self.end)]
+        num_bits = 8 * len(chunk)
+        self.pos += len(chunk)
+        self.acc = ((self.acc & ((1 << self.acc_bits) - 1)) << num_bits) | \
+            int.from_bytes(chunk, "big")
+        self.acc_bits += num_bits
+        return num_bits
+
+    def pad(self, num_bits: int):
+        """
+        pad(self, num_bits: int):
+
+        Shifts num_bits zero bits into acc, so that lookups of a fixed
+        number of bits never run out near the end of the sequence
+
+        :param num_bits: number of zero bits
+        """
+        self.acc <<= num_bits
+        self.acc_bits += num_bits
+        self.padding += num_bits
+
+    def read(self, length: int) -> int:
+        """
+        read(self, length: int) -> int:
+
+        Reads the next length bits of the sequence
+
+        :param length: number of bits
+        :return: bits as an integer
+        """
+        if length > self.bits_left:
+            raise EOFError(f"Cannot read {length} bits, only "
+                           f"{self.bits_left} left")
+        if self.acc_bits < length:
+            self.refill((length - self.acc_bits + 7) // 8)
+        self.acc_bits -= length
+        return (self.acc >> self.acc_bits) & ((1 << length) - 1)
+
+
+class FileBitReader(BitReader):
+    """
+    BitReader over a bit sequence read from a file a buffer at a time, so
+    that only one buffer of the sequence is in memory. Refills carry on
+    across buffer boundaries, codes split between two buffers are read
+    whole.
+
+    ...
+
+    Attributes
+    ----------
+    f : BinaryIO
+        file positioned at the start of the sequence
+    file_left : int
+        number of bytes of the sequence not read from the file yet
+    buffer_size : int
+        number of bytes read from the file at a time
+    """
+    __slots__ = ("f", "file_left", "buffer_size")
+
+    def __init__(self, f: BinaryIO, num_bits: int, buffer_size: int):
+        """
+        __init__(self, f: BinaryIO, num_bits: int, buffer_size: int):
+
+        Constructs FileBitReader over the next num_bits bits of a file
+
+        :param f: file opened in binary mode, positioned at the sequence
+        :param num_bits: number of bits in the sequence
+        :param buffer_size: number of bytes read from the file at a time
+        """
+        super().__init__(b"", 0)
+        self.f = f
+        self.file_left = (num_bits + 7) // 8
+        self.buffer_size = buffer_size
+        self.padding = 8 * self.file_left - num_bits
+
+    @property
+    def bytes_left(self) -> int:
+        """
+        @property
+        def bytes_left(self) -> int:
+
+        Number of bytes not shifted into acc yet (read or not)
+
+        :return: number of bytes
+        """
+        return self.end - self.pos + self.file_left
+
+    def refill(self, num_bytes: int) -> int:
+        """
+        refill(self, num_bytes: int) -> int:
+
+        Shifts up to num_bytes more bytes of the sequence into acc, reading
+        the next buffer from the file whenever the current one runs out
+
+        :param num_bytes: maximum number of bytes
+        :return: number of bits added (0 at the end of the sequence)
+        """
+        num_bits = 0
+        while num_bytes > 0:
+            if self.pos == self.end:
+                if not self.file_left:
+                    break
+                chunk = self.f.read(min(self.buffer_size, self.file_left))
+                if not chunk:
+                    raise EOFError(f"{self.file_left} bytes missing from "
+                                   f"the end of the file")
+                self.data = memoryview(chunk)
+                self.pos = 0
+                self.end = len(chunk)
+                self.file_left -= len(chunk)
+            added = super().refill(num_bytes)
+            num_bits += added
+            num_bytes -= added >> 3
+        return num_bits
@@ -0,0 +1,255 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    histogram.py
+
+    Byte frequency histogram with a fixed 256 slot array of counts, byte
+    pair histogram with a 65536 slot array (for order-1 contexts), and
+    digram histogram with a 65536 slot array (for 2-byte symbols).
+    Counting uses NumPy (bincount over a zero-copy view of the bytes) when
+    it is installed, otherwise collections.Counter, which counts in C.
+"""
+
+import collections.abc
+import sys
+from array import array
+from collections import Counter
+from typing import Dict, Iterator, List, Union
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:  # pragma: no cover
+    np = None
+
+ByteChunk = Union[bytes, bytearray, memoryview]
+
+COUNT_CHUNK = 1 << 20  # bytes counted at a time (bincount widens to int64)
+DIGRAMS = 256 * 256  # 2-byte symbols
+
+
+class ByteHistogram(collections.abc.Mapping):
+    """
+    ByteHistogram
+
+    Counts of the 256 byte values, which can be accumulated chunk by chunk
+    with update. Can be used as a read only dictionary of the byte values
+    that occur and their counts, in order of first occurrence (the same
+    order collections.Counter gives).
+    """
+
+    def __init__(self, data: ByteChunk = b""):
+        """
+        Creates the histogram, counting the bytes of data if given
+
+        :param data: bytes to count (optional)
+        """
+        self.counts: array = array("Q", bytes(8 * 256))
+        self._order: List[int] = []
+        self.update(data)
+
+    def update(self, chunk: ByteChunk) -> "ByteHistogram":
+        """
+        Adds the byte counts of the chunk to the histogram
+
+        :param chunk: bytes, bytearray or memoryview
+        :return: self
+        """
+        if not len(chunk):
+            return self
+        if len(chunk) > COUNT_CHUNK:
+            view = memoryview(chunk)
+            for start in range(0, len(view), COUNT_CHUNK):
+                self.update(view[start: start + COUNT_CHUNK])
+            return self
+        counts = self.counts
+        if np is not None:
+            new_counts = np.bincount(np.frombuffer(chunk, dtype=np.uint8),
+                                     minlength=256).tolist()
+            seen = [term for term, count in enumerate(new_counts)
+                    if count and not counts[term]]
+            if len(seen) > 1:
+                raw = bytes(chunk) if isinstance(chunk, memoryview) \
+                    else chunk
+                seen.sort(key=raw.find)
+            for term, count in enumerate(new_counts):
+                if count:
+                    counts[term] += count
+        else:
+            counter = Counter(chunk)
+            seen = [term for term in counter if not counts[term]]
+            for term, count in counter.items():
+                counts[term] += count
+        self._order.extend(seen)
+        return self
+
+    def __iter__(self) -> Iterator[int]:
+        """
+        returns iterable of the byte values that occur, in order of first
+        occurrence
+
+        :return:
+        """
+        return iter(self._order)
+
+    def __len__(self) -> int:
+        """
+        returns number of unique byte values that occur
+
+        :return:
+        """
+        return len(self._order)
+
+    def __getitem__(self, term: int) -> int:
+        """
+        gets the count of a byte value
+
+        :param term: byte value
+        :return: count (KeyError if the byte value does not occur)
+        """
+        if not isinstance(term, int) or not 0 <= term < 256 or \
+                not self.counts[term]:
+            raise KeyError(term)
+        return self.counts[term]
+
+    def __repr__(self) -> str:
+        """
+        returns dictionary like representation
+
+        :return:
+        """
+        return f"ByteHistogram({dict(self.items())})"
+
+
+class PairHistogram(object):
+    """
+    PairHistogram
+
+    Counts of the 65536 (previous byte, byte) pairs, which can be
+    accumulated chunk by chunk with update: the previous byte of a chunk's
+    first byte is the last byte of the chunk before (0 before the first
+    chunk). Row prev holds the counts of the bytes following the byte prev,
+    the term frequencies of the order-1 context prev.
+    """
+
+    def __init__(self, data: ByteChunk = b"", prev: int = 0):
+        """
+        Creates the histogram, counting the byte pairs of data if given
+
+        :param data: bytes to count (optional)
+        :param prev: previous byte of the first byte
+        """
+        self.counts: array = array("Q", bytes(8 * 256 * 256))
+        self.prev = prev
+        self.update(data)
+
+    def update(self, chunk: ByteChunk) -> "PairHistogram":
+        """
+        Adds the byte pair counts of the chunk to the histogram
+
+        :param chunk: bytes, bytearray or memoryview
+        :return: self
+        """
+        if not len(chunk):
+            return self
+        if len(chunk) > COUNT_CHUNK:
+            view = memoryview(chunk)
+            for start in range(0, len(view), COUNT_CHUNK):
+                self.update(view[start: start + COUNT_CHUNK])
+            return self
+        counts = self.counts
+        if np is not None:
+            terms = np.frombuffer(chunk, dtype=np.uint8).astype(np.intp)
+            pairs = terms.copy()
+            pairs[0] += self.prev << 8
+            pairs[1:] += terms[:-1] << 8
+            new_counts = np.bincount(pairs, minlength=256 * 256)
+            for pair in np.flatnonzero(new_counts).tolist():
+                counts[pair] += int(new_counts[pair])
+        else:
+            prevs = bytes([self.prev]) + bytes(chunk[:-1])
+            for (prev, term), count in Counter(zip(prevs, chunk)).items():
+                counts[(prev << 8) | term] += count
+        self.prev = chunk[-1]
+        return self
+
+    def row(self, prev: int) -> Dict[int, int]:
+        """
+        Counts of the bytes following a byte
+
+        :param prev: previous byte (the context)
+        :return: dictionary of the bytes that occur after prev and their
+                 counts
+        """
+        start = prev << 8
+        return {term: count for term, count in
+                enumerate(self.counts[start: start + 256]) if count}
+
+
+def digrams(chunk: ByteChunk) -> array:
+    """
+    Splits bytes into 2-byte symbols (digrams) from the start, the first
+    byte of each pair in the low bits of its symbol. A trailing odd byte
+    is left out.
+
+    :param chunk: bytes, bytearray or memoryview
+    :return: array of 16 bit symbols
+    """
+    symbols = array("H", bytes(memoryview(chunk)[:len(chunk) & ~1]))
+    if sys.byteorder == "big":
+        symbols.byteswap()
+    return symbols
+
+
+class DigramHistogram(object):
+    """
+    DigramHistogram
+
+    Counts of the 65536 2-byte symbols of data split into byte pairs from
+    its start (see digrams), which can be accumulated chunk by chunk with
+    update, as long as every chunk but the last has an even length.
+    """
+
+    def __init__(self, data: ByteChunk = b""):
+        """
+        Creates the histogram, counting the digrams of data if given
+
+        :param data: bytes to count (optional)
+        """
+        self.counts: array = array("Q", bytes(8 * DIGRAMS))
+        self.update(data)
+
+    def update(self, chunk: ByteChunk) -> "DigramHistogram":
+        """
+        Adds the digram counts of the chunk to the histogram
+
+        :param chunk: bytes, bytearray or memoryview
+        :return: self
+        """
+        if len(chunk) > COUNT_CHUNK:
+            view = memoryview(chunk)
+            for start in range(0, len(view), COUNT_CHUNK):
+                self.update(view[start: start + COUNT_CHUNK])
+            return self
+        if len(chunk) < 2:
+            return self
+        counts = self.counts
+        if np is not None:
+            symbols = np.frombuffer(chunk, dtype="<u2",
+                                    count=len(chunk) // 2)
+            new_counts = np.bincount(symbols, minlength=DIGRAMS)
+            for symbol in np.flatnonzero(new_counts).tolist():
+                counts[symbol] += int(new_counts[symbol])
+        else:
+            for symbol, count in Counter(digrams(chunk)).items():
+                counts[symbol] += count
+        return self
+
+    def terms(self) -> Dict[int, int]:
+        """
+        Counts of the digrams that occur
+
+        :return: dictionary of 2-byte symbols and their counts, in symbol
+                 order
+        """
+        return {symbol: count for symbol, count in enumerate(self.counts)
+                if count}
@@ -6,10 +6,10 @@
     Immutable dictionary
 """
 
-import collections
+import collections.abc
 
 
-class IDict(collections.Mapping):
+class IDict(collections.abc.Mapping):
     """
     IDict
 
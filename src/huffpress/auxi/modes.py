@@ -3,8 +3,7 @@
 
     modes.py
 
-    Contains all modes used in the rest of the codebase (currently we only
-    have 1 mode).
+    Contains all modes used in the rest of the codebase.
 """
 
 from enum import Enum
@@ -21,3 +20,51 @@ class Mode(Enum):
     DEFAULT = 0
     FILE = 1
     RAW = 2
+
+
+class Engine(Enum):
+    """
+    Huffman tree building engines
+
+    0 - Heap (priority queue of HuffNode's, O(n log n) in the number of
+        unique terms)
+    1 - Sorted (original list re-sort after every merge, O(n^2 log n))
+    2 - Compact (array backed HuffTree, leaves sorted once then merged
+        with two queues in linear time; the default)
+
+    All engines merge nodes in the same order, so they build identical
+    codes.
+    """
+    HEAP = 0
+    SORTED = 1
+    COMPACT = 2
+
+
+class Format(Enum):
+    """
+    Compressed data formats
+
+    0 - JSON (Huffman map stored as radix-36 JSON in a header)
+    1 - Canonical (only code lengths stored, packed in a binary header)
+    2 - Blocks (independently decodable blocks of canonical codes, each
+        with its own code lengths or a reference to the previous block's)
+    3 - Stored (original data as is, written instead of a format that
+        would expand it)
+    4 - Codec (messages encoded with the tables of a press.codec.Codec,
+        only its id is stored)
+    5 - Context (order-1 context codes: every byte coded with the table of
+        the byte before it, contexts clustered into a few tables)
+    6 - Digram (canonical codes of 2-byte symbols, an alphabet of up to
+        65536 symbols)
+    7 - Archive (many files in one, each coded with its own table or a
+        table shared by similar small files, found through a central
+        directory)
+    """
+    JSON = 0
+    CANONICAL = 1
+    BLOCKS = 2
+    STORED = 3
+    CODEC = 4
+    CONTEXT = 5
+    DIGRAM = 6
+    ARCHIVE = 7
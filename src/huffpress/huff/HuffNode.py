@@ -16,7 +16,9 @@ class HuffNode(object):
     Attributes
     ----------
     term : str
-        ordinal character terms i.e. ascii values delimited by comma
+        ordinal character terms i.e. ascii values delimited by comma. For
+        internal nodes built without an explicit term, this is derived from
+        the children on first access (and cached)
     freq : int
         total number of occurrences of this term
     left_child : HuffNode
@@ -29,23 +31,57 @@ class HuffNode(object):
     is_leaf():
         Returns True if leaf node, otherwise False
     """
-    def __init__(self, term: str, freq: int, left_child=None, right_child=None):
+    __slots__ = ("_term", "freq", "left_child", "right_child")
+
+    def __init__(self, term, freq: int, left_child=None, right_child=None):
         """
-        __init__(self, term: str, freq: int, left_child=None, right_child=None):
+        __init__(self, term, freq: int, left_child=None, right_child=None):
 
         Constructs HuffNode with all necessary attributes
 
         :param term: (str) ordinal character terms i.e. ascii values
-                     delimited by comma
+                     delimited by comma. None for internal nodes, where the
+                     term is derived from the children when first needed
         :param freq: (int) total number of occurrences of this term
         :param left_child: (HuffNode) left child node / recursive left branch
         :param right_child: (HuffNode) right child node / recursive right branch
         """
-        self.term = term
+        self._term = term
         self.freq = freq
         self.left_child = left_child
         self.right_child = right_child
 
+    @property
+    def term(self):
+        """
+        @property
+        def term(self):
+
+        Returns the node term. Internal nodes join their children's terms
+        with a comma e.g. "65,66", which is only done on first access so that
+        building a tree does not pay for ever-growing strings.
+
+        :return: leaf term or comma delimited terms of all leaves below
+        """
+        if self._term is None and not self.is_leaf:
+            left_term = "" if self.left_child is None else self.left_child.term
+            right_term = "" if self.right_child is None \
+                else self.right_child.term
+            self._term = f"{left_term},{right_term}"
+        return self._term
+
+    @term.setter
+    def term(self, value):
+        """
+        @term.setter
+        def term(self, value):
+
+        Sets the node term explicitly
+
+        :param value: ordinal character terms delimited by comma
+        """
+        self._term = value
+
     @property
     def is_leaf(self) -> bool:
         """
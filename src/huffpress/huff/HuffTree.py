@@ -0,0 +1,158 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    HuffTree.py
+
+    Compact Huffman tree class backed by parallel arrays
+"""
+
+from array import array
+from typing import List, Optional
+from huffpress.huff.HuffNode import HuffNode
+
+
+class HuffTree(object):
+    """
+    A class representing a whole Huffman Binary tree as parallel arrays,
+    indexed by node: leaves first (in the order of the term frequencies),
+    then internal nodes in the order they were merged, the root last.
+    Children always have lower indexes than their parent.
+
+    The HuffNode interface (term, freq, left_child, right_child, is_leaf) of
+    the root node is available on the tree itself, through a HuffNode view
+    that is only built when first used (e.g. by print_node).
+
+    ...
+
+    Attributes
+    ----------
+    terms : array('q')
+        term of every leaf node (-1 for internal nodes)
+    freqs : array('Q')
+        total number of occurrences of every node's terms
+    lefts : array('i')
+        left child node index (-1 for leaves)
+    rights : array('i')
+        right child node index (-1 for leaves and missing right children)
+    root : int
+        root node index (-1 for an empty tree)
+
+    Methods
+    -------
+    is_leaf_node(idx):
+        Returns True if node idx is a leaf node, otherwise False
+    """
+    __slots__ = ("terms", "freqs", "lefts", "rights", "root", "_node")
+
+    def __init__(self, num_leaves: int = 0):
+        """
+        __init__(self, num_leaves: int = 0):
+
+        Constructs an empty HuffTree with room for the given number of leaves
+
+        :param num_leaves: number of leaves (unique terms)
+        """
+        num_nodes = max(2 * num_leaves - 1, num_leaves)
+        self.terms: array = array("q", [-1]) * num_nodes
+        self.freqs: array = array("Q", [0]) * num_nodes
+        self.lefts: array = array("i", [-1]) * num_nodes
+        self.rights: array = array("i", [-1]) * num_nodes
+        self.root: int = -1
+        self._node: Optional[HuffNode] = None
+
+    def is_leaf_node(self, idx: int) -> bool:
+        """
+        is_leaf_node(self, idx: int) -> bool:
+
+        Checks if node idx is a leaf node
+
+        :param idx: node index
+        :return: True if leaf, False otherwise
+        """
+        return self.lefts[idx] < 0 and self.rights[idx] < 0
+
+    @property
+    def node(self) -> Optional[HuffNode]:
+        """
+        @property
+        def node(self) -> Optional[HuffNode]:
+
+        HuffNode view of the tree, built on first access
+
+        :return: root HuffNode (None for an empty tree)
+        """
+        if self._node is None and self.root >= 0:
+            nodes: List[Optional[HuffNode]] = [None] * (self.root + 1)
+            for idx in range(self.root + 1):
+                left, right = self.lefts[idx], self.rights[idx]
+                if left < 0 and right < 0:
+                    nodes[idx] = HuffNode(self.terms[idx], self.freqs[idx])
+                else:
+                    nodes[idx] = HuffNode(
+                        term=None,
+                        freq=self.freqs[idx],
+                        left_child=nodes[left] if left >= 0 else None,
+                        right_child=nodes[right] if right >= 0 else None
+                        )
+            self._node = nodes[self.root]
+        return self._node
+
+    @property
+    def term(self):
+        """
+        @property
+        def term(self):
+
+        Root node term (see HuffNode.term)
+
+        :return: comma delimited terms of all leaves
+        """
+        return None if self.node is None else self.node.term
+
+    @property
+    def freq(self) -> int:
+        """
+        @property
+        def freq(self) -> int:
+
+        Root node total number of occurrences
+
+        :return: total frequency
+        """
+        return self.freqs[self.root] if self.root >= 0 else 0
+
+    @property
+    def left_child(self) -> Optional[HuffNode]:
+        """
+        @property
+        def left_child(self) -> Optional[HuffNode]:
+
+        Root node left child, as a HuffNode
+
+        :return: HuffNode or None
+        """
+        return None if self.node is None else self.node.left_child
+
+    @property
+    def right_child(self) -> Optional[HuffNode]:
+        """
+        @property
+        def right_child(self) -> Optional[HuffNode]:
+
+        Root node right child, as a HuffNode
+
+        :return: HuffNode or None
+        """
+        return None if self.node is None else self.node.right_child
+
+    @property
+    def is_leaf(self) -> bool:
+        """
+        @property
+        def is_leaf(self) -> bool:
+
+        Checks if the root node is a leaf node
+
+        :return: True if leaf, False otherwise
+        """
+        return self.root < 0 or self.is_leaf_node(self.root)
@@ -0,0 +1,161 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    hcontext.py
+
+    Contains the order-1 context model: every byte is coded with the code
+    table of the byte before it (its context), so that e.g. the byte after
+    "q" is coded with codes fitted to the bytes which follow "q". The 256
+    contexts are clustered into a few code tables, contexts followed by
+    similar bytes sharing a table, which keeps the headers small.
+"""
+
+from math import log2
+from operator import mul
+from typing import Dict, List, Tuple
+from huffpress.auxi.histogram import PairHistogram
+from huffpress.huff.htypes import TermFreq
+
+CONTEXTS = 256  # one context per previous byte value
+CONTEXT_TABLES = 8  # code tables the contexts are clustered into by default
+CLUSTER_ROUNDS = 8  # maximum rounds of reassigning contexts to tables
+SMOOTHING = 0.5  # count added to every term when estimating code lengths
+
+
+def entropy_bits(counts: List[int]) -> float:
+    """
+    Encoded size of the terms counted, with ideal code bit-lengths fitted to
+    the counts: N log2 N - sum of n log2 n
+
+    :param counts: count of every byte term
+    :return: number of bits
+    """
+    total = sum(counts)
+    if not total:
+        return 0.0
+    return total * log2(total) - sum(count * log2(count)
+                                     for count in counts if count)
+
+
+def table_bits(counts: List[int]) -> int:
+    """
+    Approximate size of the packed code-length table of the terms counted
+    (the smaller of the sparse and nibble kinds of
+    press.container.pack_code_lengths)
+
+    :param counts: count of every byte term
+    :return: number of bits
+    """
+    num_terms = CONTEXTS - counts.count(0)
+    return 8 * min(2 + 2 * num_terms, 33 + (num_terms + 1) // 2)
+
+
+def estimate_lengths(counts: List[int]) -> List[float]:
+    """
+    Estimated code bit-length of every byte term under a table fitted to
+    the counts, smoothed so that terms missing from the counts get long
+    rather than no codes
+
+    :param counts: count of every byte term
+    :return: list of 256 estimated bit-lengths
+    """
+    total = log2(sum(counts) + SMOOTHING * CONTEXTS)
+    return [total - log2(count + SMOOTHING) for count in counts]
+
+
+def merge_counts(rows: List[List[int]]) -> List[int]:
+    """
+    Sums term counts
+
+    :param rows: counts of every byte term
+    :return: summed count of every byte term
+    """
+    return [sum(counts) for counts in zip(*rows)] if rows \
+        else [0] * CONTEXTS
+
+
+def cluster_contexts(pairs: PairHistogram,
+                     num_tables: int = CONTEXT_TABLES,
+                     rounds: int = CLUSTER_ROUNDS
+                     ) -> Tuple[List[int], List[TermFreq]]:
+    """
+    Clusters the contexts into at most num_tables code tables. The most
+    frequent contexts seed the tables, then every context is reassigned to
+    the table with the cheapest estimated codes for its terms, and the
+    tables refitted, until the assignment settles. Finally tables are
+    merged as long as saving a code-length table outweighs the bits lost
+    by sharing codes.
+
+    :param pairs: byte pair counts of the data
+    :param num_tables: maximum number of code tables
+    :param rounds: maximum number of reassignment rounds
+    :return: (table number of every context, term frequencies of every
+             table); contexts which do not occur use table 0
+    """
+    if num_tables < 1:
+        raise ValueError(f"Invalid number of context tables {num_tables}")
+    rows: Dict[int, List[int]] = {}
+    for ctx in range(CONTEXTS):
+        row: List[int] = pairs.counts[ctx * CONTEXTS:
+                                      (ctx + 1) * CONTEXTS].tolist()
+        if any(row):
+            rows[ctx] = row
+    contexts: List[int] = sorted(rows, key=lambda ctx: -sum(rows[ctx]))
+    tables: List[List[int]] = [rows[ctx] for ctx in contexts[:num_tables]]
+    assign: Dict[int, int] = {ctx: num for num, ctx in
+                              enumerate(contexts[:num_tables])}
+
+    present: Dict[int, Tuple[List[int], List[int]]] = {
+        ctx: ([term for term, count in enumerate(row) if count],
+              [count for count in row if count])
+        for ctx, row in rows.items()
+        }
+    for _ in range(rounds if len(contexts) > num_tables else 0):
+        estimates = [estimate_lengths(table) for table in tables]
+        new_assign = {
+            ctx: min(range(len(tables)), key=lambda num: sum(map(
+                mul, present[ctx][1],
+                map(estimates[num].__getitem__, present[ctx][0]))))
+            for ctx in contexts
+            }
+        if new_assign == assign:
+            break
+        assign = new_assign
+        tables = [merge_counts([rows[ctx] for ctx in contexts
+                                if assign[ctx] == num])
+                  for num in range(len(tables))]
+
+    members: List[List[int]] = [
+        [ctx for ctx in contexts if assign[ctx] == num]
+        for num in range(len(tables))
+        ]
+    members = [ctxs for ctxs in members if ctxs]
+    tables = [merge_counts([rows[ctx] for ctx in ctxs]) for ctxs in members]
+    bits: List[float] = [entropy_bits(table) + table_bits(table)
+                         for table in tables]
+    while len(tables) > 1:
+        best: Tuple[float, int, int] = (0.0, 0, 0)
+        for i in range(len(tables)):
+            for j in range(i + 1, len(tables)):
+                merged = merge_counts([tables[i], tables[j]])
+                delta = entropy_bits(merged) + table_bits(merged) - \
+                    bits[i] - bits[j]
+                if delta < best[0]:
+                    best = (delta, i, j)
+        _, i, j = best
+        if i == j:
+            break
+        tables[i] = merge_counts([tables[i], tables[j]])
+        bits[i] = entropy_bits(tables[i]) + table_bits(tables[i])
+        members[i] += members.pop(j)
+        del tables[j], bits[j]
+
+    context_map: List[int] = [0] * CONTEXTS
+    for num, ctxs in enumerate(members):
+        for ctx in ctxs:
+            context_map[ctx] = num
+    return context_map, [
+        TermFreq(tf={term: count for term, count in enumerate(table)
+                     if count})
+        for table in tables
+        ]
@@ -0,0 +1,374 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    hdecode.py
+
+    Contains table-driven Huffman decoding: rather than reading the Huffman
+    sequence one bit at a time, the next DECODE_BITS bits are looked up in a
+    precomputed table, which gives all the terms encoded within those bits
+    at once. Codes longer than DECODE_BITS continue in second level tables.
+"""
+
+from typing import BinaryIO, Dict, List, Optional, Tuple
+from huffpress.auxi.bitio import BitReader, ByteData
+from huffpress.huff.htypes import HuffTable, DecodeTable
+
+DECODE_BITS = 12  # bits looked up at a time (4096 entry first level table)
+REFILL_BYTES = 32  # bytes read into the bit buffer at a time
+OUT_BYTES = 1 << 16  # decoded bytes written to an output file at a time
+
+
+def build_decode_table(table: HuffTable, bits: int = DECODE_BITS,
+                       width: int = 1) -> DecodeTable:
+    """
+    Builds the lookup table for decoding Huffman sequences encoded with the
+    given codes
+
+    :param table: Huffman code table of (code, bit-length) pairs
+    :param bits: bits looked up at a time (first level table size is 2^bits)
+    :param width: bytes decoded per term: 1 for byte terms, 2 for digram
+                  terms (the first byte in the low bits of the term)
+    :return: DecodeTable
+    """
+    codes: List[Tuple[int, int, bytes]] = [
+        (code, length, term.to_bytes(width, "little"))
+        for term, (code, length) in table.data.items()
+        ]
+    max_len = max((length for _, length, _ in codes), default=0)
+    return build_level(codes, max(1, min(bits, max_len)), bits, multi=True)
+
+
+def build_level(codes: List[Tuple[int, int, bytes]], bits: int,
+                sub_bits: int, multi: bool = False) -> DecodeTable:
+    """
+    Builds one level of the decoding table
+
+    :param codes: (code, bit-length, term bytes) of the codes in this level,
+                  without the bits already consumed by the levels above
+    :param bits: bits looked up by this level
+    :param sub_bits: maximum bits looked up by the levels below
+    :param multi: set to True to decode as many terms as fit in bits
+                  (first level only)
+    :return: DecodeTable for this level
+    """
+    size = 1 << bits
+    max_len = max((length for _, length, _ in codes), default=0)
+    first_outs: List[bytes] = [b""] * size
+    first_lens: List[int] = [0] * size
+    subs: List[Optional[DecodeTable]] = [None] * size
+
+    long_codes: Dict[int, List[Tuple[int, int, bytes]]] = {}
+    for code, length, out in codes:
+        if length <= bits:
+            start = code << (bits - length)
+            for idx in range(start, start + (1 << (bits - length))):
+                first_outs[idx] = out
+                first_lens[idx] = length
+        else:
+            rest = length - bits
+            long_codes.setdefault(code >> rest, []).append(
+                (code & ((1 << rest) - 1), rest, out))
+
+    for prefix, sub_codes in long_codes.items():
+        longest = max(length for _, length, _ in sub_codes)
+        subs[prefix] = build_level(sub_codes, min(sub_bits, longest),
+                                   sub_bits)
+
+    outs: List[bytes] = first_outs
+    lens: List[int] = first_lens
+    if multi:
+        # keep decoding terms from the bits left after the first term,
+        # as long as the next code fits entirely in this level's bits
+        outs = list(first_outs)
+        lens = list(first_lens)
+        mask = size - 1
+        for idx in range(size):
+            used = lens[idx]
+            if not used:
+                continue
+            out = outs[idx]
+            while True:
+                nxt = (idx << used) & mask
+                length = first_lens[nxt]
+                if not length or used + length > bits:
+                    break
+                out += first_outs[nxt]
+                used += length
+            outs[idx] = out
+            lens[idx] = used
+
+    return DecodeTable(bits=bits, max_len=max_len, outs=outs, lens=lens,
+                       first_outs=first_outs, first_lens=first_lens,
+                       subs=subs)
+
+
+def decode_long(dtable: DecodeTable, idx: int, acc: int,
+                acc_bits: int) -> Tuple[bytes, int]:
+    """
+    Decodes a code longer than the first level table bits by walking down
+    the sub tables
+
+    :param dtable: first level DecodeTable
+    :param idx: first level index (the leading bits of the code)
+    :param acc: bit buffer
+    :param acc_bits: number of unread bits in the bit buffer
+    :return: (decoded term, number of unread bits left after the code)
+    """
+    sub = dtable.subs[idx]
+    acc_bits -= dtable.bits
+    while sub is not None:
+        idx = (acc >> (acc_bits - sub.bits)) & ((1 << sub.bits) - 1)
+        length = sub.first_lens[idx]
+        if length:
+            return sub.first_outs[idx], acc_bits - length
+        acc_bits -= sub.bits
+        sub = sub.subs[idx]
+    raise ValueError("Invalid Huffman sequence: no code matches")
+
+
+def decode_bits(dtable: DecodeTable, data: ByteData, num_bits: int,
+                start: int = 0) -> bytearray:
+    """
+    Decodes a Huffman sequence with a lookup table
+
+    :param dtable: DecodeTable built by build_decode_table
+    :param data: bytes holding the Huffman sequence, most significant bit
+                 first
+    :param num_bits: number of bits in the sequence
+    :param start: byte position in data where the sequence starts
+    :return: decoded bytearray
+    """
+    return decode_reader(dtable, BitReader(data, num_bits, start))
+
+
+def decode_reader(dtable: DecodeTable, reader: BitReader,
+                  out: Optional[BinaryIO] = None,
+                  out_size: int = OUT_BYTES) -> bytearray:
+    """
+    Decodes the Huffman sequence read by a BitReader with a lookup table.
+    If an output file is given, the decoded terms are written to it in
+    writes of about out_size bytes as decoding goes, and only the last
+    ones (fewer than out_size) are returned.
+
+    :param dtable: DecodeTable built by build_decode_table
+    :param reader: BitReader positioned at the start of the sequence
+    :param out: file opened in binary mode to write decoded terms to
+                (optional)
+    :param out_size: number of decoded bytes written to out at a time
+    :return: decoded bytearray (not written to out)
+    """
+    res = bytearray()
+    bits = dtable.bits
+    mask = (1 << bits) - 1
+    outs = dtable.outs
+    lens = dtable.lens
+    need = max(dtable.max_len, 1)  # bits needed to resolve any code
+    bits_left = reader.bits_left  # bits of the sequence not decoded yet
+
+    # main loop: every lookup is guaranteed to only read sequence bits
+    while bits_left >= need and reader.refill(REFILL_BYTES):
+        acc = reader.acc
+        acc_bits = start_bits = reader.acc_bits
+        floor = need + max(0, acc_bits - bits_left)
+        while acc_bits >= floor:
+            idx = (acc >> (acc_bits - bits)) & mask
+            used = lens[idx]
+            if used:
+                res += outs[idx]
+                acc_bits -= used
+            else:
+                term, acc_bits = decode_long(dtable, idx, acc, acc_bits)
+                res += term
+        reader.acc_bits = acc_bits
+        bits_left -= start_bits - acc_bits
+        if out is not None and len(res) >= out_size:
+            out.write(res)
+            res = bytearray()
+
+    # tail: fewer bits left than the longest code, decode one term at a time
+    # from a zero padded buffer, stopping at the first code that overruns
+    reader.refill(reader.bytes_left)
+    reader.pad(need)
+    acc = reader.acc
+    acc_bits = reader.acc_bits
+    while bits_left > 0:
+        idx = (acc >> (acc_bits - bits)) & mask
+        used = dtable.first_lens[idx]
+        if used:
+            term = dtable.first_outs[idx]
+        else:
+            try:
+                term, new_bits = decode_long(dtable, idx, acc, acc_bits)
+            except ValueError:
+                break  # only padding bits left
+            used = acc_bits - new_bits
+        if used > bits_left:
+            break
+        res += term
+        acc_bits -= used
+        bits_left -= used
+    reader.acc_bits = acc_bits
+    return res
+
+
+def decode_context_reader(dtables: List[DecodeTable], reader: BitReader,
+                          num_terms: int, out: Optional[BinaryIO] = None,
+                          out_size: int = OUT_BYTES, prev: int = 0,
+                          final: bool = True) -> bytearray:
+    """
+    Decodes an order-1 context Huffman sequence (see huff.hcontext) read by
+    a BitReader: every term is decoded with the table of its context, the
+    term before it (0 for the first term). As the table can change after
+    every term, terms are looked up one at a time. If an output file is
+    given, the decoded terms are written to it as decoding goes, like
+    decode_reader.
+
+    :param dtables: DecodeTable of every context (256, shared by the
+                    contexts clustered together)
+    :param reader: BitReader positioned at the start of the sequence
+    :param num_terms: number of terms to decode
+    :param out: file opened in binary mode to write decoded terms to
+                (optional)
+    :param out_size: number of decoded bytes written to out at a time
+    :param prev: context of the first term (the term before it)
+    :param final: set to False when the reader only holds part of the
+                  sequence: decoding stops before the first term whose
+                  code may not be complete yet, leaving its bits unread
+    :return: decoded bytearray (not written to out)
+    """
+    levels: Dict[int, Tuple[int, int, List[int], List[int], DecodeTable]] = {}
+    for dtable in dtables:
+        if id(dtable) not in levels:
+            levels[id(dtable)] = (
+                dtable.bits, (1 << dtable.bits) - 1, dtable.first_lens,
+                [term[0] if term else 0 for term in dtable.first_outs],
+                dtable)
+    contexts = [levels[id(dtable)] for dtable in dtables]
+    need = max(max(dtable.max_len, 1) for dtable in dtables)
+    res = bytearray()
+    left = num_terms
+    while left:
+        if not reader.refill(REFILL_BYTES):
+            if not final:
+                break
+            if reader.bits_left < 0:
+                raise ValueError("Invalid Huffman sequence: ran out of bits")
+            reader.pad(need)
+        acc = reader.acc
+        acc_bits = reader.acc_bits
+        while left and acc_bits >= need:
+            bits, mask, lens, terms, dtable = contexts[prev]
+            idx = (acc >> (acc_bits - bits)) & mask
+            used = lens[idx]
+            if used:
+                prev = terms[idx]
+                acc_bits -= used
+            else:
+                term, acc_bits = decode_long(dtable, idx, acc, acc_bits)
+                prev = term[0]
+            res.append(prev)
+            left -= 1
+        reader.acc_bits = acc_bits
+        if out is not None and len(res) >= out_size:
+            out.write(res)
+            res = bytearray()
+    if reader.bits_left < 0:
+        raise ValueError("Invalid Huffman sequence: ran out of bits")
+    return res
+
+
+class ChunkDecoder(object):
+    """
+    Decodes a Huffman sequence given a chunk at a time (e.g. as it arrives
+    from a socket), keeping only the bits of the code split between the
+    last chunk and the next. The terms of every chunk are decoded with
+    decode_reader (or decode_context_reader for order-1 context codes),
+    which stop before the first code not complete yet.
+
+    ...
+
+    Attributes
+    ----------
+    dtable : Optional[DecodeTable]
+        decoding table (None for context codes)
+    dtables : Optional[List[DecodeTable]]
+        decoding table of every context (context codes only)
+    left : Optional[int]
+        number of bytes left to decode, the rest of the sequence being
+        padding (None to decode the whole sequence)
+    prev : int
+        last decoded byte, the context of the next term (context codes)
+    acc : int
+        bits not decoded yet
+    acc_bits : int
+        number of bits not decoded yet
+
+    Methods
+    -------
+    decode(chunk, final, padding):
+        Decodes the terms completed by a chunk of the sequence
+    """
+
+    def __init__(self, num_bytes: Optional[int],
+                 dtable: Optional[DecodeTable] = None,
+                 dtables: Optional[List[DecodeTable]] = None):
+        """
+        __init__(self, num_bytes: Optional[int],
+                 dtable: Optional[DecodeTable] = None,
+                 dtables: Optional[List[DecodeTable]] = None):
+
+        Constructs ChunkDecoder
+
+        :param num_bytes: number of bytes the sequence decodes to (None
+                          when only the padding of the last chunk ends it)
+        :param dtable: decoding table
+        :param dtables: decoding table of every context (instead of dtable,
+                        for order-1 context codes)
+        """
+        self.dtable = dtable
+        self.dtables = dtables
+        self.left = num_bytes
+        self.prev = 0
+        self.acc = 0
+        self.acc_bits = 0
+
+    def decode(self, chunk: ByteData, final: bool = False,
+               padding: int = 0) -> bytearray:
+        """
+        decode(self, chunk: ByteData, final: bool = False,
+               padding: int = 0) -> bytearray:
+
+        Decodes the terms completed by the next chunk of the sequence
+
+        :param chunk: next bytes of the sequence
+        :param final: set to True for the last chunk
+        :param padding: number of padding bits ending the last chunk
+        :return: decoded bytes
+        """
+        if self.left == 0:
+            return bytearray()  # only padding left
+        reader = BitReader(chunk, 8 * len(chunk) - padding)
+        reader.acc, reader.acc_bits = self.acc, self.acc_bits
+        res: bytearray
+        if self.dtables is not None and self.left is not None:
+            res = decode_context_reader(self.dtables, reader, self.left,
+                                        prev=self.prev, final=final)
+            if res:
+                self.prev = res[-1]
+        elif self.dtable is not None:
+            res = decode_reader(self.dtable, reader)
+            if self.left is not None:
+                del res[self.left:]  # terms decoded from padding bits
+        else:
+            raise ValueError("ChunkDecoder needs a decoding table, or "
+                             "context tables and the number of bytes")
+        if self.left is not None:
+            self.left -= len(res)
+        if final and self.left:
+            raise EOFError(f"Huffman sequence ended {self.left} bytes "
+                           f"before its end")
+        bits = reader.bits_left if self.left != 0 else 0
+        self.acc = (reader.acc >> (reader.acc_bits - bits)) & \
+            ((1 << bits) - 1)
+        self.acc_bits = bits
+        return res
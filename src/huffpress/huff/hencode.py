@@ -0,0 +1,79 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    hencode.py
+
+    Contains Huffman encoding of input data into packed bits. The code of
+    every term is looked up in a precomputed table, and the codes of a whole
+    chunk of input are packed into one integer at a time, which is written
+    with a BitWriter.
+"""
+
+from operator import getitem
+from typing import List
+from tqdm import tqdm  # type: ignore
+from huffpress.auxi.bitio import BitWriter
+from huffpress.huff.htypes import HuffTable
+
+ENCODE_CHUNK = 1 << 16  # input terms packed at a time
+
+
+def build_encode_table(table: HuffTable) -> List[str]:
+    """
+    Binary sequence of every term, indexed by the term
+
+    :param table: Huffman code table of (code, bit-length) pairs
+    :return: list of binary sequence strings ("" for terms without a code)
+    """
+    codes: List[str] = [""] * (max(table.data, default=255) + 1)
+    for term, (code, length) in table.data.items():
+        codes[term] = format(code, f"0{length}b") if length else ""
+    return codes
+
+
+def encode_bits(codes: List[str], data, writer: BitWriter,
+                chunk_size: int = ENCODE_CHUNK, verbose: bool = False):
+    """
+    Encodes the input data, writing the codes of its terms. Each chunk of
+    input is joined into one binary sequence, which is converted to an
+    integer in one go (in C) rather than shifting in one code at a time, so
+    only one chunk's sequence is ever held in memory.
+
+    :param codes: binary sequence of every term (build_encode_table)
+    :param data: input bytes (or sequence of terms)
+    :param writer: BitWriter to write the codes to
+    :param chunk_size: number of input terms encoded at a time
+    :param verbose: set to True for printing console outputs
+    """
+    lookup = codes.__getitem__
+    for start in tqdm(range(0, len(data), chunk_size), disable=not verbose):
+        bits = "".join(map(lookup, data[start: start + chunk_size]))
+        if bits:
+            writer.write(int(bits, 2), len(bits))
+
+
+def encode_context_bits(codes: List[List[str]], data, writer: BitWriter,
+                        prev: int = 0, chunk_size: int = ENCODE_CHUNK,
+                        verbose: bool = False) -> int:
+    """
+    Encodes the input data with order-1 context codes (see huff.hcontext):
+    every term is written with the codes of its context, the term before
+    it, looked up chunk by chunk like encode_bits
+
+    :param codes: binary sequence of every term (build_encode_table), for
+                  every context
+    :param data: input bytes
+    :param writer: BitWriter to write the codes to
+    :param prev: context of the first term (the term before the data)
+    :param chunk_size: number of input terms encoded at a time
+    :param verbose: set to True for printing console outputs
+    :return: last term of the data, the context of the next term
+    """
+    for start in tqdm(range(0, len(data), chunk_size), disable=not verbose):
+        chunk = data[start: start + chunk_size]
+        prevs = bytes([prev]) + bytes(chunk[:-1])
+        bits = "".join(map(getitem, map(codes.__getitem__, prevs), chunk))
+        if bits:
+            writer.write(int(bits, 2), len(bits))
+        prev = chunk[-1]
+    return prev
@@ -9,16 +9,26 @@
 # TODO: Refactor bytesarray/bytes and str to typing.AnyStr
 
 
-from collections import Counter
+import heapq
+import threading
+from collections import Counter, OrderedDict
 from tqdm import tqdm  # type: ignore
 from functools import singledispatch  # type: ignore
-from typing import List, Optional, ItemsView
+from typing import Dict, Hashable, Iterable, List, Optional, ItemsView, Tuple
+from huffpress.auxi.histogram import ByteHistogram, ByteChunk
+from huffpress.auxi.modes import Engine
 from huffpress.huff.HuffNode import HuffNode
+from huffpress.huff.HuffTree import HuffTree
+from huffpress.huff.hdecode import build_decode_table
+from huffpress.huff.hencode import build_encode_table
 from huffpress.huff.htypes import (
     InputData, TermFreq, Leaves,
-    SortedTree, HuffTuple, HuffCode, HuffTerm, HuffSeq,
+    SortedTree, HuffTuple, HuffCode, HuffTerm, HuffSeq, HuffTable,
+    DecodeTable, CachedCodes
     )
 
+TREE_CACHE_SIZE = 64  # keys kept by the Huffman tree cache by default
+
 
 def calc_term_freq(data: InputData) -> TermFreq:
     """
@@ -27,17 +37,33 @@ def calc_term_freq(data: InputData) -> TermFreq:
 
     e.g. "ABBcCC" --> { "A": 1, "B": 2, "c": 1, "C": 2 }
 
+    Bytes are counted into a 256 slot ByteHistogram (with NumPy when
+    available), strings by their ordinal values.
+
     :param data: input string text
     :return: dictionary of character frequency occurrence counts
     """
-    count_dat = {
-        k if isinstance(k, int) else ord(str(k)): v
-        for k, v in dict(Counter(data.data)).items()
-        }
+    if not isinstance(data.data, str):
+        return TermFreq(tf=ByteHistogram(data.data))
+    count_dat = {ord(k): v for k, v in Counter(data.data).items()}
     dc: TermFreq = TermFreq(tf=count_dat)
     return dc
 
 
+def calc_term_freq_chunks(chunks: Iterable[ByteChunk]) -> TermFreq:
+    """
+    Returns the byte frequency occurrence counts of data given in chunks,
+    so that the data never has to be in memory all at once
+
+    :param chunks: iterable of bytes chunks e.g. read from a file
+    :return: dictionary of byte frequency occurrence counts
+    """
+    hist = ByteHistogram()
+    for chunk in chunks:
+        hist.update(chunk)
+    return TermFreq(tf=hist)
+
+
 def build_leaves(term_freq: TermFreq,
                  verbose: bool = False) -> Leaves:
     """
@@ -99,7 +125,138 @@ def build_tree(sorted_new_tree: SortedTree,
                verbose: bool = False) -> Optional[HuffNode]:
     """
     Builds Huffman tree made out of HuffNode's, constructed from initial
-    HuffNode leaves
+    HuffNode leaves, using a priority queue (heap).
+
+    Ties between equal total-frequencies are broken by insertion order:
+    initial leaves keep their sorted order and every merged node is ranked
+    after all nodes created before it. This is exactly the order the
+    original list re-sorting builder (build_tree_sorted) ends up with, so
+    both produce identical trees and therefore identical encodings.
+
+    :param sorted_new_tree: sorted [ term, (total-frequency, HuffNode) ]
+    :param verbose: set to True for printing console outputs
+    :return: Built Huffman tree from initial asc sorted  list of leaves
+             HuffNode's computed by build_leaves function and sorted by
+             sort_tree function
+    """
+    if verbose:
+        print("Building Huffman tree")
+
+    # heap of (total-frequency, insertion order, HuffNode)
+    heap: List[Tuple[int, int, HuffNode]] = [
+        (huff_seq.huff_term.freq, order, huff_seq.huff_term.node)
+        for order, huff_seq in enumerate(sorted_new_tree.data)
+        ]
+    heapq.heapify(heap)
+
+    if not heap:
+        return None
+
+    # single unique char: wrap the leaf so it is encoded with "0"
+    if len(heap) == 1:
+        freq, _, leaf = heap[0]
+        return HuffNode(term=None, freq=freq, left_child=leaf)
+
+    order = len(heap)
+    with tqdm(total=len(heap) - 1, disable=not verbose) as tbar:
+
+        # collapse the two least frequent nodes into one until only the
+        # root is left. internal node terms are derived lazily by HuffNode.
+        while len(heap) > 1:
+            first_freq, _, first_node = heapq.heappop(heap)
+            second_freq, _, second_node = heapq.heappop(heap)
+            new_freq = first_freq + second_freq
+            node = HuffNode(
+                term=None,
+                freq=new_freq,
+                left_child=first_node,
+                right_child=second_node
+                )
+            heapq.heappush(heap, (new_freq, order, node))
+            order += 1
+            tbar.update(1)
+
+    return heap[0][2]  # returning tree HuffNode object
+
+
+def build_huff_tree(term_freq: TermFreq,
+                    verbose: bool = False) -> HuffTree:
+    """
+    Builds a compact (array backed) Huffman tree straight from the term
+    frequencies, without allocating HuffNode's or the intermediate leaves
+    and sorted tree structures.
+
+    Nodes are merged in exactly the same order as build_tree: leaves are
+    ranked by (frequency, position in term_freq) and merged nodes by
+    (frequency, creation order), so the resulting codes are identical.
+    After sorting the leaves, merging takes linear time (two queues), so
+    large alphabets such as the 65536 digrams build quickly.
+
+    :param term_freq: dictionary of frequency occurrence counts
+    :param verbose: set to True for printing console outputs
+    :return: HuffTree
+    """
+    if verbose:
+        print("Building Huffman tree")
+
+    num_leaves = len(term_freq.tf)
+    tree = HuffTree(num_leaves)
+    terms, freqs = tree.terms, tree.freqs
+    for idx, (term, freq) in enumerate(term_freq.tf.items()):
+        terms[idx] = term
+        freqs[idx] = freq
+
+    # two queues in increasing frequency order: the leaves sorted by
+    # (frequency, position) and the merged nodes, which are created in
+    # increasing frequency order (so no heap is needed). A leaf is taken
+    # before a merged node of the same frequency, which is the order of
+    # ranking leaves by position and merged nodes after all leaves.
+    leaves: List[int] = sorted(range(num_leaves), key=freqs.__getitem__)
+
+    if num_leaves == 1:
+        # single unique char: wrap the leaf so it is encoded with "0"
+        tree.root = 1
+        tree.terms.append(-1)
+        tree.freqs.append(freqs[0])
+        tree.lefts.append(0)
+        tree.rights.append(-1)
+        return tree
+
+    lefts, rights = tree.lefts, tree.rights
+    leaf_pos = 0
+    node_pos = num_leaves
+
+    def pop_min(idx: int) -> int:
+        nonlocal leaf_pos, node_pos
+        if leaf_pos < num_leaves and (
+                node_pos >= idx or
+                freqs[leaves[leaf_pos]] <= freqs[node_pos]):
+            leaf_pos += 1
+            return leaves[leaf_pos - 1]
+        node_pos += 1
+        return node_pos - 1
+
+    with tqdm(total=max(num_leaves - 1, 0), disable=not verbose) as tbar:
+        for idx in range(num_leaves, 2 * num_leaves - 1):
+            first_idx = pop_min(idx)
+            second_idx = pop_min(idx)
+            freqs[idx] = freqs[first_idx] + freqs[second_idx]
+            lefts[idx] = first_idx
+            rights[idx] = second_idx
+            tbar.update(1)
+
+    tree.root = 2 * num_leaves - 2 if num_leaves else -1
+    return tree
+
+
+def build_tree_sorted(sorted_new_tree: SortedTree,
+                      verbose: bool = False) -> Optional[HuffNode]:
+    """
+    Builds Huffman tree made out of HuffNode's, constructed from initial
+    HuffNode leaves, by re-sorting the whole list of terms after every merge.
+
+    This is the original (quadratic) tree builder, kept as Engine.SORTED
+    for reference and benchmarking against build_tree.
 
     :param sorted_new_tree: sorted [ term, (total-frequency, HuffNode) ]
     :param verbose: set to True for printing console outputs
@@ -201,13 +358,15 @@ def print_node(node: Optional[HuffNode], depth: int = 0,
     Recursive printing of the HuffNode tree showing all branches, leaves and
     their terms and total-frequencies
 
-    :param node: HuffNode tree i.e. Huffman tree
+    :param node: HuffNode tree i.e. Huffman tree (or HuffTree)
     :param depth: How many whitespaces to print to represent depth level
                  (starting at depth 0)
     :param verbose: set to True to print to console, False to return string
                     output
     :return: None (prints Huffman tree to console)
     """
+    if isinstance(node, HuffTree):
+        node = node.node
     if node is None:
         print("Tree is empty.\n")
         return ""
@@ -236,6 +395,212 @@ def print_node(node: Optional[HuffNode], depth: int = 0,
             return res
 
 
+def build_tree_code_table(tree: HuffTree) -> HuffTable:
+    """
+    Emits the (code, bit-length) pair of every leaf of a compact HuffTree.
+    Parents always come after their children, so going through the nodes
+    from the root down, each node's code is known before its children's.
+
+    :param tree: HuffTree built by build_huff_tree
+    :return: table of all leaf terms as keys (in leaf order), and their
+             (code, bit-length)
+    """
+    if tree.root < 0:
+        return HuffTable(data={})
+    codes = [0] * (tree.root + 1)
+    lengths = [0] * (tree.root + 1)
+    lefts, rights = tree.lefts, tree.rights
+    num_leaves = 0
+    for idx in range(tree.root, -1, -1):
+        left, right = lefts[idx], rights[idx]
+        if left < 0 and right < 0:
+            num_leaves += 1
+            continue
+        code, length = codes[idx] << 1, lengths[idx] + 1
+        if left >= 0:
+            codes[left], lengths[left] = code, length
+        if right >= 0:
+            codes[right], lengths[right] = code | 1, length
+    terms = tree.terms
+    return HuffTable(data={terms[idx]: (codes[idx], lengths[idx])
+                           for idx in range(num_leaves)})
+
+
+def build_code_table(tree,
+                     verbose: bool = False) -> HuffTable:
+    """
+    Walks the Huffman tree once, emitting the (code, bit-length) pair of
+    every leaf: 0's for left branches and 1's for right branches.
+
+    :param tree: HuffTree built by build_huff_tree, or HuffNode tree built
+                 by build_tree
+    :param verbose: set to True for printing console outputs
+    :return: table of all leaf terms as keys, and their (code, bit-length)
+    """
+    if verbose:
+        print("Building code table")
+    table: Dict[int, Tuple[int, int]] = {}
+    if isinstance(tree, HuffTree):
+        return build_tree_code_table(tree)
+    if tree is None:
+        return HuffTable(data=table)
+    stack: List[Tuple[HuffNode, int, int]] = [(tree, 0, 0)]
+    while stack:
+        node, code, length = stack.pop()
+        if node.is_leaf:
+            table[node.term] = (code, length)
+        else:
+            if node.right_child is not None:
+                stack.append((node.right_child, (code << 1) | 1, length + 1))
+            if node.left_child is not None:
+                stack.append((node.left_child, code << 1, length + 1))
+    return HuffTable(data=table)
+
+
+def table_to_code(table: HuffTable) -> HuffCode:
+    """
+    Converts (code, bit-length) pairs to binary sequence strings
+    e.g. (6, 4) --> "0110"
+
+    :param table: Huffman code table computed by build_code_table
+    :return: dictionary of all terms as keys, and their encoded binary sequence
+    """
+    return HuffCode(data={
+        term: format(code, f"0{length}b") if length else ""
+        for term, (code, length) in table.data.items()
+        })
+
+
+def code_to_table(huff_map: HuffCode) -> HuffTable:
+    """
+    Converts binary sequence strings to (code, bit-length) pairs
+    e.g. "0110" --> (6, 4)
+
+    :param huff_map: dictionary of terms and their encoded binary sequence
+    :return: Huffman code table of (code, bit-length) pairs
+    """
+    return HuffTable(data={
+        term: (int(code, 2) if code else 0, len(code))
+        for term, code in huff_map.data.items()
+        })
+
+
+def code_lengths(table: HuffTable) -> Dict[int, int]:
+    """
+    Bit-length of every term's code, which is all a canonical Huffman code
+    needs to be rebuilt
+
+    :param table: Huffman code table computed by build_code_table
+    :return: dictionary of all terms as keys, and their code bit-lengths
+    """
+    return {term: length for term, (_, length) in table.data.items()}
+
+
+def canonical_codes(lengths: Dict[int, int]) -> HuffTable:
+    """
+    Assigns canonical Huffman codes from code bit-lengths: terms are ordered
+    by (bit-length, term) and given consecutive codes, shifting left whenever
+    the bit-length increases.
+
+    e.g. {65: 1, 66: 2, 67: 3, 68: 3} --> 65: 0, 66: 10, 67: 110, 68: 111
+
+    :param lengths: dictionary of terms and their code bit-lengths
+    :return: canonical Huffman code table of (code, bit-length) pairs
+    """
+    table: Dict[int, Tuple[int, int]] = {}
+    code = 0
+    prev_len = 0
+    for term, length in sorted(lengths.items(),
+                               key=lambda pair: (pair[1], pair[0])):
+        code <<= length - prev_len
+        table[term] = (code, length)
+        code += 1
+        prev_len = length
+    return HuffTable(data=table)
+
+
+def limit_code_lengths(term_freq: TermFreq, max_len: int) -> Dict[int, int]:
+    """
+    Optimal code bit-lengths with no code longer than max_len, computed with
+    the package-merge algorithm.
+
+    The terms, sorted by frequency, are the coins of every denomination
+    2^-1 .. 2^-max_len. Starting from the smallest denomination, adjacent
+    coins are paired into packages that are merged in with the coins of the
+    next denomination. The 2n - 2 cheapest items of the final list are
+    selected and each term's bit-length is the number of selected items it
+    appears in. Packages keep references to the two items they were made of,
+    rather than copies of their terms.
+
+    :param term_freq: dictionary of frequency occurrence counts
+    :param max_len: maximum code bit-length allowed
+    :return: dictionary of terms and their code bit-lengths
+    """
+    terms: List[Tuple[int, int]] = sorted(term_freq.tf.items(),
+                                          key=lambda pair: (pair[1], pair[0]))
+    num_terms = len(terms)
+    if num_terms <= 1:
+        return {term: 1 for term, _ in terms}
+    if max_len < 1 or (1 << max_len) < num_terms:
+        raise ValueError(f"max_len {max_len} is too short to encode "
+                         f"{num_terms} unique terms")
+
+    # items are (frequency, id): ids below num_terms are terms, others
+    # are packages made of the two items in packages[id - num_terms]
+    coins: List[Tuple[int, int]] = [(freq, i)
+                                    for i, (_, freq) in enumerate(terms)]
+    packages: List[Tuple[int, int]] = []
+    items: List[Tuple[int, int]] = coins
+    for _ in range(max_len - 1):
+        new_packages: List[Tuple[int, int]] = []
+        for j in range(0, len(items) - 1, 2):
+            (first_freq, first_id), (second_freq, second_id) = \
+                items[j], items[j + 1]
+            packages.append((first_id, second_id))
+            new_packages.append((first_freq + second_freq,
+                                 num_terms + len(packages) - 1))
+        items = list(heapq.merge(coins, new_packages,
+                                 key=lambda item: item[0]))
+
+    lengths: List[int] = [0] * num_terms
+    stack: List[int] = [item_id for _, item_id in items[:2 * num_terms - 2]]
+    while stack:
+        item_id = stack.pop()
+        if item_id < num_terms:
+            lengths[item_id] += 1
+        else:
+            stack.extend(packages[item_id - num_terms])
+    return {term: lengths[i] for i, (term, _) in enumerate(terms)}
+
+
+def code_bits(term_freq: TermFreq, lengths: Dict[int, int]) -> int:
+    """
+    Total number of bits the encoded data takes with the given code
+    bit-lengths
+
+    :param term_freq: dictionary of frequency occurrence counts
+    :param lengths: dictionary of terms and their code bit-lengths
+    :return: sum of frequency * bit-length over all terms
+    """
+    return sum(freq * lengths[term] for term, freq in term_freq.tf.items())
+
+
+def length_limit_cost(term_freq: TermFreq,
+                      max_len: int) -> Tuple[int, int]:
+    """
+    How much limiting the code bit-lengths to max_len costs
+
+    :param term_freq: dictionary of frequency occurrence counts
+    :param max_len: maximum code bit-length allowed
+    :return: (encoded bits with Huffman codes, encoded bits with
+              length-limited codes)
+    """
+    _, huff_tree = create_huff_tree(term_freq)
+    optimal = code_bits(term_freq, code_lengths(build_code_table(huff_tree)))
+    limited = code_bits(term_freq, limit_code_lengths(term_freq, max_len))
+    return optimal, limited
+
+
 @singledispatch
 def encode(data, tree: Optional[HuffNode],
            path: str = "", verbose: bool = False):
@@ -292,7 +657,8 @@ def _(leaves: Leaves, tree: Optional[HuffNode],
       verbose=False) -> HuffCode:
     """
     Encode all unique character terms, constructing binary sequences from the
-    Huffman tree
+    Huffman tree. The tree is traversed once (build_code_table) rather than
+    once per term.
 
     :param leaves: initial list of leaves with unique character terms
     :param tree: constructed Huffman tree computed by create_huff_tree_encoding
@@ -304,30 +670,32 @@ def _(leaves: Leaves, tree: Optional[HuffNode],
     if verbose:
         print("Encoding tree")
 
-    terms: List[str] = list(leaves.data.keys())
-    res = HuffCode(data={})
-    for term in tqdm(terms, disable=not verbose):
-        encoded_term = encode(term, tree)
-        res.data.update(encoded_term.data)
+    codes: HuffCode = table_to_code(build_code_table(tree))
+
+    # keep the order of the leaves, which is the order of the Huffman map
+    res = HuffCode(data={term: codes.data[term] for term in leaves.data
+                         if term in codes.data})
     return res
 
 
 @singledispatch
-def create_huff_tree(data, verbose: bool = False):
+def create_huff_tree(data, verbose: bool = False,
+                     engine: Engine = Engine.COMPACT):
     """
     creates Huffman tree, calling either:
-    create_huff_tree(InputData, bool); or
-    create_huff_tree(TermFreq, bool)
+    create_huff_tree(InputData, bool, Engine); or
+    create_huff_tree(TermFreq, bool, Engine)
 
     :param data: InputData (str or bytes) or TermFreq term frequency counts
     :param verbose: bool - verbose for printing
+    :param engine: tree building engine (see auxi.modes.Engine)
     """
     raise NotImplementedError(f"Got params {type(data)} and {type(verbose)}")
 
 
 @create_huff_tree.register(InputData)  # type: ignore
 @create_huff_tree.register(bool)
-def _(data: InputData, verbose: bool = False):
+def _(data: InputData, verbose: bool = False, engine: Engine = Engine.COMPACT):
     """
     Main function to create Huffman tree from an input data string
 
@@ -335,24 +703,276 @@ def _(data: InputData, verbose: bool = False):
                  Huffman tree
     :param verbose: set to True to print to console, False to return
                     string output
+    :param engine: tree building engine, Engine.COMPACT (default),
+                   Engine.HEAP or Engine.SORTED
     :return: tuple of final encoded sequences per term and constructed
              Huffman tree
     """
     term_freq: TermFreq = calc_term_freq(data)
-    return create_huff_tree(term_freq, verbose=verbose)
+    return create_huff_tree(term_freq, verbose=verbose, engine=engine)
 
 
 @create_huff_tree.register(TermFreq)  # type: ignore
 @create_huff_tree.register(bool)
-def _(data: TermFreq, verbose: bool = False):
+def _(data: TermFreq, verbose: bool = False, engine: Engine = Engine.COMPACT):
     """
     Sub function create Huffman tree from an input term frequency object
     :param data: TermFreq object
     :param verbose: for printing
+    :param engine: tree building engine, Engine.COMPACT (default) builds
+                   a compact HuffTree, Engine.HEAP and Engine.SORTED a tree
+                   of HuffNode's
     :return: Huffman tree and encoded sequence
     """
+    if engine is Engine.COMPACT:
+        tree: HuffTree = build_huff_tree(data, verbose=verbose)
+        return table_to_code(build_code_table(tree, verbose=verbose)), tree
+
     leaves: Leaves = build_leaves(data, verbose=verbose)
     sleaves: SortedTree = sort_tree(leaves)
-    huff_tree: Optional[HuffNode] = build_tree(sleaves, verbose=verbose)
+    builder = build_tree if engine is Engine.HEAP else build_tree_sorted
+    huff_tree: Optional[HuffNode] = builder(sleaves, verbose=verbose)
     encod_seq: HuffCode = encode(leaves, tree=huff_tree, verbose=verbose)
     return encod_seq, huff_tree
+
+
+class TreeCache(object):
+    """
+    Bounded, thread safe LRU cache of Huffman trees and canonical code
+    tables, so that compressing data with a histogram seen before skips
+    building the tree, and decoding data with code bit-lengths seen before
+    skips building the decoding table. Entries are kept under a key of the
+    histogram (see histogram_key) and under a key of the code bit-lengths
+    (see lengths_key). Enable it with enable_tree_cache.
+
+    With quantize > 0 the counts of a histogram are rounded to multiples
+    of 1 / 2^quantize of its total before keying, so near-identical
+    histograms (e.g. of similar blocks) share a tree. The shared codes
+    cover the same terms, but may be slightly longer than the optimal codes
+    of the histogram.
+
+    ...
+
+    Attributes
+    ----------
+    maxsize : int
+        maximum number of keys kept
+    quantize : int
+        bits of precision of the histogram counts in keys (0 for exact)
+    entries : OrderedDict
+        CachedCodes by key, least recently used first
+    hits : int
+        number of lookups which found an entry
+    misses : int
+        number of lookups which did not
+
+    Methods
+    -------
+    histogram_key(term_freq, max_code_len):
+        Key of a histogram
+    lengths_key(lengths, width):
+        Key of code bit-lengths
+    get(key):
+        Looks up an entry
+    put(key, entry):
+        Adds an entry
+    clear():
+        Removes all entries and resets the counters
+    """
+
+    def __init__(self, maxsize: int = TREE_CACHE_SIZE, quantize: int = 0):
+        """
+        __init__(self, maxsize: int = TREE_CACHE_SIZE, quantize: int = 0):
+
+        Constructs TreeCache
+
+        :param maxsize: maximum number of keys kept
+        :param quantize: bits of precision of the histogram counts in keys
+                         (0 for exact histograms)
+        """
+        if maxsize < 1:
+            raise ValueError(f"Invalid cache size {maxsize}")
+        if quantize < 0:
+            raise ValueError(f"Invalid quantization {quantize}")
+        self.maxsize = maxsize
+        self.quantize = quantize
+        self.entries: "OrderedDict[Hashable, CachedCodes]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def histogram_key(self, term_freq: TermFreq,
+                      max_code_len: Optional[int] = None) -> Hashable:
+        """
+        histogram_key(self, term_freq: TermFreq,
+                      max_code_len: Optional[int] = None) -> Hashable:
+
+        Key of a histogram: its (quantized) counts and the code bit-length
+        limit the codes are built with. Every term present keeps a count
+        of at least 1, so histograms sharing a key have the same terms.
+
+        :param term_freq: term frequencies
+        :param max_code_len: maximum code bit-length (None for no limit)
+        :return: key
+        """
+        counts: Iterable[Tuple[int, int]] = term_freq.tf.items()
+        if self.quantize:
+            total: int = sum(term_freq.tf.values())
+            scale: int = 1 << self.quantize
+            counts = [(term, max(1, (count * scale + total // 2) // total))
+                      for term, count in counts]
+        return "tf", max_code_len, tuple(sorted(counts))
+
+    @staticmethod
+    def lengths_key(lengths: Dict[int, int], width: int = 1) -> Hashable:
+        """
+        @staticmethod
+        def lengths_key(lengths: Dict[int, int], width: int = 1) -> Hashable:
+
+        Key of code bit-lengths
+
+        :param lengths: dictionary of terms and their code bit-lengths
+        :param width: bytes decoded per term (see hdecode.build_decode_table)
+        :return: key
+        """
+        return "lengths", width, tuple(sorted(lengths.items()))
+
+    def get(self, key: Hashable) -> Optional[CachedCodes]:
+        """
+        get(self, key: Hashable) -> Optional[CachedCodes]:
+
+        Looks up an entry, counting a hit or a miss
+
+        :param key: histogram_key or lengths_key
+        :return: CachedCodes (None if not cached)
+        """
+        with self.lock:
+            entry: Optional[CachedCodes] = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, entry: CachedCodes) -> CachedCodes:
+        """
+        put(self, key: Hashable, entry: CachedCodes) -> CachedCodes:
+
+        Adds an entry, unless the key already has one (e.g. added by another
+        thread meanwhile), dropping the least recently used entries beyond
+        maxsize
+
+        :param key: histogram_key or lengths_key
+        :param entry: CachedCodes
+        :return: the cached entry of the key
+        """
+        with self.lock:
+            entry = self.entries.setdefault(key, entry)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+            return entry
+
+    def clear(self):
+        """
+        clear(self):
+
+        Removes all entries and resets the hit and miss counters
+        """
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+tree_cache: Optional[TreeCache] = None
+
+
+def enable_tree_cache(maxsize: int = TREE_CACHE_SIZE,
+                      quantize: int = 0) -> TreeCache:
+    """
+    Enables the Huffman tree cache (see TreeCache), replacing any cache
+    enabled before. Worker processes started afterwards inherit a copy of
+    the cache where processes are forked.
+
+    :param maxsize: maximum number of keys kept
+    :param quantize: bits of precision of the histogram counts in keys
+                     (0 for exact histograms)
+    :return: the enabled TreeCache (for its hit and miss counters)
+    """
+    global tree_cache
+    tree_cache = TreeCache(maxsize, quantize)
+    return tree_cache
+
+
+def disable_tree_cache():
+    """
+    Disables the Huffman tree cache, dropping its entries
+    """
+    global tree_cache
+    tree_cache = None
+
+
+def get_tree_cache() -> Optional[TreeCache]:
+    """
+    The enabled Huffman tree cache
+
+    :return: TreeCache (None when disabled)
+    """
+    return tree_cache
+
+
+def cached_lengths(lengths: Dict[int, int], width: int = 1) -> CachedCodes:
+    """
+    Entry of code bit-lengths in the tree cache, added if missing (a new,
+    uncached entry when the cache is disabled)
+
+    :param lengths: dictionary of terms and their code bit-lengths
+    :param width: bytes decoded per term (see hdecode.build_decode_table)
+    :return: CachedCodes
+    """
+    cache: Optional[TreeCache] = tree_cache
+    if cache is None:
+        return CachedCodes(lengths=lengths)
+    key: Hashable = cache.lengths_key(lengths, width)
+    entry: Optional[CachedCodes] = cache.get(key)
+    if entry is None:
+        entry = cache.put(key, CachedCodes(lengths=lengths))
+    return entry
+
+
+def canonical_encode_table(lengths: Dict[int, int],
+                           width: int = 1) -> List[str]:
+    """
+    Encoding table of the canonical codes of code bit-lengths, taken from
+    the tree cache when enabled
+
+    :param lengths: dictionary of terms and their code bit-lengths
+    :param width: bytes per term (the entry of the codes in the cache is
+                  shared with the decoding table of that width)
+    :return: binary sequence of every term (see hencode.build_encode_table)
+    """
+    entry: CachedCodes = cached_lengths(lengths, width)
+    if entry.codes is None:
+        entry.codes = build_encode_table(canonical_codes(lengths))
+    return entry.codes
+
+
+def canonical_decode_table(lengths: Dict[int, int],
+                           width: int = 1) -> DecodeTable:
+    """
+    Decoding table of the canonical codes of code bit-lengths, taken from
+    the tree cache when enabled
+
+    :param lengths: dictionary of terms and their code bit-lengths
+    :param width: bytes decoded per term (see hdecode.build_decode_table)
+    :return: DecodeTable (see hdecode.build_decode_table)
+    """
+    entry: CachedCodes = cached_lengths(lengths, width)
+    if entry.dtable is None:
+        entry.dtable = build_decode_table(canonical_codes(lengths),
+                                          width=width)
+    return entry.dtable
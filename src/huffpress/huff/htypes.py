@@ -7,8 +7,9 @@
 """
 
 from dataclasses import dataclass
-from typing import Union, Dict, List, Optional
+from typing import Union, Dict, List, Mapping, Optional, Tuple
 from huffpress.huff.HuffNode import HuffNode
+from huffpress.huff.HuffTree import HuffTree
 
 
 @dataclass
@@ -26,13 +27,14 @@ class InputData:
 @dataclass
 class TermFreq:
     """
-    tf = Dict[str, int]
+    tf = Mapping[int, int]
 
-    When calculating collections.Counter on a input string or bytes,
-    we return a dictionary of key being the ordinal ASCII value, and
-    the value being the frequency of occurrence in the input data.
+    When counting the terms of an input string or bytes, we return a
+    dictionary of key being the ordinal ASCII value, and the value being
+    the frequency of occurrence in the input data. For bytes this is an
+    array backed auxi.histogram.ByteHistogram.
     """
-    tf: Dict[int, int]
+    tf: Mapping[int, int]
 
 
 @dataclass
@@ -107,3 +109,84 @@ class HuffCode:
     and the value as the binary sequence string
     """
     data: Dict[int, str]
+
+
+@dataclass
+class HuffTable:
+    """
+    data = Dict[int, Tuple[int, int]]
+
+    Huffman code table with key as the ordinal ASCII value and the value as
+    the (code, bit-length) pair, where code is the binary sequence as an
+    integer e.g. "0110" --> (6, 4)
+    """
+    data: Dict[int, Tuple[int, int]]
+
+
+@dataclass
+class DecodeTable:
+    """
+    bits = int
+    max_len = int
+    outs = List[bytes]
+    lens = List[int]
+    first_outs = List[bytes]
+    first_lens = List[int]
+    subs = List[Optional[DecodeTable]]
+
+    Lookup table for decoding a Huffman sequence bits at a time. Index i is
+    the next bits of the sequence: outs[i] are the terms decoded from those
+    bits (one or more) and lens[i] is the number of bits they take.
+    first_outs / first_lens only hold the first term. Codes longer than bits
+    have lens[i] == 0 and continue in the sub table subs[i], indexed by the
+    bits that follow. max_len is the longest code bit-length.
+    """
+    bits: int
+    max_len: int
+    outs: List[bytes]
+    lens: List[int]
+    first_outs: List[bytes]
+    first_lens: List[int]
+    subs: List[Optional["DecodeTable"]]
+
+
+@dataclass
+class CachedCodes:
+    """
+    lengths = Dict[int, int]
+    tree = Optional[HuffTree]
+    encod_seq = Optional[HuffCode]
+    codes = Optional[List[str]]
+    dtable = Optional[DecodeTable]
+
+    Entry of the Huffman tree cache (see hfunctions.TreeCache): the code
+    bit-lengths, with the Huffman tree and map they were built from (None
+    for an entry made from code bit-lengths alone), and the canonical
+    encoding and decoding tables, built the first time they are needed.
+    """
+    lengths: Dict[int, int]
+    tree: Optional[HuffTree] = None
+    encod_seq: Optional[HuffCode] = None
+    codes: Optional[List[str]] = None
+    dtable: Optional[DecodeTable] = None
+
+
+@dataclass
+class ArchiveMember:
+    """
+    name = str
+    pos = int
+    comp_size = int
+    size = int
+    table = Optional[int]
+
+    Central directory entry of a file in an archive (see press.archive):
+    its name, the position and size of its coded data, its original size
+    and the number of the code-length table it is coded with (None for a
+    stored file).
+    """
+    name: str
+    pos: int
+    comp_size: int
+    size: int
+    table: Optional[int]
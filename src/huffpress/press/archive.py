@@ -0,0 +1,539 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    archive.py
+
+    Contains the archive format (see press.container): many files bundled
+    into one .hac file, with a central directory of their names, positions,
+    sizes and code-length tables, so that members can be listed and read
+    one at a time without decoding the rest.
+
+    Every member is coded with canonical codes of its own table, or stored
+    when coding would not make it smaller. In solid archives small files
+    with the same extension, which tend to have similar statistics, share
+    one table fitted to all of them, so thousands of tiny files do not each
+    pay for a table of their own. A member only uses the shared table when
+    it codes the member in fewer bytes than its own table would.
+"""
+
+import builtins
+import io
+import os
+from collections import OrderedDict
+from tqdm import tqdm  # type: ignore
+from typing import (
+    BinaryIO, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+    )
+from huffpress.auxi.bitio import BitWriter, ByteData
+from huffpress.huff.hdecode import decode_bits
+from huffpress.huff.hencode import encode_bits
+from huffpress.huff.hfunctions import (
+    calc_term_freq, calc_term_freq_chunks, code_bits, canonical_encode_table,
+    canonical_decode_table
+    )
+from huffpress.huff.htypes import ArchiveMember, DecodeTable, InputData
+from huffpress.press.container import (
+    pack_archive_header, unpack_archive_header, pack_archive_directory,
+    unpack_archive_directory, read_index_trailer, pack_code_lengths,
+    unpack_code_lengths, ARCHIVE_HEADER_BYTES, ARCHIVE_MAGIC,
+    INDEX_TRAILER_BYTES, CODE_LENGTHS_BYTES
+    )
+from huffpress.press.compress import create_huff_codes
+from huffpress.press.hacfile import TABLE_CACHE
+
+SOLID_SIZE = 1 << 16  # files up to this size share tables in solid archives
+
+
+def archive_files(inputs: Union[str, Iterable[str]]) -> List[Tuple[str, str]]:
+    """
+    Lists the files to archive: files are archived under their base name,
+    directories with all the files below them under their path relative
+    to the directory's parent (e.g. "docs/a/b.txt" for docs)
+
+    :param inputs: file or directory, or list of files and directories
+    :return: list of (file path, member name)
+    """
+    res: List[Tuple[str, str]] = []
+    for inp in [inputs] if isinstance(inputs, str) else inputs:
+        inp = os.path.normpath(inp)
+        if not os.path.isdir(inp):
+            res.append((inp, os.path.basename(inp)))
+            continue
+        parent: str = os.path.dirname(inp)
+        for root, dirs, files in os.walk(inp):
+            dirs.sort()
+            for file in sorted(files):
+                path: str = os.path.join(root, file)
+                res.append((path, os.path.relpath(path, parent).replace(
+                    os.sep, "/")))
+    return res
+
+
+def check_name(name: str) -> str:
+    """
+    Checks that a member name is a relative "/" separated path which stays
+    inside the directory it is extracted to
+
+    :param name: member name
+    :return: the name
+    """
+    parts: List[str] = name.split("/")
+    if not name or name.startswith("/") or "\\" in name or \
+            any(part in ("", ".", "..") for part in parts) or \
+            ":" in parts[0]:
+        raise ValueError(f"Invalid archive member name {name!r}")
+    return name
+
+
+def solid_key(name: str) -> str:
+    """
+    Key of the group of files sharing a table in a solid archive: the
+    lower case extension of the name
+
+    :param name: member name
+    :return: group key
+    """
+    return os.path.splitext(name)[1].lower()
+
+
+def read_file(path: str) -> bytes:
+    """
+    Reads a whole file
+
+    :param path: file
+    :return: file contents
+    """
+    with builtins.open(path, "rb") as f:
+        return f.read()
+
+
+def solid_tables(files: List[Tuple[str, str]], solid_size: int = SOLID_SIZE,
+                 max_code_len: Optional[int] = None
+                 ) -> Dict[str, Dict[int, int]]:
+    """
+    Fits one table to every group of two or more small files sharing a
+    group key (see solid_key)
+
+    :param files: list of (file path, member name) (see archive_files)
+    :param solid_size: largest size of the files sharing tables
+    :param max_code_len: maximum code bit-length (see compress_bytes)
+    :return: code bit-lengths by group key
+    """
+    groups: Dict[str, List[str]] = {}
+    for path, name in files:
+        if os.path.getsize(path) <= solid_size:
+            groups.setdefault(solid_key(name), []).append(path)
+    res: Dict[str, Dict[int, int]] = {}
+    for key, paths in groups.items():
+        if len(paths) > 1:
+            term_freq = calc_term_freq_chunks(read_file(path)
+                                              for path in paths)
+            if term_freq.tf:
+                _, res[key] = create_huff_codes(term_freq,
+                                                max_code_len=max_code_len)
+    return res
+
+
+class ArchiveWriter(object):
+    """
+    Writes the archive format (see press.container) to a binary file a
+    member at a time, keeping what the central directory needs.
+
+    ...
+
+    Attributes
+    ----------
+    f : BinaryIO
+        output file
+    pos : int
+        number of bytes written so far
+    tables : List[int]
+        position of every code-length table written
+    members : List[ArchiveMember]
+        directory entry of every member written
+    names : Set[str]
+        names of the members written
+    shared : Dict[str, Dict[int, int]]
+        code bit-lengths of the shared tables by group key
+    shared_tables : Dict[str, int]
+        table number of the shared tables written so far by group key
+    codes : Dict[int, List[str]]
+        encoding tables of the shared tables by table number
+    max_code_len : Optional[int]
+        maximum code bit-length of the members' own tables
+
+    Methods
+    -------
+    add(name, data, key):
+        Adds a member
+    close():
+        Writes the central directory
+    """
+
+    def __init__(self, f: BinaryIO,
+                 shared: Optional[Dict[str, Dict[int, int]]] = None,
+                 max_code_len: Optional[int] = None):
+        """
+        __init__(self, f: BinaryIO,
+                 shared: Optional[Dict[str, Dict[int, int]]] = None,
+                 max_code_len: Optional[int] = None):
+
+        Constructs ArchiveWriter, writing the archive header
+
+        :param f: output file, open for binary writing
+        :param shared: code bit-lengths of the shared tables by group key
+                       (see solid_tables)
+        :param max_code_len: maximum code bit-length (see compress_bytes)
+        """
+        self.f = f
+        self.pos = 0
+        self.tables: List[int] = []
+        self.members: List[ArchiveMember] = []
+        self.names: Set[str] = set()
+        self.shared: Dict[str, Dict[int, int]] = shared or {}
+        self.shared_tables: Dict[str, int] = {}
+        self.codes: Dict[int, List[str]] = {}
+        self.max_code_len = max_code_len
+        self.write(pack_archive_header())
+
+    def write(self, piece: ByteData):
+        """
+        write(self, piece: ByteData):
+
+        Writes bytes to the output file
+
+        :param piece: bytes
+        """
+        self.f.write(piece)
+        self.pos += len(piece)
+
+    def table(self, lengths: Dict[int, int]) -> int:
+        """
+        table(self, lengths: Dict[int, int]) -> int:
+
+        Writes a code-length table
+
+        :param lengths: code bit-lengths
+        :return: table number
+        """
+        self.tables.append(self.pos)
+        self.write(pack_code_lengths(lengths))
+        return len(self.tables) - 1
+
+    def shared_table(self, key: str) -> int:
+        """
+        shared_table(self, key: str) -> int:
+
+        Writes the shared table of a group the first time a member uses it
+
+        :param key: group key
+        :return: table number
+        """
+        if key not in self.shared_tables:
+            num = self.table(self.shared[key])
+            self.shared_tables[key] = num
+            self.codes[num] = canonical_encode_table(self.shared[key])
+        return self.shared_tables[key]
+
+    def add(self, name: str, data: ByteData,
+            key: Optional[str] = None) -> ArchiveMember:
+        """
+        add(self, name: str, data: ByteData,
+            key: Optional[str] = None) -> ArchiveMember:
+
+        Adds a member coded with the smallest of its own table and the
+        shared table of its group, or stored when neither makes it smaller
+
+        :param name: member name ("/" separated relative path)
+        :param data: original data of the member
+        :param key: group key of its shared table (None for none)
+        :return: directory entry of the member
+        """
+        if check_name(name) in self.names:
+            raise ValueError(f"Duplicate archive member name {name!r}")
+        self.names.add(name)
+        lengths: Dict[int, int] = {}
+        num_bits = 0
+        size = len(data)
+        use_shared = False
+        if data:
+            term_freq = calc_term_freq(InputData(data=data))
+            _, lengths = create_huff_codes(term_freq,
+                                           max_code_len=self.max_code_len)
+            num_bits = code_bits(term_freq, lengths)
+            size = len(pack_code_lengths(lengths)) + (num_bits + 7) // 8
+            shared: Optional[Dict[int, int]] = \
+                self.shared.get(key) if key is not None else None
+            if shared is not None and all(term in shared
+                                          for term in term_freq.tf):
+                shared_bits: int = code_bits(term_freq, shared)
+                if (shared_bits + 7) // 8 < size:
+                    num_bits, use_shared = shared_bits, True
+                    size = (num_bits + 7) // 8
+        if size >= len(data):
+            member = ArchiveMember(name=name, pos=self.pos,
+                                   comp_size=len(data), size=len(data),
+                                   table=None)
+            self.write(data)
+        else:
+            codes: List[str]
+            if use_shared:
+                table = self.shared_table(key)
+                codes = self.codes[table]
+            else:
+                table = self.table(lengths)
+                codes = canonical_encode_table(lengths)
+            writer = BitWriter((num_bits + 7) // 8)
+            encode_bits(codes, data, writer)
+            payload: bytearray = writer.getvalue()
+            member = ArchiveMember(name=name, pos=self.pos,
+                                   comp_size=len(payload), size=len(data),
+                                   table=table)
+            self.write(payload)
+        self.members.append(member)
+        return member
+
+    def close(self):
+        """
+        close(self):
+
+        Writes the central directory and the trailer locating it
+        """
+        self.write(pack_archive_directory(self.tables, self.members,
+                                          self.pos))
+
+
+def create_archive(inputs: Union[str, Iterable[str]], outfile: str,
+                   verbose: bool = False, solid: bool = False,
+                   solid_size: int = SOLID_SIZE,
+                   max_code_len: Optional[int] = None) -> str:
+    """
+    Bundles files and directories (see archive_files) into one archive.
+    Every file is read whole, so the archive suits many small files rather
+    than a few huge ones (use compress_file with the blocks format for
+    those).
+
+    :param inputs: file or directory, or list of files and directories
+    :param outfile: archive file
+    :param verbose: set to True for printing console outputs
+    :param solid: set to True for small files with the same extension to
+                  share one table (see solid_tables)
+    :param solid_size: largest size of the files sharing tables
+    :param max_code_len: maximum code bit-length (see compress_bytes)
+    :return: name of the archive file
+    """
+    files: List[Tuple[str, str]] = archive_files(inputs)
+    shared: Dict[str, Dict[int, int]] = \
+        solid_tables(files, solid_size, max_code_len) if solid else {}
+    if verbose and shared:
+        print(f"Sharing {len(shared)} code tables between small files")
+    with builtins.open(outfile, "wb") as out:
+        writer = ArchiveWriter(out, shared, max_code_len)
+        for path, name in tqdm(files, disable=not verbose):
+            writer.add(name, read_file(path), solid_key(name))
+        writer.close()
+    return outfile
+
+
+class Archive(object):
+    """
+    Reader of an archive (use huffpress.open_archive to create one): lists
+    its members from the central directory and decodes only the members
+    read.
+
+    ...
+
+    Attributes
+    ----------
+    f : BinaryIO
+        archive file
+    tables : List[int]
+        position of every code-length table
+    members : List[ArchiveMember]
+        directory entry of every member, in archive order
+    index : Dict[str, ArchiveMember]
+        directory entry of every member by name
+    dtables : OrderedDict
+        decoding tables by table number, cached for members sharing a table
+
+    Methods
+    -------
+    names():
+        Lists the member names
+    getmember(name):
+        Returns the directory entry of a member
+    read(name):
+        Decodes a member
+    extract(name, path):
+        Decodes a member to a file
+    extractall(path):
+        Decodes all members to files
+    close():
+        Closes the archive file
+    """
+
+    def __init__(self, path: str):
+        """
+        __init__(self, path: str):
+
+        Constructs Archive, reading the central directory of the archive
+
+        :param path: archive file
+        """
+        self.f: BinaryIO = builtins.open(path, "rb")
+        self.dtables: "OrderedDict[int, DecodeTable]" = OrderedDict()
+        try:
+            self.f.seek(0, io.SEEK_END)
+            size = self.f.tell()
+            unpack_archive_header(self.read_at(0, ARCHIVE_HEADER_BYTES))
+            directory_pos: Optional[int] = read_index_trailer(
+                self.read_at(max(0, size - INDEX_TRAILER_BYTES),
+                             INDEX_TRAILER_BYTES), ARCHIVE_MAGIC)
+            if directory_pos is None:
+                raise ValueError("Archive central directory not found")
+            self.tables, self.members = unpack_archive_directory(
+                self.read_at(directory_pos,
+                             size - INDEX_TRAILER_BYTES - directory_pos))
+        except BaseException:
+            self.f.close()
+            raise
+        self.index: Dict[str, ArchiveMember] = {
+            member.name: member for member in self.members
+            }
+
+    def read_at(self, pos: int, size: int) -> bytes:
+        """
+        read_at(self, pos: int, size: int) -> bytes:
+
+        Reads bytes of the archive file
+
+        :param pos: position in the archive file
+        :param size: maximum number of bytes
+        :return: bytes read
+        """
+        self.f.seek(pos)
+        return self.f.read(size)
+
+    def names(self) -> List[str]:
+        """
+        names(self) -> List[str]:
+
+        Lists the member names in archive order
+
+        :return: list of member names
+        """
+        return [member.name for member in self.members]
+
+    def getmember(self, name: str) -> ArchiveMember:
+        """
+        getmember(self, name: str) -> ArchiveMember:
+
+        Returns the directory entry of a member
+
+        :param name: member name
+        :return: ArchiveMember
+        """
+        member: Optional[ArchiveMember] = self.index.get(name)
+        if member is None:
+            raise KeyError(f"No archive member named {name!r}")
+        return member
+
+    def table(self, num: int) -> DecodeTable:
+        """
+        table(self, num: int) -> DecodeTable:
+
+        Decoding table of a code-length table, cached for the members
+        sharing it
+
+        :param num: table number
+        :return: decoding table
+        """
+        dtable: Optional[DecodeTable] = self.dtables.get(num)
+        if dtable is not None:
+            self.dtables.move_to_end(num)
+            return dtable
+        lengths, _ = unpack_code_lengths(
+            self.read_at(self.tables[num], CODE_LENGTHS_BYTES))
+        dtable = canonical_decode_table(lengths)
+        self.dtables[num] = dtable
+        if len(self.dtables) > TABLE_CACHE:
+            self.dtables.popitem(last=False)
+        return dtable
+
+    def read(self, name: str) -> bytes:
+        """
+        read(self, name: str) -> bytes:
+
+        Decodes a member, reading only its table and data
+
+        :param name: member name
+        :return: original data of the member
+        """
+        member: ArchiveMember = self.getmember(name)
+        payload: bytes = self.read_at(member.pos, member.comp_size)
+        if len(payload) < member.comp_size:
+            raise EOFError(f"Truncated archive member {name!r}")
+        if member.table is None:
+            return payload
+        res: bytearray = decode_bits(self.table(member.table), payload,
+                                     8 * member.comp_size)
+        del res[member.size:]  # terms decoded from padding bits
+        return bytes(res)
+
+    def extract(self, name: str, path: str = ".") -> str:
+        """
+        extract(self, name: str, path: str = ".") -> str:
+
+        Decodes a member to a file under a directory, creating the
+        directories of its name
+
+        :param name: member name
+        :param path: directory to extract to
+        :return: name of the extracted file
+        """
+        outfile: str = os.path.join(path, *check_name(name).split("/"))
+        os.makedirs(os.path.dirname(outfile) or ".", exist_ok=True)
+        data: bytes = self.read(name)
+        with builtins.open(outfile, "wb") as f:
+            f.write(data)
+        return outfile
+
+    def extractall(self, path: str = ".") -> List[str]:
+        """
+        extractall(self, path: str = ".") -> List[str]:
+
+        Decodes all members to files under a directory
+
+        :param path: directory to extract to
+        :return: names of the extracted files
+        """
+        return [self.extract(name, path) for name in self.names()]
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def __iter__(self) -> Iterator[ArchiveMember]:
+        return iter(self.members)
+
+    def __enter__(self) -> "Archive":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.f.close()
+        self.dtables.clear()
+
+
+def open_archive(path: str) -> Archive:
+    """
+    Opens an archive for listing and reading its members
+
+    :param path: archive file
+    :return: Archive (usable in a with statement)
+    """
+    return Archive(path)
@@ -0,0 +1,254 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    codec.py
+
+    Contains the Codec: canonical Huffman codes built once, from a sample
+    of typical data or a histogram, and reused to encode many small
+    messages. The encoding and decoding tables are built up front, and the
+    encoded messages only carry the codec id and their length (see the
+    codec format in press.container), so encoding and decoding a message
+    costs the bit loop alone.
+
+    A Dictionary is a codec trained on a corpus (see train) which can be
+    saved to a file and loaded again, and passed to compress_bytes and
+    decompress_bytes.
+"""
+
+import zlib
+from typing import Dict, Iterable, Mapping, Optional, Union
+from huffpress.auxi.bitio import BitWriter, ByteData
+from huffpress.auxi.modes import Format
+from huffpress.huff.hdecode import build_decode_table, decode_bits
+from huffpress.huff.hencode import build_encode_table, encode_bits
+from huffpress.huff.hfunctions import (
+    calc_term_freq, calc_term_freq_chunks, canonical_codes
+    )
+from huffpress.huff.htypes import InputData, TermFreq
+from huffpress.press.container import (
+    pack_header, pack_code_lengths, pack_codec_header, unpack_codec_header,
+    read_format, pack_dictionary, unpack_dictionary, STORED_HEADER_BYTES
+    )
+from huffpress.press.compress import create_huff_codes
+
+CODEC_MAX_CODE_LEN = 15  # maximum code bit-length of a codec
+
+
+class Codec(object):
+    """
+    Canonical Huffman codes of all 256 byte terms with precomputed encoding
+    and decoding tables. Terms missing from the sample or histogram the
+    codec is built from still get (long) codes, so any message can be
+    encoded. Messages the codes would expand are stored as they are.
+
+    ...
+
+    Attributes
+    ----------
+    lengths : Dict[int, int]
+        code bit-lengths of every term
+    codes : List[str]
+        binary sequence of every term (encoding table)
+    dtable : DecodeTable
+        decoding table
+    id : int
+        codec id (CRC-32 of the packed code-length table)
+
+    Methods
+    -------
+    from_histogram(term_freq, max_code_len):
+        Builds a codec fitted to term frequencies
+    from_sample(sample, max_code_len):
+        Builds a codec fitted to a sample of data
+    encode(data):
+        Encodes a message
+    decode(data):
+        Decodes a message encoded by this codec
+    """
+
+    def __init__(self, lengths: Dict[int, int]):
+        """
+        __init__(self, lengths: Dict[int, int]):
+
+        Constructs Codec from code bit-lengths, building its tables
+
+        :param lengths: code bit-lengths of every byte term (0 - 255)
+        """
+        if len(lengths) != 256:
+            raise ValueError(f"Codec needs codes for all 256 byte terms, "
+                             f"got {len(lengths)}")
+        self.lengths = lengths
+        table = canonical_codes(lengths)
+        self.codes = build_encode_table(table)
+        self.dtable = build_decode_table(table)
+        self.id = zlib.crc32(pack_code_lengths(lengths))
+
+    @classmethod
+    def from_histogram(cls, term_freq: Union[TermFreq, Mapping[int, int]],
+                       max_code_len: Optional[int] = CODEC_MAX_CODE_LEN
+                       ) -> "Codec":
+        """
+        @classmethod
+        def from_histogram(cls, term_freq: Union[TermFreq, Mapping[int, int]],
+                           max_code_len: Optional[int] = CODEC_MAX_CODE_LEN
+                           ) -> "Codec":
+
+        Builds a codec fitted to term frequencies. Every byte term counts
+        once more than given, so that all of them get a code.
+
+        :param term_freq: TermFreq or mapping of terms to their counts
+        :param max_code_len: maximum code bit-length (None for no limit)
+        :return: Codec
+        """
+        freq = term_freq.tf if isinstance(term_freq, TermFreq) else term_freq
+        tf: Dict[int, int] = {term: 1 for term in range(256)}
+        for term, count in freq.items():
+            tf[term] += count
+        _, lengths = create_huff_codes(TermFreq(tf=tf),
+                                       max_code_len=max_code_len)
+        return cls(lengths)
+
+    @classmethod
+    def from_sample(cls, sample: ByteData,
+                    max_code_len: Optional[int] = CODEC_MAX_CODE_LEN
+                    ) -> "Codec":
+        """
+        @classmethod
+        def from_sample(cls, sample: ByteData,
+                        max_code_len: Optional[int] = CODEC_MAX_CODE_LEN
+                        ) -> "Codec":
+
+        Builds a codec fitted to a sample of typical data
+
+        :param sample: sample data
+        :param max_code_len: maximum code bit-length (None for no limit)
+        :return: Codec
+        """
+        return cls.from_histogram(calc_term_freq(InputData(data=sample)),
+                                  max_code_len=max_code_len)
+
+    def encode(self, data: ByteData) -> bytearray:
+        """
+        encode(self, data: ByteData) -> bytearray:
+
+        Encodes a message in the codec format, or stores it if the codes
+        would expand it
+
+        :param data: message
+        :return: encoded message
+        """
+        header: bytes = pack_codec_header(self.id, len(data))
+        writer = BitWriter(len(data) + len(header))
+        writer.write_bytes(header)
+        encode_bits(self.codes, data, writer)
+        if (writer.num_bits + 7) // 8 >= STORED_HEADER_BYTES + len(data):
+            return bytearray(pack_header(Format.STORED)) + data
+        return writer.getvalue()
+
+    def decode(self, data: ByteData) -> bytearray:
+        """
+        decode(self, data: ByteData) -> bytearray:
+
+        Decodes a message encoded by this codec
+
+        :param data: encoded message
+        :return: message
+        """
+        fmt: Optional[Format] = read_format(data)
+        if fmt is Format.STORED:
+            return bytearray(memoryview(data)[STORED_HEADER_BYTES:])
+        if fmt is not Format.CODEC:
+            raise ValueError(f"Not in the codec format: {fmt}")
+        codec_id, num_terms, pos = unpack_codec_header(data)
+        if codec_id != self.id:
+            raise ValueError(f"Encoded by codec {codec_id:08x}, "
+                             f"not {self.id:08x}")
+        res: bytearray = decode_bits(self.dtable, data, 8 * (len(data) - pos),
+                                     pos)
+        del res[num_terms:]  # terms decoded from padding bits
+        return res
+
+
+class Dictionary(Codec):
+    """
+    Codec trained on a corpus of typical data (see train), which can be
+    saved to a compact file (the packed code-length table, see
+    press.container) and loaded again.
+
+    ...
+
+    Methods
+    -------
+    to_bytes():
+        Packs the dictionary
+    from_bytes(buf):
+        Unpacks a dictionary
+    save(path):
+        Saves the dictionary to a file
+    load(path):
+        Loads a dictionary from a file
+    """
+
+    def to_bytes(self) -> bytes:
+        """
+        to_bytes(self) -> bytes:
+
+        Packs the dictionary into the contents of a dictionary file
+
+        :return: dictionary file bytes
+        """
+        return pack_dictionary(self.lengths)
+
+    @classmethod
+    def from_bytes(cls, buf: bytes) -> "Dictionary":
+        """
+        @classmethod
+        def from_bytes(cls, buf: bytes) -> "Dictionary":
+
+        Unpacks a dictionary packed by to_bytes
+
+        :param buf: dictionary file bytes
+        :return: Dictionary
+        """
+        return cls(unpack_dictionary(buf))
+
+    def save(self, path: str) -> str:
+        """
+        save(self, path: str) -> str:
+
+        Saves the dictionary to a file
+
+        :param path: dictionary file
+        :return: name of the dictionary file
+        """
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "Dictionary":
+        """
+        @classmethod
+        def load(cls, path: str) -> "Dictionary":
+
+        Loads a dictionary saved by save
+
+        :param path: dictionary file
+        :return: Dictionary
+        """
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+def train(samples: Iterable[ByteData],
+          max_code_len: Optional[int] = CODEC_MAX_CODE_LEN) -> Dictionary:
+    """
+    Trains a dictionary on a corpus of typical data: the codes are fitted
+    to the term frequencies of all the samples together
+
+    :param samples: samples of data e.g. messages or log lines
+    :param max_code_len: maximum code bit-length (None for no limit)
+    :return: Dictionary
+    """
+    return Dictionary.from_histogram(calc_term_freq_chunks(samples),
+                                     max_code_len=max_code_len)
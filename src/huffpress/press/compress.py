@@ -23,12 +23,113 @@
 import json
 import os
 from tqdm import tqdm  # type: ignore
-from typing import Tuple, List, Optional, Union
+from typing import (
+    Dict, Hashable, Iterable, Iterator, Tuple, List, Optional, Union,
+    TYPE_CHECKING
+    )
 from huffpress.auxi.basen import to_basen, to_dec, basen
-from huffpress.auxi.modes import Mode
-from huffpress.huff.hfunctions import create_huff_tree
-from huffpress.huff.htypes import InputData, HuffCode
-from huffpress.huff.HuffNode import HuffNode
+from huffpress.auxi.bitio import BitWriter, read_chunks
+from huffpress.auxi.histogram import (
+    ByteChunk, PairHistogram, DigramHistogram, digrams
+    )
+from huffpress.auxi.modes import Mode, Format
+from huffpress.huff.hcontext import cluster_contexts, CONTEXT_TABLES
+from huffpress.huff.hencode import (
+    build_encode_table, encode_bits, encode_context_bits
+    )
+from huffpress.huff.hfunctions import (
+    calc_term_freq, calc_term_freq_chunks, create_huff_tree, build_code_table,
+    code_lengths, canonical_codes, table_to_code, code_to_table,
+    limit_code_lengths, code_bits, canonical_encode_table, get_tree_cache,
+    TreeCache
+    )
+from huffpress.huff.htypes import InputData, HuffCode, TermFreq, CachedCodes
+from huffpress.huff.HuffTree import HuffTree
+from huffpress.press.container import (
+    pack_header, pack_varint, pack_code_lengths, pack_json_header,
+    pack_blocks_header, pack_block_header, pack_block_index,
+    pack_context_header, pack_digram_header, BLOCKS_END, STORED_HEADER_BYTES,
+    MAX_CONTEXT_TABLES
+    )
+from huffpress.press.parallel import block_slices, map_bytes, map_file
+
+if TYPE_CHECKING:
+    from huffpress.press.codec import Codec
+
+BUFFER_SIZE = 1 << 20  # bytes read at a time when streaming a file
+STREAM_THRESHOLD = 1 << 26  # files larger than this are streamed
+BLOCK_SIZE = 1 << 20  # original size of the blocks of Format.BLOCKS
+
+
+def create_huff_codes(term_freq: TermFreq, verbose: bool = False,
+                      max_code_len: Optional[int] = None,
+                      cached: bool = True
+                      ) -> Tuple[HuffCode, Dict[int, int]]:
+    """
+    Creates the Huffman codes of the input data and their bit-lengths. If
+    any code is longer than max_code_len, the bit-lengths are recomputed with
+    the length-limited (package-merge) builder and canonical codes are used.
+    When the tree cache is enabled (see hfunctions.enable_tree_cache), the
+    codes of a histogram seen before are taken from it, unless cached is
+    False.
+
+    :param term_freq: term frequencies of the input data
+    :param verbose: set to True for printing console outputs, including the
+                    compression cost of limiting the code bit-lengths
+    :param max_code_len: maximum code bit-length (None for no limit)
+    :param cached: False to always build the codes, e.g. for the Huffman
+                   map of Format.JSON, whose codes (unlike their
+                   bit-lengths) depend on the order of the terms
+    :return: (Huffman map, dictionary of terms and their code bit-lengths)
+    """
+    cache: Optional[TreeCache] = get_tree_cache() if cached else None
+    if cache is not None:
+        key: Hashable = cache.histogram_key(term_freq, max_code_len)
+        entry: Optional[CachedCodes] = cache.get(key)
+        if entry is None or entry.encod_seq is None:
+            encod_seq, lengths, huff_tree = build_huff_codes(
+                term_freq, verbose=verbose, max_code_len=max_code_len)
+            entry = cache.put(cache.lengths_key(lengths),
+                              CachedCodes(lengths=lengths))
+            if entry.encod_seq is None:
+                entry.tree, entry.encod_seq = huff_tree, encod_seq
+            entry = cache.put(key, entry)
+        return entry.encod_seq, entry.lengths
+    encod_seq, lengths, _ = build_huff_codes(term_freq, verbose=verbose,
+                                             max_code_len=max_code_len)
+    return encod_seq, lengths
+
+
+def build_huff_codes(term_freq: TermFreq, verbose: bool = False,
+                     max_code_len: Optional[int] = None
+                     ) -> Tuple[HuffCode, Dict[int, int], HuffTree]:
+    """
+    Builds the Huffman tree and codes of create_huff_codes, without the
+    tree cache
+
+    :param term_freq: term frequencies of the input data
+    :param verbose: set to True for printing console outputs
+    :param max_code_len: maximum code bit-length (None for no limit)
+    :return: (Huffman map, dictionary of terms and their code bit-lengths,
+              Huffman tree)
+    """
+    encod_seq: HuffCode
+    huff_tree: HuffTree
+    encod_seq, huff_tree = create_huff_tree(term_freq, verbose=verbose)
+    lengths: Dict[int, int] = code_lengths(build_code_table(huff_tree))
+    if max_code_len is not None and \
+            max(lengths.values(), default=0) > max_code_len:
+        optimal: int = code_bits(term_freq, lengths)
+        lengths = limit_code_lengths(term_freq, max_code_len)
+        limited_seq: HuffCode = table_to_code(canonical_codes(lengths))
+        encod_seq = HuffCode(data={term: limited_seq.data[term]
+                                   for term in encod_seq.data})
+        if verbose:
+            limited: int = code_bits(term_freq, lengths)
+            print(f"Limiting codes to {max_code_len} bits costs "
+                  f"{limited - optimal} bits "
+                  f"(+{100 * (limited - optimal) / optimal:.3f}%)")
+    return encod_seq, lengths, huff_tree
 
 
 def create_huff_sequence(huff: HuffCode, inp_data: InputData,
@@ -110,90 +211,792 @@ def compress_seq_bins(final_bins: List[str],
     return bytearray(res)
 
 
+def pack_huff_map(huff_map: HuffCode) -> bytes:
+    """
+    Packs the Huffman map as JSON, with the encodings in radix-36
+
+    :param huff_map: Huffman map containing terms and their encoding
+    :return: JSON Huffman map bytes
+    """
+    # convert huff_map binaries (base 2) to base 36
+    # adding 1 at the start to handle cases where encoded sequences
+    # start with 0. e.g. 00 --> 100 --> 4 (radix-36)
+    radix_map = {k: basen("1" + v, 2, 36, True)
+                 for k, v in huff_map.data.items()}
+    return json.dumps(radix_map).replace(chr(32), "").encode("ascii")
+
+
 def add_huff_map(final_seq: bytearray, huff_map: HuffCode) -> bytearray:
     """
     Concatenate the final generated Huffman sequence with the Huffman map,
-    which is required for decoding the Huffman sequence.
+    which is required for decoding the Huffman sequence, and the map length
+    in radix-36 digits (the layout from before the JSON format header).
 
     :param final_seq: final compressed Huffman sequence binaries computed by
                     compress_seq_bins function
     :param huff_map: Huffman map containing terms and their encoding
     :return: concatenated final_seq + huff_map in a bytearray sequence
     """
-    # convert huff_map binaries (base 2) to base 36
-    # adding 1 at the start to handle cases where encoded sequences
-    # start with 0. e.g. 00 --> 100 --> 4 (radix-36)
-    huff_map.data = {k: basen("1" + v, 2, 36, True)
-                     for k, v in huff_map.data.items()}
-
-    # add radix-36 huff map to final sequence
-    huff_bytes = [ord(x) for x in list(json.dumps(huff_map.data)
-                                       .replace(chr(32), ""))]
-    huff_array = bytearray(huff_bytes)
+    huff_array = bytearray(pack_huff_map(huff_map))
     huff_len = list(map(lambda x: ord(str(x)), to_basen(len(huff_array), 36)))
     final_res = final_seq + huff_array + bytearray(huff_len)
     return final_res
 
 
-def compress_bytes(inp_bytes: bytes, verbose: bool = False) -> bytearray:
+def create_canonical_header(lengths: Dict[int, int], num_terms: int) -> bytes:
+    """
+    Header of the canonical format: format, number of encoded terms and the
+    packed code-length table, which is all that is required to rebuild the
+    canonical codes.
+
+    :param lengths: dictionary of terms and their code bit-lengths
+    :param num_terms: number of terms (bytes) in the original data
+    :return: header bytes
+    """
+    return pack_header(Format.CANONICAL) + pack_varint(num_terms) + \
+        pack_code_lengths(lengths)
+
+
+def create_encoder(term_freq: TermFreq, encod_seq: HuffCode,
+                   lengths: Dict[int, int],
+                   fmt: Format = Format.JSON) -> Tuple[bytes, List[str], int]:
+    """
+    Header and code lookup table for encoding data in the given format.
+
+    Format.JSON: the header holds the Huffman map, followed by a byte with
+    the number of 0 paddings at the end of the sequence.
+    Format.CANONICAL: only the code bit-lengths come from the tree, the
+    codes themselves are reassigned in canonical order so the decoder can
+    rebuild them from the bit-lengths in the header.
+
+    :param term_freq: term frequencies of the input data
+    :param encod_seq: Huffman map computed by create_huff_codes
+    :param lengths: code bit-lengths computed by create_huff_codes
+    :param fmt: compressed data format
+    :return: (header bytes, binary sequence of every term, number of 0
+             padding bits to write after the sequence)
+    """
+    num_bits: int = code_bits(term_freq, lengths)
+    if fmt is Format.CANONICAL:
+        header: bytes = create_canonical_header(lengths,
+                                                sum(term_freq.tf.values()))
+        return header, canonical_encode_table(lengths), -num_bits % 8
+    rem: int = 8 - (num_bits % 8)
+    header = pack_json_header(pack_huff_map(encod_seq)) + bytes([rem])
+    return header, build_encode_table(code_to_table(encod_seq)), rem
+
+
+def create_context_encoder(pairs: PairHistogram, num_terms: int,
+                           verbose: bool = False,
+                           max_code_len: Optional[int] = None,
+                           context_tables: int = CONTEXT_TABLES
+                           ) -> Tuple[bytes, List[List[str]], int, int]:
+    """
+    Header and code lookup tables for encoding data in the context format:
+    the contexts are clustered into code tables (see huff.hcontext), and
+    every table gets canonical codes fitted to the terms following its
+    contexts.
+
+    :param pairs: byte pair counts of the input data
+    :param num_terms: number of terms (bytes) of the input data
+    :param verbose: set to True for printing console outputs
+    :param max_code_len: maximum code bit-length (None for no limit)
+    :param context_tables: maximum number of code tables
+    :return: (header bytes, binary sequence of every term for every
+             context, number of 0 padding bits to write after the sequence,
+             number of bits of the sequence)
+    """
+    if not 1 <= context_tables <= MAX_CONTEXT_TABLES:
+        raise ValueError(f"Invalid number of context tables "
+                         f"{context_tables}")
+    context_map, tables = cluster_contexts(pairs, context_tables)
+    if verbose:
+        print(f"Clustered contexts into {len(tables)} code tables")
+    lengths: List[Dict[int, int]] = [
+        create_huff_codes(term_freq, max_code_len=max_code_len)[1]
+        for term_freq in tables
+        ]
+    num_bits: int = sum(code_bits(term_freq, table_lengths)
+                        for term_freq, table_lengths in zip(tables, lengths))
+    header: bytes = pack_context_header(num_terms, context_map, lengths)
+    codes: List[List[str]] = [canonical_encode_table(table_lengths)
+                              for table_lengths in lengths]
+    return header, [codes[num] for num in context_map], -num_bits % 8, \
+        num_bits
+
+
+def create_digram_encoder(symbol_freq: TermFreq, size: int, tail: bytes,
+                          verbose: bool = False,
+                          max_code_len: Optional[int] = None
+                          ) -> Tuple[bytes, List[str], int, int]:
+    """
+    Header and code lookup table for encoding data in the digram format:
+    canonical codes of the 2-byte symbols of the data (see
+    auxi.histogram.digrams)
+
+    :param symbol_freq: frequencies of the 2-byte symbols of the input data
+    :param size: original size
+    :param tail: trailing byte of an odd original size (empty otherwise)
+    :param verbose: set to True for printing console outputs
+    :param max_code_len: maximum code bit-length (None for no limit)
+    :return: (header bytes, binary sequence of every symbol, number of 0
+             padding bits to write after the sequence, number of bits of
+             the sequence)
+    """
+    _, lengths = create_huff_codes(symbol_freq, verbose=verbose,
+                                   max_code_len=max_code_len)
+    if verbose:
+        print(f"Coding {len(lengths)} distinct 2-byte symbols")
+    num_bits: int = code_bits(symbol_freq, lengths)
+    header: bytes = pack_digram_header(size, lengths, tail)
+    return header, canonical_encode_table(lengths, width=2), \
+        -num_bits % 8, num_bits
+
+
+def digrams_fit(symbol_freq: TermFreq,
+                max_code_len: Optional[int] = None) -> bool:
+    """
+    Tells whether codes of at most max_code_len bits can encode every
+    distinct 2-byte symbol of the data, if not the data is coded in single
+    bytes instead (Format.CANONICAL)
+
+    :param symbol_freq: frequencies of the 2-byte symbols of the input data
+    :param max_code_len: maximum code bit-length (None for no limit)
+    :return: True to code the data in the digram format
+    """
+    return max_code_len is None or len(symbol_freq.tf) <= 1 << max_code_len
+
+
+def expands(header: bytes, num_bits: int, pad_bits: int, size: int) -> bool:
+    """
+    Tells from the code bit-lengths, before encoding, whether compressed
+    data would be no smaller than the stored original data
+
+    :param header: header (or code-length table) of the compressed data
+    :param num_bits: number of bits of the encoded sequence
+    :param pad_bits: number of 0 padding bits after the sequence
+    :param size: original size
+    :return: True to store the original data instead
+    """
+    return len(header) + (num_bits + pad_bits) // 8 >= \
+        STORED_HEADER_BYTES + size
+
+
+def compress_block(block: ByteChunk, max_code_len: Optional[int] = None
+                   ) -> Tuple[int, Dict[int, int], ByteChunk]:
+    """
+    Compresses one block of the blocks format with canonical codes fitted
+    to the block's own term frequencies, or stores it (empty code
+    bit-lengths) when that would not make it smaller
+
+    :param block: block of input data
+    :param max_code_len: maximum code bit-length (see compress_bytes)
+    :return: (original size, code bit-lengths, packed bitstream zero padded
+             to a byte, or the block itself)
+    """
+    term_freq: TermFreq = calc_term_freq(InputData(data=block))
+    _, lengths = create_huff_codes(term_freq, max_code_len=max_code_len)
+    num_bits: int = code_bits(term_freq, lengths)
+    if expands(pack_code_lengths(lengths), num_bits, -num_bits % 8,
+               len(block)):
+        return len(block), {}, bytes(block)
+    writer = BitWriter((num_bits + 7) // 8)
+    encode_bits(canonical_encode_table(lengths), block, writer)
+    return len(block), lengths, writer.getvalue()
+
+
+class BlocksWriter(object):
+    """
+    Packs the pieces of the blocks format (see press.container) around
+    blocks compressed by compress_block, keeping what the block headers and
+    the block index need: the previous block's code bit-lengths, the
+    position in the output and an index entry for every block.
+
+    ...
+
+    Attributes
+    ----------
+    pos : int
+        number of bytes packed so far
+    entries : List[Tuple[int, int, int]]
+        index entries of the blocks packed so far
+    table_block : int
+        number of the last block with its own table
+    prev_lengths : Optional[Dict[int, int]]
+        code bit-lengths of the previous block with a table
+
+    Methods
+    -------
+    header(block_size):
+        Packs the header of the blocks format
+    block_header(raw_size, lengths, comp_size):
+        Packs the header of the next block
+    end():
+        Packs the end marker and the block index
+    """
+    __slots__ = ("pos", "entries", "table_block", "prev_lengths")
+
+    def __init__(self):
+        """
+        __init__(self):
+
+        Constructs BlocksWriter at the start of the output
+        """
+        self.pos = 0
+        self.entries: List[Tuple[int, int, int]] = []
+        self.table_block = 0
+        self.prev_lengths: Optional[Dict[int, int]] = None
+
+    def header(self, block_size: int) -> bytes:
+        """
+        header(self, block_size: int) -> bytes:
+
+        Packs the header of the blocks format
+
+        :param block_size: original size of the blocks
+        :return: header bytes
+        """
+        header: bytes = pack_blocks_header(block_size)
+        self.pos += len(header)
+        return header
+
+    def block_header(self, raw_size: int, lengths: Dict[int, int],
+                     comp_size: int) -> bytes:
+        """
+        block_header(self, raw_size: int, lengths: Dict[int, int],
+                     comp_size: int) -> bytes:
+
+        Packs the header of the next block, to be followed by its bitstream
+
+        :param raw_size: original size of the block
+        :param lengths: code bit-lengths of the block (empty for a stored
+                        block)
+        :param comp_size: size of the block's bitstream
+        :return: block header bytes
+        """
+        header: bytes = pack_block_header(raw_size, lengths, comp_size,
+                                          self.prev_lengths)
+        self.pos += len(header) + comp_size
+        if not lengths:
+            self.entries.append((raw_size, len(header) + comp_size, 0))
+            return header
+        if lengths != self.prev_lengths:
+            self.table_block = len(self.entries)
+        self.entries.append((raw_size, len(header) + comp_size,
+                             len(self.entries) - self.table_block))
+        self.prev_lengths = lengths
+        return header
+
+    def end(self) -> bytes:
+        """
+        end(self) -> bytes:
+
+        Packs the end marker and the block index
+
+        :return: end marker, index and trailer bytes
+        """
+        return BLOCKS_END + pack_block_index(self.entries,
+                                             self.pos + len(BLOCKS_END))
+
+
+def create_blocks(compressed: Iterable[Tuple[int, Dict[int, int], bytes]],
+                  block_size: int, verbose: bool = False,
+                  num_blocks: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Assembles compressed blocks into the blocks format (see
+    press.container) piece by piece: the header, then the header and
+    bitstream of every block, the end marker and the block index.
+
+    :param compressed: blocks compressed by compress_block, in order
+    :param block_size: original size of the blocks
+    :param verbose: set to True for printing console outputs
+    :param num_blocks: number of blocks, for the progress bar (optional)
+    :return: iterator of compressed data pieces
+    """
+    writer = BlocksWriter()
+    yield writer.header(block_size)
+    for raw_size, lengths, payload in tqdm(compressed, total=num_blocks,
+                                           disable=not verbose):
+        yield writer.block_header(raw_size, lengths, len(payload))
+        yield payload
+    yield writer.end()
+
+
+def check_workers(fmt: Optional[Format], workers: Optional[int]) -> Format:
+    """
+    Picks the format to compress with for the given number of worker
+    processes, checking that it can be compressed with them: only blocks
+    can be compressed in parallel. Format.CODEC data is written by a Codec
+    (or Dictionary) instead, and Format.ARCHIVE by press.archive
+
+    :param fmt: compressed data format (None for Format.BLOCKS with
+                several workers, Format.JSON otherwise)
+    :param workers: number of worker processes
+    :return: compressed data format
+    """
+    if fmt is Format.CODEC:
+        raise ValueError(f"{fmt} cannot be compressed without a codec, use "
+                         f"a Codec or Dictionary")
+    if fmt is Format.ARCHIVE:
+        raise ValueError(f"{fmt} cannot be compressed from bytes, use "
+                         f"create_archive")
+    parallel: bool = workers is not None and workers > 1
+    if fmt is None:
+        return Format.BLOCKS if parallel else Format.JSON
+    if parallel and fmt is not Format.BLOCKS:
+        raise ValueError(f"{fmt} cannot be compressed with several workers, "
+                         f"use {Format.BLOCKS}")
+    return fmt
+
+
+def compress_blocks(inp_bytes: bytes, verbose: bool = False,
+                    max_code_len: Optional[int] = None,
+                    block_size: int = BLOCK_SIZE,
+                    workers: Optional[int] = None) -> bytearray:
+    """
+    Compresses input data bytes into the blocks format: the data is split
+    into blocks of block_size bytes, each compressed independently with a
+    table fitted to its own statistics. With several workers, the blocks
+    are compressed in a pool of processes sharing the input data (see
+    press.parallel).
+
+    :param inp_bytes: input data bytes to be compressed
+    :param verbose: set to True for printing console outputs
+    :param max_code_len: maximum code bit-length (see compress_bytes)
+    :param block_size: original size of the blocks
+    :param workers: number of worker processes (None or 1 to compress in
+                    this process)
+    :return: Final compressed bytearray sequence
+    """
+    compressed: Iterable[Tuple[int, Dict[int, int], bytes]]
+    if workers is not None and workers > 1:
+        compressed = map_bytes(compress_block, inp_bytes, block_size,
+                               workers, max_code_len)
+    else:
+        view = memoryview(inp_bytes)
+        compressed = (compress_block(view[start: end], max_code_len)
+                      for start, end in block_slices(len(view), block_size))
+    res = bytearray()
+    for piece in create_blocks(compressed, block_size, verbose,
+                               num_blocks=-(-len(inp_bytes) // block_size)):
+        res += piece
+    return res
+
+
+def compress_bytes(inp_bytes: bytes, verbose: bool = False,
+                   fmt: Optional[Format] = None,
+                   max_code_len: Optional[int] = None,
+                   block_size: int = BLOCK_SIZE,
+                   workers: Optional[int] = None,
+                   dictionary: Optional["Codec"] = None,
+                   context_tables: int = CONTEXT_TABLES) -> bytearray:
     """
     Compress input data bytes using the Huffman Encoding algorithm.
     Function compress_string takes an input string which transforms to bytes,
     then calls this function to compress.
 
+    The codes are packed straight into a preallocated output buffer (see
+    huff.hencode), after the header (see create_encoder and press.container).
+
     :param inp_bytes: input data bytes to be compressed
     :param verbose: set to True for printing console outputs
+    :param fmt: Format.JSON stores the Huffman map as JSON,
+                Format.CANONICAL stores only the packed code bit-lengths,
+                Format.BLOCKS compresses blocks independently (see
+                compress_blocks), Format.STORED stores the data as is,
+                Format.CONTEXT codes every byte with the code table of the
+                byte before it (order-1 contexts, see huff.hcontext),
+                Format.DIGRAM codes 2-byte symbols, or single bytes
+                (Format.CANONICAL) when max_code_len is too short for
+                them.
+                None (default) picks Format.BLOCKS with several workers,
+                Format.JSON otherwise.
+                Data that Huffman codes would not make smaller is stored
+                instead, found out before encoding, and so are such
+                blocks.
+    :param max_code_len: maximum code bit-length e.g. 11 - 15 to keep
+                         decoding tables small (None for no limit)
+    :param block_size: original size of the blocks of Format.BLOCKS
+    :param workers: number of worker processes compressing blocks in
+                    parallel (Format.BLOCKS only, None or 1 for none)
+    :param dictionary: Dictionary (or Codec) to encode with instead, the
+                       output only refers to it by id (fmt is not used)
+    :param context_tables: maximum number of code tables the contexts of
+                           Format.CONTEXT are clustered into
     :return: Final compressed bytearray sequence
     """
+    if dictionary is not None:
+        return dictionary.encode(inp_bytes)
+    fmt = check_workers(fmt, workers)
+    if fmt is Format.BLOCKS:
+        return compress_blocks(inp_bytes, verbose=verbose,
+                               max_code_len=max_code_len,
+                               block_size=block_size, workers=workers)
+    if fmt is Format.STORED or (fmt is Format.CONTEXT and not inp_bytes) or \
+            (fmt is Format.DIGRAM and len(inp_bytes) < 2):
+        return bytearray(pack_header(Format.STORED)) + inp_bytes
+    if fmt is Format.DIGRAM:
+        symbol_freq = TermFreq(tf=DigramHistogram(inp_bytes).terms())
+        if not digrams_fit(symbol_freq, max_code_len):
+            if verbose:
+                print(f"Coding single bytes, {max_code_len}-bit codes "
+                      f"cannot encode every 2-byte symbol")
+            fmt = Format.CANONICAL
+    if fmt is Format.DIGRAM:
+        header, codes, rem, num_bits = create_digram_encoder(
+            symbol_freq, len(inp_bytes),
+            bytes(inp_bytes[len(inp_bytes) & ~1:]), verbose=verbose,
+            max_code_len=max_code_len)
+        if expands(header, num_bits, rem, len(inp_bytes)):
+            if verbose:
+                print("Storing data, Huffman coding would expand it")
+            return bytearray(pack_header(Format.STORED)) + inp_bytes
+        writer = BitWriter(len(header) + (num_bits + rem) // 8)
+        writer.write_bytes(header)
+        encode_bits(codes, digrams(inp_bytes), writer, verbose=verbose)
+        writer.write(0, rem)
+        return writer.getvalue()
+    if fmt is Format.CONTEXT:
+        header, ctx_codes, rem, num_bits = create_context_encoder(
+            PairHistogram(inp_bytes), len(inp_bytes), verbose=verbose,
+            max_code_len=max_code_len, context_tables=context_tables)
+        if expands(header, num_bits, rem, len(inp_bytes)):
+            if verbose:
+                print("Storing data, Huffman coding would expand it")
+            return bytearray(pack_header(Format.STORED)) + inp_bytes
+        writer = BitWriter(len(header) + (num_bits + rem) // 8)
+        writer.write_bytes(header)
+        encode_context_bits(ctx_codes, inp_bytes, writer, verbose=verbose)
+        writer.write(0, rem)
+        return writer.getvalue()
     encod_seq: HuffCode
-    huff_tree: Optional[HuffNode]
+    lengths: Dict[int, int]
     input_data = InputData(data=inp_bytes)
-    encod_seq, huff_tree = create_huff_tree(input_data,
-                                            verbose=verbose)
-    huff_seq: Tuple[int, str] = create_huff_sequence(encod_seq, input_data,
-                                                     verbose=verbose)
-    final_seq: str = create_final_sequence(huff_seq, verbose=verbose)
-    seq_bins: List[str] = create_seq_bins(final_seq, verbose=verbose)
-    final_res: bytearray = compress_seq_bins(seq_bins, verbose=verbose)
-    app_res = add_huff_map(final_res, encod_seq)
+    term_freq: TermFreq = calc_term_freq(input_data)
+    encod_seq, lengths = create_huff_codes(term_freq, verbose=verbose,
+                                           max_code_len=max_code_len,
+                                           cached=fmt is not Format.JSON)
+    header, codes, rem = create_encoder(term_freq, encod_seq, lengths, fmt)
+    num_bits: int = code_bits(term_freq, lengths)
+    if expands(header, num_bits, rem, len(inp_bytes)):
+        if verbose:
+            print("Storing data, Huffman coding would expand it")
+        return bytearray(pack_header(Format.STORED)) + inp_bytes
+    writer = BitWriter(len(header) + (num_bits + rem) // 8)
+    writer.write_bytes(header)
+    encode_bits(codes, inp_bytes, writer, verbose=verbose)
+    writer.write(0, rem)
+    final_res: bytearray = writer.getvalue()
+
+    return final_res
+
+
+def store_file(inp_file: str, outfile: str,
+               buffer_size: int = BUFFER_SIZE) -> str:
+    """
+    Stores a file as is in the stored format, a buffer at a time
+
+    :param inp_file: input file
+    :param outfile: output file
+    :param buffer_size: number of bytes read at a time
+    :return: name of the output file
+    """
+    with open(inp_file, "rb") as f, open(outfile, "wb") as out:
+        out.write(pack_header(Format.STORED))
+        for chunk in read_chunks(f, buffer_size):
+            out.write(chunk)
+    return outfile
 
-    return app_res
 
+def compress_context_stream(inp_file: str, outfile: str,
+                            verbose: bool = False,
+                            max_code_len: Optional[int] = None,
+                            buffer_size: int = BUFFER_SIZE,
+                            context_tables: int = CONTEXT_TABLES) -> str:
+    """
+    Compresses a file in the context format in two passes over chunks of
+    buffer_size bytes (see compress_stream): the first pass counts the byte
+    pairs, the second encodes each chunk, carrying the context over from
+    the chunk before.
 
-def compress_string(inp_st: str, verbose: bool = False) -> bytearray:
+    :param inp_file: input file to compress
+    :param outfile: output file
+    :param verbose: set to True for printing console outputs
+    :param max_code_len: maximum code bit-length (see compress_bytes)
+    :param buffer_size: number of bytes read and encoded at a time
+    :param context_tables: maximum number of code tables (see
+                           compress_bytes)
+    :return: name of the compressed output file
+    """
+    size: int = os.path.getsize(inp_file)
+    num_chunks: int = -(-size // buffer_size)
+    if not size:
+        return store_file(inp_file, outfile, buffer_size)
+    if verbose:
+        print("Calculating byte pair frequencies")
+    pairs = PairHistogram()
+    with open(inp_file, "rb") as f:
+        for chunk in tqdm(read_chunks(f, buffer_size), total=num_chunks,
+                          disable=not verbose):
+            pairs.update(chunk)
+    header, ctx_codes, rem, num_bits = create_context_encoder(
+        pairs, size, verbose=verbose, max_code_len=max_code_len,
+        context_tables=context_tables)
+    if expands(header, num_bits, rem, size):
+        if verbose:
+            print("Storing data, Huffman coding would expand it")
+        return store_file(inp_file, outfile, buffer_size)
+
+    if verbose:
+        print("Encoding")
+    writer = BitWriter()
+    prev = 0
+    with open(inp_file, "rb") as f, open(outfile, "wb") as out:
+        out.write(header)
+        for chunk in tqdm(read_chunks(f, buffer_size), total=num_chunks,
+                          disable=not verbose):
+            prev = encode_context_bits(ctx_codes, chunk, writer, prev)
+            out.write(writer.drain())
+        writer.write(0, rem)
+        out.write(writer.getvalue())
+    return outfile
+
+
+def compress_digram_stream(inp_file: str, outfile: str,
+                           verbose: bool = False,
+                           max_code_len: Optional[int] = None,
+                           buffer_size: int = BUFFER_SIZE) -> str:
+    """
+    Compresses a file in the digram format in two passes over chunks of
+    buffer_size bytes (see compress_stream), rounded up to an even size so
+    that no 2-byte symbol spans two chunks
+
+    :param inp_file: input file to compress
+    :param outfile: output file
+    :param verbose: set to True for printing console outputs
+    :param max_code_len: maximum code bit-length (see compress_bytes)
+    :param buffer_size: number of bytes read and encoded at a time
+    :return: name of the compressed output file
+    """
+    size: int = os.path.getsize(inp_file)
+    if size < 2:
+        return store_file(inp_file, outfile, buffer_size)
+    buffer_size += buffer_size & 1
+    num_chunks: int = -(-size // buffer_size)
+    if verbose:
+        print("Calculating 2-byte symbol frequencies")
+    hist = DigramHistogram()
+    with open(inp_file, "rb") as f:
+        for chunk in tqdm(read_chunks(f, buffer_size), total=num_chunks,
+                          disable=not verbose):
+            hist.update(chunk)
+        f.seek(size & ~1)
+        tail: bytes = f.read()
+    symbol_freq = TermFreq(tf=hist.terms())
+    if not digrams_fit(symbol_freq, max_code_len):
+        if verbose:
+            print(f"Coding single bytes, {max_code_len}-bit codes cannot "
+                  f"encode every 2-byte symbol")
+        return compress_stream(inp_file, outfile, verbose=verbose,
+                               fmt=Format.CANONICAL,
+                               max_code_len=max_code_len,
+                               buffer_size=buffer_size)
+    header, codes, rem, num_bits = create_digram_encoder(
+        symbol_freq, size, tail, verbose=verbose, max_code_len=max_code_len)
+    if expands(header, num_bits, rem, size):
+        if verbose:
+            print("Storing data, Huffman coding would expand it")
+        return store_file(inp_file, outfile, buffer_size)
+
+    if verbose:
+        print("Encoding")
+    writer = BitWriter()
+    with open(inp_file, "rb") as f, open(outfile, "wb") as out:
+        out.write(header)
+        for chunk in tqdm(read_chunks(f, buffer_size), total=num_chunks,
+                          disable=not verbose):
+            encode_bits(codes, digrams(chunk), writer)
+            out.write(writer.drain())
+        writer.write(0, rem)
+        out.write(writer.getvalue())
+    return outfile
+
+
+def compress_stream(inp_file: str, outfile: str, verbose: bool = False,
+                    fmt: Optional[Format] = None,
+                    max_code_len: Optional[int] = None,
+                    buffer_size: int = BUFFER_SIZE,
+                    block_size: int = BLOCK_SIZE,
+                    workers: Optional[int] = None,
+                    context_tables: int = CONTEXT_TABLES) -> str:
+    """
+    Compresses a file in two passes over chunks of buffer_size bytes, so
+    that memory use is bounded by the buffer size rather than the file
+    size: the first pass counts the term frequencies, the second encodes
+    each chunk and writes the packed bytes straight to the output file.
+    The output is the same as compress_bytes of the whole file.
+
+    Format.BLOCKS takes a single pass over blocks of block_size bytes,
+    which bounds memory use instead. With several workers, the blocks are
+    compressed in a pool of processes memory mapping the file.
+
+    :param inp_file: input file to compress
+    :param outfile: output file
+    :param verbose: set to True for printing console outputs
+    :param fmt: compressed data format (see compress_bytes)
+    :param max_code_len: maximum code bit-length (see compress_bytes)
+    :param buffer_size: number of bytes read and encoded at a time
+    :param block_size: original size of the blocks of Format.BLOCKS
+    :param workers: number of worker processes compressing blocks in
+                    parallel (Format.BLOCKS only, None or 1 for none)
+    :param context_tables: maximum number of code tables (see
+                           compress_bytes)
+    :return: name of the compressed output file
+    """
+    fmt = check_workers(fmt, workers)
+    if fmt is Format.BLOCKS:
+        num_blocks: int = -(-os.path.getsize(inp_file) // block_size)
+        with open(inp_file, "rb") as f, open(outfile, "wb") as out:
+            compressed: Iterable[Tuple[int, Dict[int, int], bytes]]
+            if workers is not None and workers > 1:
+                compressed = map_file(compress_block, inp_file, block_size,
+                                      workers, max_code_len)
+            else:
+                compressed = (compress_block(chunk, max_code_len)
+                              for chunk in read_chunks(f, block_size))
+            for piece in create_blocks(compressed, block_size, verbose,
+                                       num_blocks=num_blocks):
+                out.write(piece)
+        return outfile
+
+    if fmt is Format.STORED:
+        return store_file(inp_file, outfile, buffer_size)
+    if fmt is Format.CONTEXT:
+        return compress_context_stream(inp_file, outfile, verbose=verbose,
+                                       max_code_len=max_code_len,
+                                       buffer_size=buffer_size,
+                                       context_tables=context_tables)
+    if fmt is Format.DIGRAM:
+        return compress_digram_stream(inp_file, outfile, verbose=verbose,
+                                      max_code_len=max_code_len,
+                                      buffer_size=buffer_size)
+    num_chunks: int = -(-os.path.getsize(inp_file) // buffer_size)
+    if verbose:
+        print("Calculating term frequencies")
+    with open(inp_file, "rb") as f:
+        term_freq: TermFreq = calc_term_freq_chunks(
+            tqdm(read_chunks(f, buffer_size), total=num_chunks,
+                 disable=not verbose))
+    encod_seq, lengths = create_huff_codes(term_freq, verbose=verbose,
+                                           max_code_len=max_code_len,
+                                           cached=fmt is not Format.JSON)
+    header, codes, rem = create_encoder(term_freq, encod_seq, lengths, fmt)
+    if expands(header, code_bits(term_freq, lengths), rem,
+               sum(term_freq.tf.values())):
+        if verbose:
+            print("Storing data, Huffman coding would expand it")
+        return store_file(inp_file, outfile, buffer_size)
+
+    if verbose:
+        print("Encoding")
+    writer = BitWriter()
+    with open(inp_file, "rb") as f, open(outfile, "wb") as out:
+        out.write(header)
+        for chunk in tqdm(read_chunks(f, buffer_size), total=num_chunks,
+                          disable=not verbose):
+            encode_bits(codes, chunk, writer)
+            out.write(writer.drain())
+        writer.write(0, rem)
+        out.write(writer.getvalue())
+    return outfile
+
+
+def compress_string(inp_st: str, verbose: bool = False,
+                    fmt: Optional[Format] = None,
+                    max_code_len: Optional[int] = None,
+                    block_size: int = BLOCK_SIZE,
+                    workers: Optional[int] = None,
+                    context_tables: int = CONTEXT_TABLES) -> bytearray:
     """
     Compresses input string using the Huffman Encoding algorithm
 
     :param inp_st: input string to be compressed
     :param verbose: set to True for printing console outputs
+    :param fmt: compressed data format (see compress_bytes)
+    :param max_code_len: maximum code bit-length (see compress_bytes)
+    :param block_size: original size of the blocks (see compress_bytes)
+    :param workers: number of worker processes (see compress_bytes)
+    :param context_tables: maximum number of code tables (see
+                           compress_bytes)
     :return: compressed data in bytearray format
     """
     inp_bytes = bytearray([ord(x) for x in list(inp_st)])
-    return compress_bytes(inp_bytes, verbose=verbose)
+    return compress_bytes(inp_bytes, verbose=verbose, fmt=fmt,
+                          max_code_len=max_code_len, block_size=block_size,
+                          workers=workers, context_tables=context_tables)
 
 
-def compress_file(inp_file: str, verbose: bool = False):
+def compress_file(inp_file: str, verbose: bool = False,
+                  fmt: Optional[Format] = None,
+                  max_code_len: Optional[int] = None,
+                  buffer_size: int = BUFFER_SIZE,
+                  stream: Optional[bool] = None,
+                  block_size: int = BLOCK_SIZE,
+                  workers: Optional[int] = None,
+                  context_tables: int = CONTEXT_TABLES):
     """
     Compresses the contents of a file and outputs to a file
     with extension ".hac"
 
     e.g. some_file.ext --- compressed to --> some_file.ext.hac
 
+    Files larger than STREAM_THRESHOLD bytes, and files compressed with
+    several workers, are compressed in chunks with bounded memory (see
+    compress_stream).
+
     :param inp_file: input file to compress
     :param verbose: set to True for printing console outputs
+    :param fmt: compressed data format (see compress_bytes)
+    :param max_code_len: maximum code bit-length (see compress_bytes)
+    :param buffer_size: number of bytes read at a time when streaming
+    :param stream: True to always stream, False to never stream,
+                   None to stream files larger than STREAM_THRESHOLD
+    :param block_size: original size of the blocks (see compress_bytes)
+    :param workers: number of worker processes (see compress_bytes)
+    :param context_tables: maximum number of code tables (see
+                           compress_bytes)
     :return: name of the compressed output file
     """
+    fmt = check_workers(fmt, workers)
+    outfile = f"{inp_file}.hac"
+    if stream is None:
+        stream = os.path.getsize(inp_file) > STREAM_THRESHOLD or \
+            (workers is not None and workers > 1)
+    if stream:
+        return compress_stream(inp_file, outfile, verbose=verbose, fmt=fmt,
+                               max_code_len=max_code_len,
+                               buffer_size=buffer_size,
+                               block_size=block_size, workers=workers,
+                               context_tables=context_tables)
     with open(inp_file, "rb") as f:
         inp_str: bytes = f.read()
-    comp_str = compress_bytes(inp_str, verbose=verbose)
-    outfile = f"{inp_file}.hac"
+    comp_str = compress_bytes(inp_str, verbose=verbose, fmt=fmt,
+                              max_code_len=max_code_len,
+                              block_size=block_size, workers=workers,
+                              context_tables=context_tables)
     with open(outfile, "wb") as f:
         f.write(comp_str)
     return outfile
 
 
 def compress(inp: str, verbose: bool = False,
-             mode: Mode = Mode.DEFAULT) -> Union[str, bytearray]:
+             mode: Mode = Mode.DEFAULT,
+             fmt: Optional[Format] = None,
+             max_code_len: Optional[int] = None,
+             buffer_size: int = BUFFER_SIZE,
+             block_size: int = BLOCK_SIZE,
+             workers: Optional[int] = None,
+             context_tables: int = CONTEXT_TABLES) -> Union[str, bytearray]:
     """
     Generic compression function taking in input either filename or
     string to compress.
@@ -205,10 +1008,150 @@ def compress(inp: str, verbose: bool = False,
                                  compress string text
                 Mode.FILE    --> compress file
                 Mode.RAW     --> compress string text
+    :param fmt: compressed data format (see compress_bytes)
+    :param max_code_len: maximum code bit-length (see compress_bytes)
+    :param buffer_size: number of bytes read at a time when compressing
+                        large files (see compress_file)
+    :param block_size: original size of the blocks (see compress_bytes)
+    :param workers: number of worker processes compressing blocks in
+                    parallel (see compress_bytes)
+    :param context_tables: maximum number of code tables (see
+                           compress_bytes)
     :return: if compressed file, return compressed output filename. otherwise,
              return bytearray compressed data
     """
     if (mode is not Mode.RAW) and os.path.exists(inp):
-        return compress_file(inp, verbose=verbose)
+        return compress_file(inp, verbose=verbose, fmt=fmt,
+                             max_code_len=max_code_len,
+                             buffer_size=buffer_size, block_size=block_size,
+                             workers=workers, context_tables=context_tables)
     else:
-        return compress_string(inp, verbose=verbose)
+        return compress_string(inp, verbose=verbose, fmt=fmt,
+                               max_code_len=max_code_len,
+                               block_size=block_size, workers=workers,
+                               context_tables=context_tables)
+
+
+class Compressor(object):
+    """
+    Incremental compressor in the blocks format, for data arriving in
+    chunks (e.g. from a socket or a pipe), like zlib's compressobj. Input is
+    buffered only until a whole block is available: every full block is
+    compressed and returned by the call that completes it. The output of
+    all calls joined is the same as compress_bytes of all the input in the
+    blocks format (when not flushed before the end).
+
+    ...
+
+    Attributes
+    ----------
+    block_size : int
+        original size of the blocks
+    max_code_len : Optional[int]
+        maximum code bit-length (see compress_bytes)
+    buf : bytearray
+        input not compressed yet (less than a block)
+    writer : BlocksWriter
+        blocks format state
+    started : bool
+        True once the header is returned
+    finished : bool
+        True once the end marker and index are returned
+
+    Methods
+    -------
+    compress(data):
+        Compresses a chunk of input, returning the blocks completed by it
+    flush(finish):
+        Compresses the buffered input, and ends the data if finish is True
+    """
+
+    def __init__(self, block_size: int = BLOCK_SIZE,
+                 max_code_len: Optional[int] = None):
+        """
+        __init__(self, block_size: int = BLOCK_SIZE,
+                 max_code_len: Optional[int] = None):
+
+        Constructs Compressor
+
+        :param block_size: original size of the blocks
+        :param max_code_len: maximum code bit-length (see compress_bytes)
+        """
+        if block_size < 1:
+            raise ValueError(f"Invalid block size {block_size}")
+        self.block_size = block_size
+        self.max_code_len = max_code_len
+        self.buf = bytearray()
+        self.writer = BlocksWriter()
+        self.started = False
+        self.finished = False
+
+    def start(self, out: bytearray):
+        """
+        start(self, out: bytearray):
+
+        Appends the header to the output on the first call
+
+        :param out: output of the current call
+        """
+        if self.finished:
+            raise ValueError("Compressor already flushed with finish=True")
+        if not self.started:
+            out += self.writer.header(self.block_size)
+            self.started = True
+
+    def pack(self, block: ByteChunk, out: bytearray):
+        """
+        pack(self, block: ByteChunk, out: bytearray):
+
+        Compresses a block and appends its header and bitstream to the
+        output
+
+        :param block: block of input data (not empty)
+        :param out: output of the current call
+        """
+        raw_size, lengths, payload = compress_block(block, self.max_code_len)
+        out += self.writer.block_header(raw_size, lengths, len(payload))
+        out += payload
+
+    def compress(self, data: ByteChunk) -> bytes:
+        """
+        compress(self, data: ByteChunk) -> bytes:
+
+        Compresses a chunk of input data. Only whole blocks are compressed,
+        the rest of the input is kept until more data arrives or flush.
+
+        :param data: chunk of input data
+        :return: compressed data available so far (may be empty)
+        """
+        out = bytearray()
+        self.start(out)
+        self.buf += data
+        start = 0
+        while len(self.buf) - start >= self.block_size:
+            self.pack(self.buf[start: start + self.block_size], out)
+            start += self.block_size
+        del self.buf[:start]
+        return bytes(out)
+
+    def flush(self, finish: bool = True) -> bytes:
+        """
+        flush(self, finish: bool = True) -> bytes:
+
+        Compresses the buffered input as a (short) block. With finish, the
+        end marker and the block index follow and no more input can be
+        compressed; otherwise compression can carry on, e.g. after sending
+        a whole message down a socket.
+
+        :param finish: set to False to keep the data open
+        :return: compressed data
+        """
+        out = bytearray()
+        self.start(out)
+        if self.buf:
+            self.pack(self.buf, out)
+            self.buf = bytearray()
+        if finish:
+            out += self.writer.end()
+            self.finished = True
+        return bytes(out)
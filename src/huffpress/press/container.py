@@ -0,0 +1,744 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    container.py
+
+    Contains the binary framing shared by the compressed formats: the magic
+    header, variable length integers and the packed code-length table.
+
+    Framed data starts with the magic bytes "HAC" followed by one format
+    byte (see auxi.modes.Format). Data compressed before framing existed
+    starts with the padding count (1 to 8), so it can never be mistaken for
+    framed data.
+
+    JSON format:
+    -------
+    "HAC" | format | 4 byte map length | JSON Huffman map | padding count |
+    bitstream
+
+    The map length is big-endian, so the map and the bitstream are located
+    from the fixed size header alone. Data from before framing existed ends
+    with the map and its length instead (as radix-36 digits), and is located
+    by scanning back from the end.
+
+    Canonical format:
+    -------
+    "HAC" | format | varint number of terms | code-length table | bitstream
+
+    Blocks format:
+    -------
+    "HAC" | format | version | varint block size | block ... | end marker |
+    index | 8 byte index position | "HACI"
+
+    Block:
+    varint original size | table | varint compressed size | bitstream
+
+    Every block is encoded on its own with canonical codes, so each can be
+    decoded independently given its table: either 0 followed by the block's
+    own code-length table, or 1 to reuse the table of the previous block
+    with a table. The bitstream is zero padded to a whole byte, and holds
+    the original size number of terms. The end marker is a block of
+    original size 0 (the single byte 0).
+
+    Stored block (blocks that Huffman coding would expand):
+    varint original size | 2 | original data
+
+    The index (version 2) lets readers seek to any block without reading
+    the blocks before it: varint number of blocks, then for every block its
+    varint original size, varint size (header and bitstream) and varint
+    number of blocks back to the block holding its table (0 for its own,
+    or for a stored block).
+    It is located by the big-endian position in the fixed size trailer.
+    Version 1 data ends at the end marker.
+
+    Stored format:
+    -------
+    "HAC" | format | original data
+
+    Written instead of the other formats when they would not be smaller.
+
+    Codec format:
+    -------
+    "HAC" | format | 4 byte codec id | varint number of terms | bitstream
+
+    The code-length table is not stored: the codec with the given id
+    (press.codec) decodes the data.
+
+    Context format:
+    -------
+    "HAC" | format | varint number of terms | number of tables |
+    context map | code-length table ... | bitstream
+
+    Order-1 context codes (huff.hcontext): every term is coded with the
+    canonical codes of the table of its context, the term before it (0 for
+    the first term). The context map holds the table number of each of the
+    256 contexts in the fewest bits that fit the largest table number,
+    packed most significant bit first; a code-length table per table
+    follows.
+
+    Digram format:
+    -------
+    "HAC" | format | varint original size | wide code-length table |
+    trailing byte (odd original sizes only) | bitstream
+
+    The data is split into 2-byte symbols from its start, which are coded
+    with canonical codes; a trailing odd byte is kept in the header. The
+    bitstream holds original size // 2 symbols, zero padded.
+
+    Archive format:
+    -------
+    "HAC" | format | version | code-length tables and member data ... |
+    directory | 8 byte directory position | "HACA"
+
+    Many files (members) in one. The data of every member is either a
+    bitstream of its original size number of terms, coded with canonical
+    codes of one of the code-length tables and zero padded, or its original
+    data when coding would not make it smaller. A member coded with its own
+    table follows that table; a table shared by several members (solid
+    archives) precedes the first of them.
+
+    The central directory lists the tables and members, so that a single
+    member can be found and decoded without reading the others: varint
+    number of tables, varint position of every table, varint number of
+    members, then for every member its varint name length, UTF-8 name
+    ("/" separated), varint gap from the end of the previous member's data
+    (from the header for the first member) to its data, varint size and
+    varint original size of its data, and varint table number plus one (0
+    for a stored member).
+    It is located by the big-endian position in the fixed size trailer.
+
+    Dictionary file:
+    -------
+    "HACD" | version | code-length table
+
+    A trained codec saved to disk; its id is computed from the table.
+
+    Code-length table, first byte is the table kind:
+    0 - sparse: varint count, then (term, bit-length) byte pairs
+    1 - bitmap: 32 byte bitmap of present terms, then their bit-lengths
+        packed as nibbles (all bit-lengths <= 15)
+    2 - bitmap: 32 byte bitmap of present terms, then one byte per bit-length
+
+    Wide code-length table (2-byte symbols, 0 - 65535):
+    varint count | kind (1 nibbles, 2 bytes) | varint gap before every
+    symbol (from the symbol before it plus one, from 0 for the first) |
+    bit-lengths packed as nibbles (kind 1) or one byte each (kind 2)
+"""
+
+from typing import Dict, List, Optional, Tuple
+from huffpress.auxi.modes import Format
+from huffpress.huff.htypes import ArchiveMember
+
+MAGIC = b"HAC"
+
+MAP_LEN_BYTES = 4  # size of the JSON map length in the JSON format header
+JSON_HEADER_BYTES = len(MAGIC) + 1 + MAP_LEN_BYTES  # header before the map
+# canonical format header upper bound: header, 64 bit varint and the largest
+# code-length table (bitmap and a byte per term, sparse tables are smaller)
+CANONICAL_HEADER_BYTES = len(MAGIC) + 1 + 10 + 1 + 32 + 256
+STORED_HEADER_BYTES = len(MAGIC) + 1
+CODEC_ID_BYTES = 4
+CONTEXTS = 256  # context map entries, one per previous byte value
+MAX_CONTEXT_TABLES = 255  # tables of the context format (one byte count)
+DIGRAMS = 256 * 256  # 2-byte symbols of the digram format
+# digram format header upper bound: header, 64 bit varint, the largest wide
+# code-length table (varints of up to 3 bytes, a byte per bit-length) and
+# the trailing byte
+DIGRAM_HEADER_BYTES = len(MAGIC) + 1 + 10 + 10 + 1 + 4 * DIGRAMS + 1
+# context format header upper bound: header, 64 bit varint, table count,
+# the largest context map and code-length tables
+CONTEXT_HEADER_BYTES = len(MAGIC) + 1 + 10 + 1 + CONTEXTS + \
+    MAX_CONTEXT_TABLES * (1 + 32 + 256)
+DICT_MAGIC = b"HACD"
+DICT_VERSION = 1
+
+BLOCKS_VERSION = 2  # 1: no index
+BLOCK_TABLE_OWN = 0  # block table: own code-length table follows
+BLOCK_TABLE_PREVIOUS = 1  # block table: reuse the previous block's table
+BLOCK_TABLE_STORED = 2  # block table: none, the original data follows
+BLOCKS_END = b"\x00"  # end marker: block of original size 0
+# block header upper bound: two 64 bit varints, table byte and table
+BLOCK_HEADER_BYTES = 10 + 1 + 1 + 32 + 256 + 10
+INDEX_MAGIC = b"HACI"
+INDEX_POS_BYTES = 8
+INDEX_TRAILER_BYTES = INDEX_POS_BYTES + len(INDEX_MAGIC)
+ARCHIVE_VERSION = 1
+ARCHIVE_HEADER_BYTES = len(MAGIC) + 2
+ARCHIVE_MAGIC = b"HACA"  # archive trailer, as long as INDEX_MAGIC
+CODE_LENGTHS_BYTES = 1 + 32 + 256  # code-length table upper bound
+
+TABLE_SPARSE = 0
+TABLE_NIBBLES = 1
+TABLE_BYTES = 2
+
+
+def pack_varint(value: int) -> bytes:
+    """
+    Packs a non-negative integer 7 bits at a time, least significant first,
+    with the high bit set on every byte except the last (LEB128)
+
+    :param value: non-negative integer
+    :return: packed bytes (1 byte for values below 128)
+    """
+    res = bytearray()
+    while value > 0x7F:
+        res.append((value & 0x7F) | 0x80)
+        value >>= 7
+    res.append(value)
+    return bytes(res)
+
+
+def unpack_varint(buf: bytes, pos: int = 0) -> Tuple[int, int]:
+    """
+    Unpacks an integer packed by pack_varint
+
+    :param buf: input bytes
+    :param pos: position of the first byte of the varint
+    :return: (value, position after the varint)
+    """
+    value = 0
+    shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def pack_header(fmt: Format) -> bytes:
+    """
+    Magic bytes and format byte starting all framed data
+
+    :param fmt: compressed data format
+    :return: 4 header bytes
+    """
+    return MAGIC + bytes([fmt.value])
+
+
+def read_format(buf: bytes) -> Optional[Format]:
+    """
+    Reads the format of compressed data from its header
+
+    :param buf: compressed data
+    :return: Format, or None for data without a header (original format)
+    """
+    if len(buf) < len(MAGIC) + 1 or bytes(buf[:len(MAGIC)]) != MAGIC:
+        return None
+    return Format(buf[len(MAGIC)])
+
+
+def pack_json_header(map_bytes: bytes) -> bytes:
+    """
+    Header of the JSON format: magic bytes, format byte, the map length and
+    the JSON Huffman map itself
+
+    :param map_bytes: JSON Huffman map
+    :return: header bytes
+    """
+    return pack_header(Format.JSON) + \
+        len(map_bytes).to_bytes(MAP_LEN_BYTES, "big") + map_bytes
+
+
+def unpack_json_header(buf: bytes,
+                       size: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Locates the JSON Huffman map from the JSON format header
+
+    :param buf: compressed data in the JSON format (at least the first
+                JSON_HEADER_BYTES bytes)
+    :param size: size of the whole compressed data (default len(buf))
+    :return: (position of the map, position after the map)
+    """
+    pos = len(MAGIC) + 1
+    map_len = int.from_bytes(buf[pos: pos + MAP_LEN_BYTES], "big")
+    pos += MAP_LEN_BYTES
+    if pos + map_len > (len(buf) if size is None else size):
+        raise ValueError("Truncated JSON format header")
+    return pos, pos + map_len
+
+
+def pack_codec_header(codec_id: int, num_terms: int) -> bytes:
+    """
+    Header of the codec format: magic bytes, format byte, the codec id and
+    the number of encoded terms
+
+    :param codec_id: id of the codec
+    :param num_terms: number of terms (bytes) in the original data
+    :return: header bytes
+    """
+    return pack_header(Format.CODEC) + \
+        codec_id.to_bytes(CODEC_ID_BYTES, "big") + pack_varint(num_terms)
+
+
+def unpack_codec_header(buf: bytes) -> Tuple[int, int, int]:
+    """
+    Unpacks the header of the codec format
+
+    :param buf: compressed data in the codec format
+    :return: (codec id, number of terms, position of the bitstream)
+    """
+    pos = len(MAGIC) + 1
+    codec_id = int.from_bytes(buf[pos: pos + CODEC_ID_BYTES], "big")
+    num_terms, pos = unpack_varint(buf, pos + CODEC_ID_BYTES)
+    return codec_id, num_terms, pos
+
+
+def pack_context_header(num_terms: int, context_map: List[int],
+                        tables: List[Dict[int, int]]) -> bytes:
+    """
+    Header of the context format: magic bytes, format byte, the number of
+    encoded terms, the number of tables, the context map and the
+    code-length table of every table
+
+    :param num_terms: number of terms (bytes) in the original data
+    :param context_map: table number of every context (256)
+    :param tables: code bit-lengths of every table
+    :return: header bytes
+    """
+    if not 1 <= len(tables) <= MAX_CONTEXT_TABLES:
+        raise ValueError(f"Invalid number of context tables {len(tables)}")
+    bits = (len(tables) - 1).bit_length()
+    packed = 0
+    for num in context_map:
+        packed = (packed << bits) | num
+    return pack_header(Format.CONTEXT) + pack_varint(num_terms) + \
+        bytes([len(tables)]) + packed.to_bytes(CONTEXTS * bits // 8, "big") + \
+        b"".join(pack_code_lengths(lengths) for lengths in tables)
+
+
+def unpack_context_header(buf: bytes) -> Tuple[int, List[int],
+                                               List[Dict[int, int]], int]:
+    """
+    Unpacks the header of the context format
+
+    :param buf: compressed data in the context format (at least its header)
+    :return: (number of terms, table number of every context, code
+              bit-lengths of every table, position of the bitstream)
+    """
+    num_terms, pos = unpack_varint(buf, len(MAGIC) + 1)
+    num_tables = buf[pos]
+    if not num_tables:
+        raise ValueError("Context format without tables")
+    bits = (num_tables - 1).bit_length()
+    size = CONTEXTS * bits // 8
+    packed = int.from_bytes(buf[pos + 1: pos + 1 + size], "big")
+    mask = (1 << bits) - 1
+    context_map = [(packed >> (bits * (CONTEXTS - 1 - ctx))) & mask
+                   for ctx in range(CONTEXTS)]
+    if max(context_map) >= num_tables:
+        raise ValueError("Context map refers to a missing table")
+    pos += 1 + size
+    tables: List[Dict[int, int]] = []
+    for _ in range(num_tables):
+        lengths, pos = unpack_code_lengths(buf, pos)
+        tables.append(lengths)
+    return num_terms, context_map, tables, pos
+
+
+def pack_archive_header() -> bytes:
+    """
+    Header of the archive format: magic bytes, format byte and version
+
+    :return: header bytes
+    """
+    return pack_header(Format.ARCHIVE) + bytes([ARCHIVE_VERSION])
+
+
+def unpack_archive_header(buf: bytes) -> int:
+    """
+    Checks the header of the archive format
+
+    :param buf: archive data (at least ARCHIVE_HEADER_BYTES bytes)
+    :return: position after the header
+    """
+    if read_format(buf) is not Format.ARCHIVE:
+        raise ValueError("Not an archive")
+    if buf[len(MAGIC) + 1] != ARCHIVE_VERSION:
+        raise ValueError(f"Unsupported archive version "
+                         f"{buf[len(MAGIC) + 1]}")
+    return ARCHIVE_HEADER_BYTES
+
+
+def pack_archive_directory(tables: List[int], members: List[ArchiveMember],
+                           directory_pos: int) -> bytes:
+    """
+    Packs the central directory of an archive and the trailer locating it
+
+    :param tables: position of every code-length table
+    :param members: directory entry of every member, in the order of their
+                    data
+    :param directory_pos: position of the directory in the archive
+    :return: directory and trailer bytes
+    """
+    res = bytearray(pack_varint(len(tables)))
+    for pos in tables:
+        res += pack_varint(pos)
+    res += pack_varint(len(members))
+    end = ARCHIVE_HEADER_BYTES
+    for member in members:
+        name: bytes = member.name.encode("utf-8")
+        res += pack_varint(len(name)) + name + \
+            pack_varint(member.pos - end) + \
+            pack_varint(member.comp_size) + pack_varint(member.size) + \
+            pack_varint(0 if member.table is None else member.table + 1)
+        end = member.pos + member.comp_size
+    return bytes(res) + directory_pos.to_bytes(INDEX_POS_BYTES, "big") + \
+        ARCHIVE_MAGIC
+
+
+def unpack_archive_directory(buf: bytes, pos: int = 0
+                             ) -> Tuple[List[int], List[ArchiveMember]]:
+    """
+    Unpacks a central directory packed by pack_archive_directory
+
+    :param buf: input bytes
+    :param pos: position of the directory
+    :return: (position of every code-length table, directory entry of
+             every member)
+    """
+    num_tables, pos = unpack_varint(buf, pos)
+    tables: List[int] = []
+    for _ in range(num_tables):
+        table_pos, pos = unpack_varint(buf, pos)
+        tables.append(table_pos)
+    num_members, pos = unpack_varint(buf, pos)
+    members: List[ArchiveMember] = []
+    end = ARCHIVE_HEADER_BYTES
+    for _ in range(num_members):
+        name_len, pos = unpack_varint(buf, pos)
+        name: str = bytes(buf[pos: pos + name_len]).decode("utf-8")
+        gap, pos = unpack_varint(buf, pos + name_len)
+        comp_size, pos = unpack_varint(buf, pos)
+        size, pos = unpack_varint(buf, pos)
+        table, pos = unpack_varint(buf, pos)
+        if table > num_tables:
+            raise ValueError(f"Member {name} refers to a missing table")
+        members.append(ArchiveMember(name=name, pos=end + gap,
+                                     comp_size=comp_size, size=size,
+                                     table=table - 1 if table else None))
+        end += gap + comp_size
+    return tables, members
+
+
+def pack_dictionary(lengths: Dict[int, int]) -> bytes:
+    """
+    Packs the contents of a dictionary file
+
+    :param lengths: code bit-lengths of the dictionary
+    :return: dictionary file bytes
+    """
+    return DICT_MAGIC + bytes([DICT_VERSION]) + pack_code_lengths(lengths)
+
+
+def unpack_dictionary(buf: bytes) -> Dict[int, int]:
+    """
+    Unpacks the contents of a dictionary file packed by pack_dictionary
+
+    :param buf: dictionary file bytes
+    :return: code bit-lengths of the dictionary
+    """
+    if bytes(buf[:len(DICT_MAGIC)]) != DICT_MAGIC:
+        raise ValueError("Not a dictionary file")
+    pos = len(DICT_MAGIC)
+    if buf[pos] != DICT_VERSION:
+        raise ValueError(f"Unsupported dictionary version {buf[pos]}")
+    lengths, _ = unpack_code_lengths(buf, pos + 1)
+    return lengths
+
+
+def pack_code_lengths(lengths: Dict[int, int]) -> bytes:
+    """
+    Packs the code bit-lengths of byte terms (0 - 255) into the smallest of
+    the three code-length table kinds
+
+    :param lengths: dictionary of terms and their code bit-lengths
+    :return: packed code-length table
+    """
+    terms = sorted(lengths)
+
+    sparse = bytearray([TABLE_SPARSE]) + pack_varint(len(terms))
+    for term in terms:
+        sparse += bytes([term, lengths[term]])
+
+    bitmap = bytearray(32)
+    for term in terms:
+        bitmap[term >> 3] |= 0x80 >> (term & 7)
+
+    if all(lengths[term] <= 15 for term in terms):
+        nibbles = bytearray([TABLE_NIBBLES]) + bitmap
+        for i in range(0, len(terms), 2):
+            high = lengths[terms[i]]
+            low = lengths[terms[i + 1]] if i + 1 < len(terms) else 0
+            nibbles.append((high << 4) | low)
+        dense = nibbles
+    else:
+        dense = bytearray([TABLE_BYTES]) + bitmap + \
+            bytes(lengths[term] for term in terms)
+
+    return bytes(sparse if len(sparse) <= len(dense) else dense)
+
+
+def unpack_code_lengths(buf: bytes,
+                        pos: int = 0) -> Tuple[Dict[int, int], int]:
+    """
+    Unpacks a code-length table packed by pack_code_lengths
+
+    :param buf: input bytes
+    :param pos: position of the table kind byte
+    :return: (dictionary of terms and their code bit-lengths,
+              position after the table)
+    """
+    kind = buf[pos]
+    pos += 1
+    if kind == TABLE_SPARSE:
+        count, pos = unpack_varint(buf, pos)
+        lengths = {buf[pos + 2 * i]: buf[pos + 2 * i + 1]
+                   for i in range(count)}
+        return lengths, pos + 2 * count
+
+    bitmap = buf[pos: pos + 32]
+    pos += 32
+    terms = [term for term in range(256)
+             if bitmap[term >> 3] & (0x80 >> (term & 7))]
+    if kind == TABLE_NIBBLES:
+        lengths = {}
+        for i, term in enumerate(terms):
+            byte = buf[pos + (i >> 1)]
+            lengths[term] = (byte & 0x0F) if i & 1 else (byte >> 4)
+        return lengths, pos + (len(terms) + 1) // 2
+    elif kind == TABLE_BYTES:
+        lengths = {term: buf[pos + i] for i, term in enumerate(terms)}
+        return lengths, pos + len(terms)
+    else:
+        raise ValueError(f"Unknown code-length table kind {kind}")
+
+
+def pack_wide_code_lengths(lengths: Dict[int, int]) -> bytes:
+    """
+    Packs the code bit-lengths of 2-byte symbols (0 - 65535) into a wide
+    code-length table: the symbols as gaps between them, then their
+    bit-lengths
+
+    :param lengths: dictionary of symbols and their code bit-lengths
+    :return: packed wide code-length table
+    """
+    symbols = sorted(lengths)
+    nibbles = all(lengths[symbol] <= 15 for symbol in symbols)
+    res = bytearray(pack_varint(len(symbols)))
+    res.append(TABLE_NIBBLES if nibbles else TABLE_BYTES)
+    prev = -1
+    for symbol in symbols:
+        res += pack_varint(symbol - prev - 1)
+        prev = symbol
+    if nibbles:
+        for i in range(0, len(symbols), 2):
+            high = lengths[symbols[i]]
+            low = lengths[symbols[i + 1]] if i + 1 < len(symbols) else 0
+            res.append((high << 4) | low)
+    else:
+        res += bytes(lengths[symbol] for symbol in symbols)
+    return bytes(res)
+
+
+def unpack_wide_code_lengths(buf: bytes,
+                             pos: int = 0) -> Tuple[Dict[int, int], int]:
+    """
+    Unpacks a wide code-length table packed by pack_wide_code_lengths
+
+    :param buf: input bytes
+    :param pos: position of the table
+    :return: (dictionary of symbols and their code bit-lengths, position
+              after the table)
+    """
+    count, pos = unpack_varint(buf, pos)
+    kind = buf[pos]
+    if kind not in (TABLE_NIBBLES, TABLE_BYTES):
+        raise ValueError(f"Unknown wide code-length table kind {kind}")
+    pos += 1
+    symbols: List[int] = []
+    prev = -1
+    for _ in range(count):
+        gap, pos = unpack_varint(buf, pos)
+        prev += gap + 1
+        symbols.append(prev)
+    if symbols and symbols[-1] >= DIGRAMS:
+        raise ValueError(f"Symbol {symbols[-1]} out of range")
+    lengths: Dict[int, int] = {}
+    if kind == TABLE_NIBBLES:
+        for i, symbol in enumerate(symbols):
+            byte = buf[pos + i // 2]
+            lengths[symbol] = byte & 0xF if i & 1 else byte >> 4
+        pos += (count + 1) // 2
+    else:
+        for i, symbol in enumerate(symbols):
+            lengths[symbol] = buf[pos + i]
+        pos += count
+    return lengths, pos
+
+
+def pack_digram_header(size: int, lengths: Dict[int, int],
+                       tail: bytes) -> bytes:
+    """
+    Header of the digram format: magic bytes, format byte, the original
+    size, the wide code-length table and the trailing odd byte
+
+    :param size: original size
+    :param lengths: code bit-lengths of the 2-byte symbols
+    :param tail: trailing byte of an odd original size (empty otherwise)
+    :return: header bytes
+    """
+    return pack_header(Format.DIGRAM) + pack_varint(size) + \
+        pack_wide_code_lengths(lengths) + tail
+
+
+def unpack_digram_header(buf: bytes) -> Tuple[int, Dict[int, int], bytes,
+                                              int]:
+    """
+    Unpacks the header of the digram format
+
+    :param buf: compressed data in the digram format (at least its header)
+    :return: (original size, code bit-lengths of the 2-byte symbols,
+              trailing odd byte, position of the bitstream)
+    """
+    size, pos = unpack_varint(buf, len(MAGIC) + 1)
+    lengths, pos = unpack_wide_code_lengths(buf, pos)
+    if len(buf) < pos + (size & 1):
+        raise IndexError("digram header is truncated before its tail byte")
+    tail = bytes(buf[pos: pos + (size & 1)])
+    return size, lengths, tail, pos + len(tail)
+
+
+def pack_blocks_header(block_size: int) -> bytes:
+    """
+    Header of the blocks format: magic bytes, format byte, version and the
+    (maximum) original size of the blocks
+
+    :param block_size: original size of every block but the last
+    :return: header bytes
+    """
+    return pack_header(Format.BLOCKS) + bytes([BLOCKS_VERSION]) + \
+        pack_varint(block_size)
+
+
+def unpack_blocks_header(buf: bytes) -> Tuple[int, int]:
+    """
+    Unpacks the header of the blocks format
+
+    :param buf: compressed data in the blocks format
+    :return: (block size, position of the first block)
+    """
+    pos = len(MAGIC) + 1
+    if not 1 <= buf[pos] <= BLOCKS_VERSION:
+        raise ValueError(f"Unsupported blocks format version {buf[pos]}")
+    return unpack_varint(buf, pos + 1)
+
+
+def pack_block_header(raw_size: int, lengths: Dict[int, int],
+                      comp_size: int,
+                      prev_lengths: Optional[Dict[int, int]] = None) -> bytes:
+    """
+    Packs the header of a block, referring to the previous block's table if
+    it has the same code bit-lengths
+
+    :param raw_size: original size of the block
+    :param lengths: dictionary of terms and their code bit-lengths (empty
+                    for a stored block, followed by the original data)
+    :param comp_size: size of the block's bitstream
+    :param prev_lengths: code bit-lengths of the previous block with a
+                         table (if any)
+    :return: block header bytes
+    """
+    if not lengths:
+        return pack_varint(raw_size) + bytes([BLOCK_TABLE_STORED])
+    if lengths == prev_lengths:
+        table = bytes([BLOCK_TABLE_PREVIOUS])
+    else:
+        table = bytes([BLOCK_TABLE_OWN]) + pack_code_lengths(lengths)
+    return pack_varint(raw_size) + table + pack_varint(comp_size)
+
+
+def unpack_block_header(buf: bytes, pos: int = 0
+                        ) -> Tuple[int, Optional[Dict[int, int]], int, int]:
+    """
+    Unpacks a block header packed by pack_block_header (or the end marker)
+
+    :param buf: input bytes
+    :param pos: position of the block
+    :return: (original size (0 for the end marker), dictionary of terms and
+              their code bit-lengths (None to reuse the previous block's,
+              empty for a stored block), size of the bitstream (the
+              original data of a stored block), position of the bitstream)
+    """
+    raw_size, pos = unpack_varint(buf, pos)
+    if not raw_size:
+        return 0, None, 0, pos
+    kind = buf[pos]
+    lengths: Optional[Dict[int, int]] = None
+    if kind == BLOCK_TABLE_STORED:
+        return raw_size, {}, raw_size, pos + 1
+    if kind == BLOCK_TABLE_OWN:
+        lengths, pos = unpack_code_lengths(buf, pos + 1)
+    elif kind == BLOCK_TABLE_PREVIOUS:
+        pos += 1
+    else:
+        raise ValueError(f"Unknown block table kind {kind}")
+    comp_size, pos = unpack_varint(buf, pos)
+    return raw_size, lengths, comp_size, pos
+
+
+def pack_block_index(entries: List[Tuple[int, int, int]],
+                     index_pos: int) -> bytes:
+    """
+    Packs the block index and the trailer locating it
+
+    :param entries: (original size, size, number of blocks back to the
+                    block holding its table) of every block
+    :param index_pos: position of the index in the data
+    :return: index and trailer bytes
+    """
+    res = bytearray(pack_varint(len(entries)))
+    for entry in entries:
+        for value in entry:
+            res += pack_varint(value)
+    return bytes(res) + index_pos.to_bytes(INDEX_POS_BYTES, "big") + \
+        INDEX_MAGIC
+
+
+def read_index_trailer(trailer: bytes,
+                       magic: bytes = INDEX_MAGIC) -> Optional[int]:
+    """
+    Reads the position of the block index (or the archive directory) from
+    the trailer
+
+    :param trailer: last INDEX_TRAILER_BYTES bytes of the data
+    :param magic: magic bytes ending the trailer (ARCHIVE_MAGIC for the
+                  archive directory)
+    :return: index position, or None if there is no index
+    """
+    if len(trailer) < INDEX_TRAILER_BYTES or \
+            bytes(trailer[-len(magic):]) != magic:
+        return None
+    return int.from_bytes(trailer[-INDEX_TRAILER_BYTES: -len(magic)],
+                          "big")
+
+
+def unpack_block_index(buf: bytes, pos: int = 0
+                       ) -> Tuple[List[Tuple[int, int, int]], int]:
+    """
+    Unpacks a block index packed by pack_block_index
+
+    :param buf: input bytes
+    :param pos: position of the index
+    :return: ((original size, size, number of blocks back to the block
+             holding its table) of every block, position after the index)
+    """
+    count, pos = unpack_varint(buf, pos)
+    entries: List[Tuple[int, int, int]] = []
+    for _ in range(count):
+        raw_size, pos = unpack_varint(buf, pos)
+        size, pos = unpack_varint(buf, pos)
+        table, pos = unpack_varint(buf, pos)
+        entries.append((raw_size, size, table))
+    return entries, pos
@@ -8,10 +8,48 @@
     characters to the original characters.
 """
 import json
+import os
 from tqdm import tqdm  # type: ignore
-from typing import Tuple, Optional, Union
-from huffpress.auxi.basen import to_basen, to_dec, basen
-from huffpress.huff.htypes import HuffCode
+from typing import (
+    BinaryIO, Callable, Dict, Iterable, Iterator, List, Tuple, Optional,
+    Union, TYPE_CHECKING
+    )
+from huffpress.auxi.basen import to_dec, basen
+from huffpress.auxi.bitio import (
+    BitReader, FileBitReader, ByteData, read_chunks
+    )
+from huffpress.auxi.modes import Format
+from huffpress.huff.hdecode import build_decode_table, decode_bits, \
+    decode_reader, decode_context_reader, ChunkDecoder
+from huffpress.huff.hfunctions import canonical_decode_table, code_to_table
+from huffpress.huff.htypes import HuffCode, DecodeTable
+from huffpress.press.container import (
+    MAGIC, read_format, unpack_varint, unpack_code_lengths,
+    unpack_json_header, CANONICAL_HEADER_BYTES, STORED_HEADER_BYTES,
+    unpack_blocks_header,
+    unpack_block_header, BLOCK_HEADER_BYTES, INDEX_TRAILER_BYTES,
+    read_index_trailer, unpack_block_index, unpack_context_header,
+    unpack_digram_header, CONTEXT_HEADER_BYTES, DIGRAM_HEADER_BYTES
+    )
+from huffpress.press.compress import BUFFER_SIZE, STREAM_THRESHOLD
+from huffpress.press.parallel import (
+    Task, map_slices, share_bytes, share_output, write_output
+    )
+
+if TYPE_CHECKING:
+    from huffpress.press.codec import Codec
+
+TAIL_BYTES = 1 << 16  # bytes read from the end of a file to find the map
+
+# block of the blocks format: (original size, code bit-lengths or None to
+# reuse the previous block's or empty for a stored block, bitstream)
+Block = Tuple[int, Optional[Dict[int, int]], Union[bytes, memoryview]]
+# block found by scan_blocks: (position of the bitstream, size of the
+# bitstream, original size, code bit-lengths)
+BlockInfo = Tuple[int, int, int, Dict[int, int]]
+# block index entry: (position of the block, original offset, original size,
+# number of the block holding its table)
+IndexEntry = Tuple[int, int, int, int]
 
 
 def reverse_final_sequence(bstr: bytes, verbose: bool = False) -> str:
@@ -27,26 +65,19 @@ def reverse_final_sequence(bstr: bytes, verbose: bool = False) -> str:
     """
     if verbose:
         print("Reversing final sequence")
-    data = list(bstr)
-    rem = data[0]
-    data = data[1:]
-    fbin = ""
-    for dec in tqdm(data, disable=not verbose):
-        dbin = to_basen(dec)
-        vbin = "".join(list(map(str, dbin))).rjust(8, "0")
-        fbin += vbin
-    fbin = fbin[:-rem]
-    return fbin
+    reader = BitReader.legacy(bstr)
+    num_bits = reader.bits_left
+    return format(reader.read(num_bits), f"0{num_bits}b") if num_bits else ""
 
 
 def reverse_huff_sequence(huff_map: HuffCode, seq: str,
                           verbose: bool = False) -> bytearray:
     """
     Reverse the input binary string Huffman encoded sequence --> back to the
-    original characters. This is done by traversing through the sequence in
-    order and identifying any of the Huffman encoded sequence from the
-    given (huff) Huffman map. Since all encodings are unique at any length,
-    we can replace in this forward travelling manner.
+    original characters. Since all encodings are unique at any length (prefix
+    free), the sequence can be decoded front to back: a lookup table built
+    from the Huffman map resolves the next DECODE_BITS bits into one or more
+    characters at a time (see huff.hdecode).
 
     :param huff_map: Huffman map containing the binary encodings to original
                  character
@@ -56,22 +87,37 @@ def reverse_huff_sequence(huff_map: HuffCode, seq: str,
     """
     if verbose:
         print("Reversing Huffman sequence")
-    term = ""
-    res = []
-    huff_trn = {v: k for k, v in huff_map.data.items()}
-    for sq in tqdm(seq, disable=not verbose):
-        term += sq
-        val = huff_trn.get(term)  # TODO: Huff-Squared here
-        if val is not None:
-            res.append(val)
-            term = ""
-    return bytearray(res)
+    dtable: DecodeTable = build_decode_table(code_to_table(huff_map))
+    num_bits = len(seq)
+    data = int(seq.ljust(-(-num_bits // 8) * 8, "0") or "0", 2) \
+        .to_bytes((num_bits + 7) // 8, "big")
+    return decode_bits(dtable, data, num_bits)
+
+
+def unpack_huff_map(map_bytes: bytes) -> HuffCode:
+    """
+    Unpacks a JSON Huffman map packed by compress.pack_huff_map
+
+    :param map_bytes: JSON Huffman map bytes
+    :return: Huffman map dictionary
+    """
+    huff_map = {int(k): v for k, v in json.loads(bytes(map_bytes)).items()}
+
+    # convert huff_map values from radix-36 to binary (base-2)
+    # and remove leading "1", which was added to handle encoded
+    # sequences starting with 0. e.g. 4 --> 100 --> 00
+    huff_map = {k: basen(v, 36, 2, True)[1:] for k, v in huff_map.items()}
+
+    return HuffCode(data=huff_map)
 
 
 def extract_huff_map(inp_bytes: bytes,
                      verbose: bool = False) -> Tuple[HuffCode, int]:
     """
-    Extract Huffman encoding dictionary map from the input data.
+    Extract Huffman encoding dictionary map from the end of input data
+    without a header (the layout from before the JSON format header), by
+    scanning back from the end over the radix-36 length digits to the end of
+    the map. Only the map itself is copied.
 
     :param inp_bytes: input sequence of bytes containing compressed data
                       and Huffman map
@@ -80,30 +126,378 @@ def extract_huff_map(inp_bytes: bytes,
     """
     if verbose:
         print("Extracting Huffman Tree")
-    rev_str = list(inp_bytes)
-    rev_str.reverse()
-    rev_bytes = bytearray(rev_str)
-    huff_len_bytes = []
-    for r in rev_bytes:
-        if r == ord('}'):
-            break
-        huff_len_bytes.append(r)
-    huff_len_bytes.reverse()
-    huff_len = to_dec(list(map(lambda x: chr(x), huff_len_bytes)), 36)
-    len_of_len = len(huff_len_bytes)
-    huff_dic_str = inp_bytes[-(huff_len + len_of_len): -len_of_len]
-    huff_map = {int(k): v
-                for k, v in json.loads(bytearray(huff_dic_str)).items()}
+    view = memoryview(inp_bytes)
+    map_end = len(view)
+    while map_end > 0 and view[map_end - 1] != ord('}'):
+        map_end -= 1
+    if not map_end:
+        raise ValueError("Huffman map not found")
+    len_of_len = len(view) - map_end
+    huff_len = to_dec([chr(x) for x in view[map_end:]], 36)
+    huff_map = unpack_huff_map(view[map_end - huff_len: map_end])
+    return huff_map, len_of_len + huff_len
 
-    # convert huff_map values from radix-36 to binary (base-2)
-    # and remove leading "1", which was added to handle encoded
-    # sequences starting with 0. e.g. 4 --> 100 --> 00
-    huff_map = {k: basen(v, 36, 2, True)[1:] for k, v in huff_map.items()}
 
-    return HuffCode(data=huff_map), len_of_len + len(huff_dic_str)
+def read_huff_map(inp_bytes: bytes,
+                  verbose: bool = False) -> Tuple[HuffCode, memoryview]:
+    """
+    Reads the Huffman map of data in the JSON format, located from the
+    header, or from the end of data without a header
+
+    :param inp_bytes: compressed data
+    :param verbose: set to True for printing console outputs
+    :return: Huffman map dictionary and a view of the compressed sequence
+             (led by its padding-count byte)
+    """
+    view = memoryview(inp_bytes)
+    if read_format(inp_bytes) is None:
+        huff_map, rem = extract_huff_map(inp_bytes, verbose=verbose)
+        return huff_map, view[:len(view) - rem]
+    if verbose:
+        print("Reading Huffman Tree")
+    map_start, map_end = unpack_json_header(inp_bytes)
+    return unpack_huff_map(view[map_start: map_end]), view[map_end:]
+
+
+def decompress_canonical(inp_bytes: bytes, verbose=False) -> bytearray:
+    """
+    Decompress canonical Huffman data: rebuild the canonical codes from the
+    code bit-lengths in the header, then decode the number of terms given in
+    the header (the trailing bits are only padding).
+
+    :param inp_bytes: Input data in the canonical format
+    :param verbose: set to True for printing console outputs
+    :return: decompressed bytearray data
+    """
+    if verbose:
+        print("Extracting code lengths")
+    num_terms, pos = unpack_varint(inp_bytes, len(MAGIC) + 1)
+    lengths, pos = unpack_code_lengths(inp_bytes, pos)
+    if verbose:
+        print("Decoding Huffman sequence")
+    res: bytearray = decode_reader(canonical_decode_table(lengths),
+                                   BitReader(inp_bytes, start=pos))
+    del res[num_terms:]
+    return res
+
+
+def context_tables(context_map: List[int],
+                   tables: List[Dict[int, int]]) -> List[DecodeTable]:
+    """
+    Decoding table of every context of the context format
+
+    :param context_map: table number of every context
+    :param tables: code bit-lengths of every table
+    :return: DecodeTable of every context (shared by the contexts of a
+             table)
+    """
+    dtables: List[DecodeTable] = [canonical_decode_table(lengths)
+                                  for lengths in tables]
+    return [dtables[num] for num in context_map]
+
+
+def decompress_context(inp_bytes: bytes, verbose=False) -> bytearray:
+    """
+    Decompress data in the context format: rebuild the canonical codes of
+    every table from the code bit-lengths in the header, then decode the
+    number of terms given in the header, every term with the table of its
+    context (see huff.hcontext).
+
+    :param inp_bytes: Input data in the context format
+    :param verbose: set to True for printing console outputs
+    :return: decompressed bytearray data
+    """
+    if verbose:
+        print("Extracting context map and code lengths")
+    num_terms, context_map, tables, pos = unpack_context_header(inp_bytes)
+    if verbose:
+        print("Decoding Huffman sequence")
+    return decode_context_reader(context_tables(context_map, tables),
+                                 BitReader(inp_bytes, start=pos), num_terms)
+
+
+def decompress_digram(inp_bytes: bytes, verbose=False) -> bytearray:
+    """
+    Decompress data in the digram format: rebuild the canonical codes of
+    the 2-byte symbols from the wide code-length table in the header, then
+    decode the symbols (two bytes each) and add the trailing odd byte.
+
+    :param inp_bytes: Input data in the digram format
+    :param verbose: set to True for printing console outputs
+    :return: decompressed bytearray data
+    """
+    if verbose:
+        print("Extracting code lengths")
+    size, lengths, tail, pos = unpack_digram_header(inp_bytes)
+    if verbose:
+        print("Decoding Huffman sequence")
+    res: bytearray = decode_reader(canonical_decode_table(lengths, width=2),
+                                   BitReader(inp_bytes, start=pos))
+    del res[size & ~1:]  # symbols decoded from padding bits
+    res += tail
+    return res
+
 
+def iter_blocks(inp_bytes: bytes) -> Iterator[Block]:
+    """
+    Iterates over the blocks of data in the blocks format
 
-def decompress_bytes(inp_bytes: bytes, verbose=False) -> bytearray:
+    :param inp_bytes: compressed data in the blocks format
+    :return: iterator of (original size, code bit-lengths or None to reuse
+             the previous block's, view of the bitstream)
+    """
+    view = memoryview(inp_bytes)
+    _, pos = unpack_blocks_header(view)
+    while True:
+        raw_size, lengths, comp_size, pos = unpack_block_header(view, pos)
+        if not raw_size:
+            return
+        yield raw_size, lengths, view[pos: pos + comp_size]
+        pos += comp_size
+
+
+def read_blocks(f: BinaryIO) -> Iterator[Block]:
+    """
+    Reads the blocks of a file in the blocks format one at a time
+
+    :param f: compressed file opened in binary mode
+    :return: iterator of (original size, code bit-lengths or None to reuse
+             the previous block's, bitstream)
+    """
+    f.seek(0)
+    _, pos = unpack_blocks_header(f.read(BLOCK_HEADER_BYTES))
+    while True:
+        f.seek(pos)
+        raw_size, lengths, comp_size, size = unpack_block_header(
+            f.read(BLOCK_HEADER_BYTES))
+        if not raw_size:
+            return
+        f.seek(pos + size)
+        payload: bytes = f.read(comp_size)
+        if len(payload) < comp_size:
+            raise EOFError("Truncated block")
+        yield raw_size, lengths, payload
+        pos += size + comp_size
+
+
+def decode_blocks(blocks: Iterable[Block]) -> Iterator[ByteData]:
+    """
+    Decodes blocks, building a decoding table for every block with its own
+    code bit-lengths. Stored blocks are passed through as they are (views
+    of the compressed data for blocks from iter_blocks).
+
+    :param blocks: blocks from iter_blocks or read_blocks
+    :return: iterator of decoded blocks
+    """
+    dtable: Optional[DecodeTable] = None
+    for raw_size, lengths, payload in blocks:
+        if lengths == {}:
+            yield payload
+            continue
+        if lengths is not None:
+            dtable = canonical_decode_table(lengths)
+        elif dtable is None:
+            raise ValueError("First block refers to a previous table")
+        res: bytearray = decode_bits(dtable, payload, 8 * len(payload))
+        del res[raw_size:]  # terms decoded from padding bits
+        yield res
+
+
+def scan_blocks(read_at: Callable[[int, int], bytes]) -> List[BlockInfo]:
+    """
+    Scans the block headers of data in the blocks format, hopping from
+    block to block by their compressed sizes without decoding them
+
+    :param read_at: function reading (position, size) bytes of the data
+    :return: list of (position of the bitstream, size of the bitstream,
+             original size, code bit-lengths (empty for stored blocks)),
+             references to the previous block's table resolved
+    """
+    _, pos = unpack_blocks_header(read_at(0, BLOCK_HEADER_BYTES))
+    blocks: List[BlockInfo] = []
+    lengths: Optional[Dict[int, int]] = None
+    while True:
+        raw_size, own, comp_size, size = unpack_block_header(
+            read_at(pos, BLOCK_HEADER_BYTES))
+        if not raw_size:
+            return blocks
+        if own == {}:
+            blocks.append((pos + size, comp_size, raw_size, own))
+            pos += size + comp_size
+            continue
+        if own is not None:
+            lengths = own
+        elif lengths is None:
+            raise ValueError("First block refers to a previous table")
+        blocks.append((pos + size, comp_size, raw_size, lengths))
+        pos += size + comp_size
+
+
+def read_block_index(read_at: Callable[[int, int], bytes],
+                     size: int) -> List[IndexEntry]:
+    """
+    Reads the block index of data in the blocks format from the position
+    in its trailer, or for data without an index (version 1) builds it by
+    scanning the block headers
+
+    :param read_at: function reading (position, size) bytes of the data
+    :param size: size of the data
+    :return: list of (position of the block, original offset, original
+             size, number of the block holding its table)
+    """
+    _, pos = unpack_blocks_header(read_at(0, BLOCK_HEADER_BYTES))
+    index_pos: Optional[int] = read_index_trailer(
+        read_at(max(0, size - INDEX_TRAILER_BYTES), INDEX_TRAILER_BYTES))
+    entries: List[IndexEntry] = []
+    raw_offset = 0
+    if index_pos is not None:
+        index, _ = unpack_block_index(
+            read_at(index_pos, size - INDEX_TRAILER_BYTES - index_pos))
+        for num, (raw_size, block_size, table) in enumerate(index):
+            entries.append((pos, raw_offset, raw_size, num - table))
+            pos += block_size
+            raw_offset += raw_size
+        return entries
+    table_block = 0
+    while True:
+        raw_size, own, comp_size, header_size = unpack_block_header(
+            read_at(pos, BLOCK_HEADER_BYTES))
+        if not raw_size:
+            return entries
+        if own:
+            table_block = len(entries)
+        entries.append((pos, raw_offset, raw_size,
+                        len(entries) if own == {} else table_block))
+        pos += header_size + comp_size
+        raw_offset += raw_size
+
+
+def decode_payload(payload: ByteData, raw_size: int,
+                   lengths: Dict[int, int]) -> ByteData:
+    """
+    Decodes the bitstream of a block on its own, building its decoding
+    table (e.g. in a worker process or thread)
+
+    :param payload: bitstream of the block
+    :param raw_size: original size of the block
+    :param lengths: code bit-lengths of the block (empty for a stored
+                    block, returned as it is)
+    :return: decoded block
+    """
+    if not lengths:
+        return payload
+    res: bytearray = decode_bits(canonical_decode_table(lengths),
+                                 payload, 8 * len(payload))
+    del res[raw_size:]  # terms decoded from padding bits
+    return res
+
+
+def decode_block(payload: bytes, raw_size: int, lengths: Dict[int, int],
+                 offset: int) -> int:
+    """
+    Decodes a block and writes it to the shared output at its offset (in a
+    worker process, see press.parallel)
+
+    :param payload: bitstream of the block
+    :param raw_size: original size of the block
+    :param lengths: code bit-lengths of the block
+    :param offset: output offset of the block
+    :return: original size of the block
+    """
+    write_output(offset, decode_payload(payload, raw_size, lengths))
+    return raw_size
+
+
+def decode_tasks(blocks: List[BlockInfo]) -> List[Task]:
+    """
+    Parallel decoding tasks of blocks, each writing at the output offset
+    given by the original sizes of the blocks before it
+
+    :param blocks: blocks from scan_blocks
+    :return: list of tasks for press.parallel.map_slices
+    """
+    tasks: List[Task] = []
+    offset = 0
+    for pos, comp_size, raw_size, lengths in blocks:
+        tasks.append((pos, pos + comp_size, (raw_size, lengths, offset)))
+        offset += raw_size
+    return tasks
+
+
+def decompress_blocks_parallel(inp_bytes: bytes, workers: int,
+                               verbose=False) -> bytearray:
+    """
+    Decompresses data in the blocks format, decoding the blocks in a pool
+    of worker processes. The compressed data is shared with the workers,
+    which write the blocks into a shared output buffer at their offsets.
+
+    :param inp_bytes: compressed data in the blocks format
+    :param workers: number of worker processes
+    :param verbose: set to True for printing console outputs
+    :return: decompressed bytearray data
+    """
+    view = memoryview(inp_bytes)
+    blocks = scan_blocks(lambda pos, size: view[pos: pos + size])
+    total = sum(raw_size for _, _, raw_size, _ in blocks)
+    if not total:
+        return bytearray()
+    with share_bytes(inp_bytes) as source, \
+            share_output(total) as (target, out):
+        for _ in tqdm(map_slices(decode_block, source, decode_tasks(blocks),
+                                 workers, target),
+                      total=len(blocks), disable=not verbose):
+            pass
+        return bytearray(out[:total])
+
+
+def decompress_file_parallel(inp_file: str, outfile: str, workers: int,
+                             verbose=False) -> str:
+    """
+    Decompresses a file in the blocks format, decoding the blocks in a pool
+    of worker processes, which memory map the file and write the blocks to
+    the output file at their offsets.
+
+    :param inp_file: File to be decompressed
+    :param outfile: Output file for decompressed contents to be saved
+    :param workers: number of worker processes
+    :param verbose: set to True for printing console outputs
+    :return: name and path of the output file
+    """
+    with open(inp_file, "rb") as f:
+        def read_at(pos: int, size: int) -> bytes:
+            f.seek(pos)
+            return f.read(size)
+        blocks = scan_blocks(read_at)
+    total = sum(raw_size for _, _, raw_size, _ in blocks)
+    with open(outfile, "wb") as out:
+        out.truncate(total)
+    if total:
+        for _ in tqdm(map_slices(decode_block, ("file", inp_file),
+                                 decode_tasks(blocks), workers,
+                                 ("file", outfile)),
+                      total=len(blocks), disable=not verbose):
+            pass
+    return outfile
+
+
+def check_codec(fmt: Optional[Format]):
+    """
+    Checks that data is not in the codec format, which only the codec it
+    was encoded with can decode, nor an archive of many files
+
+    :param fmt: format of the compressed data
+    """
+    if fmt is Format.CODEC:
+        raise ValueError("Data encoded by a Codec or Dictionary, pass it "
+                         "as dictionary to decompress_bytes")
+    if fmt is Format.ARCHIVE:
+        raise ValueError("Data is an archive of many files, open it with "
+                         "huffpress.open_archive")
+
+
+def decompress_bytes(inp_bytes: bytes, verbose=False,
+                     workers: Optional[int] = None,
+                     dictionary: Optional["Codec"] = None) -> bytearray:
     """
     Main function to decompress input bytes by extracting the Huffman map
     and using the map to replace the encoded sequences with the original
@@ -111,39 +505,217 @@ def decompress_bytes(inp_bytes: bytes, verbose=False) -> bytearray:
 
     :param inp_bytes: Input data to be compressed
     :param verbose: set to True for printing console outputs
+    :param workers: number of worker processes decoding blocks in parallel
+                    (blocks format only, other formats and None or 1
+                    decode in this process)
+    :param dictionary: Dictionary (or Codec) the data was compressed with
+                       (codec format only)
     :return: decompressed bytearray data
     """
+    fmt: Optional[Format] = read_format(inp_bytes)
+    if fmt is Format.CODEC and dictionary is not None:
+        return dictionary.decode(inp_bytes)
+    check_codec(fmt)
+    if fmt is Format.STORED:
+        return bytearray(memoryview(inp_bytes)[STORED_HEADER_BYTES:])
+    if fmt is Format.CANONICAL:
+        return decompress_canonical(inp_bytes, verbose=verbose)
+    if fmt is Format.CONTEXT:
+        return decompress_context(inp_bytes, verbose=verbose)
+    if fmt is Format.DIGRAM:
+        return decompress_digram(inp_bytes, verbose=verbose)
+    if fmt is Format.BLOCKS and workers is not None and workers > 1:
+        return decompress_blocks_parallel(inp_bytes, workers,
+                                          verbose=verbose)
+    if fmt is Format.BLOCKS:
+        res = bytearray()
+        for block in decode_blocks(iter_blocks(inp_bytes)):
+            res += block
+        return res
+
     huff_map: HuffCode
-    rem: int
-    huff_map, rem = extract_huff_map(inp_bytes, verbose=verbose)
-    inp_bytes = inp_bytes[:-rem]
-    rev_seq: str = reverse_final_sequence(inp_bytes, verbose=verbose)
-    res: bytearray = reverse_huff_sequence(huff_map, rev_seq, verbose=verbose)
+    seq: memoryview
+    huff_map, seq = read_huff_map(inp_bytes, verbose=verbose)
+    if verbose:
+        print("Decoding Huffman sequence")
+
+    # first byte is the number of padding bits at the end of the sequence
+    reader = BitReader.legacy(seq)
+    dtable: DecodeTable = build_decode_table(code_to_table(huff_map))
+    res: bytearray = decode_reader(dtable, reader)
     return res
 
 
+def read_huff_map_tail(f: BinaryIO, size: int) -> Tuple[HuffCode, int]:
+    """
+    Extracts the Huffman map from the end of a file without a header (see
+    extract_huff_map), reading only the map and its length digits
+
+    :param f: compressed file opened in binary mode
+    :param size: size of the file
+    :return: Huffmann map dictionary and the length of the map
+    """
+    tail_size = min(size, TAIL_BYTES)
+    f.seek(size - tail_size)
+    tail: bytes = f.read(tail_size)
+    map_end = tail.rfind(b"}") + 1
+    if not map_end:
+        raise ValueError("Huffman map not found")
+    need = len(tail) - map_end + to_dec(list(tail[map_end:].decode()), 36)
+    if need > len(tail):
+        f.seek(size - need)
+        tail = f.read(need)
+    return extract_huff_map(tail)
+
+
+def decompress_stream(inp_file: str, outfile: str, verbose=False,
+                      buffer_size: int = BUFFER_SIZE) -> str:
+    """
+    Decompresses a file reading the compressed sequence buffer_size bytes
+    at a time and writing the decoded data as it goes, so that memory use
+    stays bounded by the buffer size rather than the file size. Only the
+    header (or map at the end of files without a header) is read first.
+
+    :param inp_file: File to be decompressed
+    :param outfile: Output file for decompressed contents to be saved
+    :param verbose: set to True for printing console outputs
+    :param buffer_size: number of bytes read at a time
+    :return: name and path of the output file
+    """
+    size: int = os.path.getsize(inp_file)
+    num_terms: Optional[int] = None
+    dtable: DecodeTable
+    with open(inp_file, "rb") as f:
+        head: bytes = f.read(CANONICAL_HEADER_BYTES)
+        fmt: Optional[Format] = read_format(head)
+        check_codec(fmt)
+        if fmt is Format.STORED:
+            f.seek(STORED_HEADER_BYTES)
+            with open(outfile, "wb") as out:
+                for chunk in read_chunks(f, buffer_size):
+                    out.write(chunk)
+            return outfile
+        if fmt is Format.BLOCKS:
+            if verbose:
+                print("Decoding blocks")
+            with open(outfile, "wb") as out:
+                for block in decode_blocks(read_blocks(f)):
+                    out.write(block)
+            return outfile
+        if fmt is Format.DIGRAM:
+            if verbose:
+                print("Extracting code lengths")
+            f.seek(0)
+            orig_size, lengths, tail, pos = unpack_digram_header(
+                f.read(DIGRAM_HEADER_BYTES))
+            f.seek(pos)
+            if verbose:
+                print("Decoding Huffman sequence")
+            reader = FileBitReader(f, 8 * (size - pos), buffer_size)
+            with open(outfile, "wb") as out:
+                out.write(decode_reader(
+                    canonical_decode_table(lengths, width=2), reader,
+                    out=out))
+                if out.tell() > orig_size & ~1:
+                    # symbols decoded from padding bits
+                    out.truncate(orig_size & ~1)
+                    out.seek(orig_size & ~1)
+                out.write(tail)
+            return outfile
+        if fmt is Format.CONTEXT:
+            if verbose:
+                print("Extracting context map and code lengths")
+            f.seek(0)
+            num_terms, context_map, tables, pos = unpack_context_header(
+                f.read(CONTEXT_HEADER_BYTES))
+            f.seek(pos)
+            if verbose:
+                print("Decoding Huffman sequence")
+            reader = FileBitReader(f, 8 * (size - pos), buffer_size)
+            with open(outfile, "wb") as out:
+                out.write(decode_context_reader(
+                    context_tables(context_map, tables), reader, num_terms,
+                    out=out))
+            return outfile
+        if fmt is Format.CANONICAL:
+            if verbose:
+                print("Extracting code lengths")
+            num_terms, pos = unpack_varint(head, len(MAGIC) + 1)
+            lengths, pos = unpack_code_lengths(head, pos)
+            dtable = canonical_decode_table(lengths)
+            f.seek(pos)
+            num_bits = 8 * (size - pos)
+        else:
+            if verbose:
+                print("Reading Huffman Tree")
+            if fmt is None:
+                huff_map, rem = read_huff_map_tail(f, size)
+                seq_start, seq_end = 0, size - rem
+            else:
+                map_start, map_end = unpack_json_header(head, size)
+                f.seek(map_start)
+                huff_map = unpack_huff_map(f.read(map_end - map_start))
+                seq_start, seq_end = map_end, size
+            dtable = build_decode_table(code_to_table(huff_map))
+            # first byte is the number of padding bits at the end
+            f.seek(seq_start)
+            num_bits = 8 * (seq_end - seq_start - 1) - f.read(1)[0]
+
+        if verbose:
+            print("Decoding Huffman sequence")
+        reader = FileBitReader(f, num_bits, buffer_size)
+        with open(outfile, "wb") as out:
+            out.write(decode_reader(dtable, reader, out=out))
+            if num_terms is not None and out.tell() > num_terms:
+                out.truncate(num_terms)  # terms decoded from padding bits
+    return outfile
+
+
 def decompress_file(inp_file: str, outfile: Optional[str] = None,
-                    verbose=False):
+                    verbose=False, buffer_size: int = BUFFER_SIZE,
+                    stream: Optional[bool] = None,
+                    workers: Optional[int] = None):
     """
     Decompress file
 
+    Files larger than STREAM_THRESHOLD bytes are decompressed in chunks with
+    bounded memory (see decompress_stream).
+
     :param inp_file: File to be decompressed
     :param outfile: Output file for decompressed contents to be saved
     :param verbose: set to True for printing console outputs
+    :param buffer_size: number of bytes read at a time when streaming
+    :param stream: True to always stream, False to never stream,
+                   None to stream files larger than STREAM_THRESHOLD
+    :param workers: number of worker processes decoding blocks in parallel
+                    (see decompress_bytes)
     :return: name and path of the output file
     """
+    if outfile is None:
+        outfile = inp_file[:-4] if inp_file[-4:].lower() == ".hac" else inp_file
+    if workers is not None and workers > 1:
+        with open(inp_file, "rb") as f:
+            fmt: Optional[Format] = read_format(f.read(len(MAGIC) + 1))
+        if fmt is Format.BLOCKS:
+            return decompress_file_parallel(inp_file, outfile, workers,
+                                            verbose=verbose)
+    if stream is None:
+        stream = os.path.getsize(inp_file) > STREAM_THRESHOLD
+    if stream:
+        return decompress_stream(inp_file, outfile, verbose=verbose,
+                                 buffer_size=buffer_size)
     with open(inp_file, "rb") as f:
         inp: bytes = f.read()
     decomp_var = decompress_bytes(inp, verbose=verbose)
-    if outfile is None:
-        outfile = inp_file[:-4] if inp_file[-4:].lower() == ".hac" else inp_file
     with open(f"{outfile}", "wb") as f:
         f.write(decomp_var)
     return outfile
 
 
 def decompress(inp: Union[str, bytes, bytearray],
-               outfile: Optional[str] = None, verbose=False):
+               outfile: Optional[str] = None, verbose=False,
+               buffer_size: int = BUFFER_SIZE,
+               workers: Optional[int] = None):
     """
     Decompress bytearray data or contents of a file
 
@@ -151,12 +723,276 @@ def decompress(inp: Union[str, bytes, bytearray],
                 data
     :param outfile: name of the output file name (optional)
     :param verbose: set to True for printing console outputs
+    :param buffer_size: number of bytes read at a time when decompressing
+                        large files (see decompress_file)
+    :param workers: number of worker processes decoding blocks in parallel
+                    (see decompress_bytes)
     :return: either decompressed bytearray data or name of decompressed output
             file
     """
     if isinstance(inp, bytearray) or isinstance(inp, bytes):
-        return decompress_bytes(inp, verbose=verbose)
+        return decompress_bytes(inp, verbose=verbose, workers=workers)
     elif isinstance(inp, str):
-        return decompress_file(inp, outfile=outfile, verbose=verbose)
+        return decompress_file(inp, outfile=outfile, verbose=verbose,
+                               buffer_size=buffer_size, workers=workers)
     else:
         raise TypeError(f"inp.data is of type {type(inp)}")
+
+
+class Decompressor(object):
+    """
+    Incremental decompressor for data arriving in chunks, like zlib's
+    decompressobj. Data in the blocks format is decoded a block at a time:
+    every call returns the blocks completed by its chunk, so only one
+    compressed block is buffered. Stored data is returned as it arrives.
+    Data in the canonical, context, digram and JSON formats is buffered
+    until its header is complete, then its bitstream is decoded as it
+    arrives (see hdecode.ChunkDecoder), so only the bits of a code split
+    between chunks are kept. The end of these formats is only known from
+    the end of the input: flush decodes the last bits. Only data from
+    before the JSON format header existed, whose map is at its end, is
+    buffered whole until flush.
+
+    ...
+
+    Attributes
+    ----------
+    buf : bytearray
+        input not decoded yet
+    blocks : Optional[bool]
+        True for data decoded block by block: the blocks format, or the
+        stored format as a stored block per chunk (None until the header is
+        read)
+    stored : bool
+        True for the stored format
+    fmt : Optional[Format]
+        format of the data (None until the header is read, or for data
+        without a header)
+    decoder : Optional[ChunkDecoder]
+        decoder of the bitstream of the formats other than blocks (None
+        until their header is read)
+    pad : int
+        number of padding bits ending the bitstream (JSON format)
+    tail : bytes
+        trailing odd byte (digram format)
+    version : Optional[int]
+        blocks format version (None until the header is read)
+    dtable : Optional[DecodeTable]
+        decoding table of the last block with its own table
+    end : bool
+        True once the end marker is read
+    eof : bool
+        True once the end of the compressed data is read
+    unused_data : bytes
+        input after the end of the compressed data
+
+    Methods
+    -------
+    decompress(data):
+        Decompresses a chunk of compressed data
+    flush():
+        Decompresses the buffered data at the end of the input
+    """
+
+    def __init__(self):
+        """
+        __init__(self):
+
+        Constructs Decompressor
+        """
+        self.buf = bytearray()
+        self.blocks: Optional[bool] = None
+        self.stored = False
+        self.fmt: Optional[Format] = None
+        self.decoder: Optional[ChunkDecoder] = None
+        self.pad = 0
+        self.tail = b""
+        self.version: Optional[int] = None
+        self.dtable: Optional[DecodeTable] = None
+        self.end = False
+        self.eof = False
+        self.unused_data = b""
+
+    def split(self, data: ByteData) -> List[Block]:
+        """
+        split(self, data: ByteData) -> List[Block]:
+
+        Buffers a chunk of compressed data in the blocks format and removes
+        the blocks it completes from the buffer, without decoding them
+
+        :param data: chunk of compressed data
+        :return: list of (original size, code bit-lengths or None to reuse
+                 the previous block's or empty for a stored block,
+                 bitstream) of the completed blocks
+        """
+        if self.eof:
+            self.unused_data += bytes(data)
+            return []
+        self.buf += data
+        if self.blocks is None:
+            if len(self.buf) < len(MAGIC) + 1:
+                return []
+            fmt: Optional[Format] = read_format(self.buf)
+            check_codec(fmt)
+            self.fmt = fmt
+            self.stored = fmt is Format.STORED
+            self.blocks = fmt is Format.BLOCKS or self.stored
+            if self.stored:
+                del self.buf[:STORED_HEADER_BYTES]
+        if not self.blocks:
+            return []
+        if self.stored:
+            stored: List[Block] = \
+                [(len(self.buf), {}, bytes(self.buf))] if self.buf else []
+            self.buf = bytearray()
+            return stored
+        buf = self.buf
+        blocks: List[Block] = []
+        pos = 0
+        try:
+            if self.version is None:
+                _, pos = unpack_blocks_header(buf)
+                self.version = buf[len(MAGIC) + 1]
+            while not self.end:
+                raw_size, lengths, comp_size, start = \
+                    unpack_block_header(buf, pos)
+                if not raw_size:
+                    self.end = True
+                    pos = start
+                elif start + comp_size > len(buf):
+                    break
+                else:
+                    blocks.append((raw_size, lengths,
+                                   bytes(buf[start: start + comp_size])))
+                    pos = start + comp_size
+            if self.end:
+                end = pos
+                if self.version > 1:
+                    _, end = unpack_block_index(buf, pos)
+                    end += INDEX_TRAILER_BYTES
+                if end <= len(buf):
+                    self.eof = True
+                    self.unused_data = bytes(buf[end:])
+                    pos = len(buf)
+        except IndexError:
+            pass  # header or index not complete yet
+        del buf[:pos]
+        return blocks
+
+    def start_sequence(self) -> bool:
+        """
+        start_sequence(self) -> bool:
+
+        Reads the header of data in a format other than blocks once it is
+        complete, setting up the decoder of its bitstream
+
+        :return: True once the decoder is set up
+        """
+        buf = self.buf
+        try:
+            if self.fmt is Format.CANONICAL:
+                num_terms, pos = unpack_varint(buf, len(MAGIC) + 1)
+                lengths, pos = unpack_code_lengths(buf, pos)
+                decoder = ChunkDecoder(num_terms,
+                                       canonical_decode_table(lengths))
+            elif self.fmt is Format.CONTEXT:
+                num_terms, context_map, tables, pos = \
+                    unpack_context_header(buf)
+                decoder = ChunkDecoder(
+                    num_terms, dtables=context_tables(context_map, tables))
+            elif self.fmt is Format.DIGRAM:
+                size, lengths, self.tail, pos = unpack_digram_header(buf)
+                decoder = ChunkDecoder(size & ~1, canonical_decode_table(
+                    lengths, width=2))
+            elif self.fmt is Format.JSON:
+                map_start, pos = unpack_json_header(buf, size=len(buf))
+                self.pad = buf[pos]  # padding count leading the bitstream
+                decoder = ChunkDecoder(None, build_decode_table(
+                    code_to_table(unpack_huff_map(buf[map_start: pos]))))
+                pos += 1
+            else:
+                return False  # map at the end: buffered until flush
+        except (IndexError, ValueError):
+            return False  # header not complete yet (checked at flush)
+        if pos > len(buf):
+            return False
+        self.decoder = decoder
+        del buf[:pos]
+        return True
+
+    def decode_sequence(self, final: bool = False) -> bytearray:
+        """
+        decode_sequence(self, final: bool = False) -> bytearray:
+
+        Decodes the buffered bitstream of data in a format other than
+        blocks. In the JSON format the last byte is kept until the end, as
+        only it holds padding bits.
+
+        :param final: set to True at the end of the input
+        :return: decoded data
+        """
+        if self.decoder is None and not self.start_sequence():
+            return bytearray()
+        assert self.decoder is not None
+        keep = 1 if self.fmt is Format.JSON and not final else 0
+        end = max(len(self.buf) - keep, 0)
+        res: bytearray = self.decoder.decode(
+            bytes(self.buf[:end]), final,
+            min(self.pad, 8 * end) if final else 0)
+        del self.buf[:end]
+        if final:
+            res += self.tail
+        return res
+
+    def decompress(self, data: ByteData) -> bytes:
+        """
+        decompress(self, data: ByteData) -> bytes:
+
+        Decompresses a chunk of compressed data
+
+        :param data: chunk of compressed data
+        :return: decompressed data available so far (may be empty)
+        """
+        blocks: List[Block] = self.split(data)
+        if self.blocks is False:
+            return bytes(self.decode_sequence())
+        out = bytearray()
+        for raw_size, lengths, payload in blocks:
+            if lengths == {}:
+                out += payload
+                continue
+            if lengths is not None:
+                self.dtable = canonical_decode_table(lengths)
+            elif self.dtable is None:
+                raise ValueError("First block refers to a previous table")
+            res: bytearray = decode_bits(self.dtable, payload,
+                                         8 * len(payload))
+            del res[raw_size:]  # terms decoded from padding bits
+            out += res
+        return bytes(out)
+
+    def flush(self) -> bytes:
+        """
+        flush(self) -> bytes:
+
+        Decompresses the buffered data at the end of the input (data in
+        formats other than blocks)
+
+        :return: decompressed data
+        """
+        if self.blocks:
+            if not self.eof and not self.stored:
+                raise EOFError("Compressed data ended before the end of "
+                               "the blocks")
+            return b""
+        if self.eof:
+            return b""
+        res: bytearray
+        if self.blocks is False and (self.decoder is not None or
+                                     self.start_sequence()):
+            res = self.decode_sequence(final=True)
+        else:
+            res = decompress_bytes(self.buf)
+        self.buf = bytearray()
+        self.eof = True
+        return bytes(res)
@@ -21,13 +21,16 @@
         ...
 """
 
+from huffpress.auxi.modes import Format
 from huffpress.press.compress import compress_string
 from huffpress.press.decompress import decompress_bytes
 
 
 def comp(fun):
     """
-    Compression decorator, which compresses final string result
+    Compression decorator, which compresses final string result. Results
+    are typically small, so the canonical format (with its compact code
+    length header) is used.
 
     :param fun: Function where string output will be compressed
     :return: compressed string
@@ -41,7 +44,7 @@ def comp(fun):
         :return: Compressed string in bytearray format
         """
         ret = fun(*args, **kwargs)
-        com_ret: bytearray = compress_string(ret)
+        com_ret: bytearray = compress_string(ret, fmt=Format.CANONICAL)
         return com_ret
     return decorator
 
@@ -0,0 +1,288 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    hacfile.py
+
+    Contains the read-only file object giving random access to the original
+    data of a compressed file. Files in the blocks format are read through
+    their block index: a read decodes only the blocks it touches, so the
+    cost of a read depends on the block size, not on the size of the file.
+    Files in the stored format are read straight from the file. Files in
+    the other formats are decompressed whole on the first read.
+"""
+
+import builtins
+import io
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import BinaryIO, List, Optional
+from huffpress.auxi.bitio import ByteData
+from huffpress.auxi.modes import Format
+from huffpress.huff.hdecode import decode_bits
+from huffpress.huff.hfunctions import canonical_decode_table
+from huffpress.huff.htypes import DecodeTable
+from huffpress.press.container import (
+    MAGIC, read_format, unpack_block_header, BLOCK_HEADER_BYTES,
+    STORED_HEADER_BYTES
+    )
+from huffpress.press.decompress import (
+    IndexEntry, read_block_index, decompress_bytes
+    )
+
+TABLE_CACHE = 8  # decoding tables kept for blocks sharing a table
+
+
+class HacFile(io.RawIOBase):
+    """
+    Read-only, seekable file object over the original data of a compressed
+    file (use huffpress.open to create one).
+
+    ...
+
+    Attributes
+    ----------
+    f : BinaryIO
+        compressed file
+    pos : int
+        current position in the original data
+    index : List[IndexEntry]
+        block index (blocks format only)
+    offsets : List[int]
+        original offset of every block
+    data : bytearray
+        whole original data (formats other than blocks, once read)
+    block : int
+        number of the last decoded block (-1 for none)
+    block_data : ByteData
+        last decoded block
+    tables : OrderedDict
+        decoding tables by number of the block holding the table
+
+    Methods
+    -------
+    read_range(offset, length):
+        Reads length bytes of the original data from offset
+    readinto(buf):
+        Reads from the current position into buf
+    seek(offset, whence):
+        Moves the current position
+    tell():
+        Returns the current position
+    """
+
+    def __init__(self, path: str):
+        """
+        __init__(self, path: str):
+
+        Constructs HacFile, reading the block index of the file
+
+        :param path: compressed file
+        """
+        super().__init__()
+        self.f: BinaryIO = builtins.open(path, "rb")
+        self.pos = 0
+        self.index: List[IndexEntry] = []
+        self.offsets: List[int] = []
+        self.data: Optional[bytearray] = None
+        self.block = -1
+        self.block_data: ByteData = bytearray()
+        self.tables: "OrderedDict[int, DecodeTable]" = OrderedDict()
+        try:
+            self.f.seek(0, io.SEEK_END)
+            self.comp_size = self.f.tell()
+            fmt: Optional[Format] = read_format(
+                self.read_at(0, len(MAGIC) + 1))
+            self.blocks = fmt is Format.BLOCKS
+            self.stored = fmt is Format.STORED
+            if self.blocks:
+                self.index = read_block_index(self.read_at, self.comp_size)
+                self.offsets = [offset for _, offset, _, _ in self.index]
+        except BaseException:
+            self.f.close()
+            raise
+
+    def read_at(self, pos: int, size: int) -> bytes:
+        """
+        read_at(self, pos: int, size: int) -> bytes:
+
+        Reads bytes of the compressed file
+
+        :param pos: position in the compressed file
+        :param size: maximum number of bytes
+        :return: bytes read
+        """
+        self.f.seek(pos)
+        return self.f.read(size)
+
+    @property
+    def size(self) -> int:
+        """
+        @property
+        def size(self) -> int:
+
+        Size of the original data
+
+        :return: number of bytes
+        """
+        if self.stored:
+            return self.comp_size - STORED_HEADER_BYTES
+        if self.blocks:
+            if not self.index:
+                return 0
+            _, offset, raw_size, _ = self.index[-1]
+            return offset + raw_size
+        return len(self.whole())
+
+    def whole(self) -> bytearray:
+        """
+        whole(self) -> bytearray:
+
+        Decompresses a file in a format other than blocks, once
+
+        :return: original data
+        """
+        if self.data is None:
+            self.data = decompress_bytes(self.read_at(0, self.comp_size))
+        return self.data
+
+    def table(self, num: int) -> DecodeTable:
+        """
+        table(self, num: int) -> DecodeTable:
+
+        Decoding table of the block holding it, cached for the blocks
+        sharing it
+
+        :param num: number of the block holding the table
+        :return: decoding table
+        """
+        dtable: Optional[DecodeTable] = self.tables.get(num)
+        if dtable is not None:
+            self.tables.move_to_end(num)
+            return dtable
+        _, lengths, _, _ = unpack_block_header(
+            self.read_at(self.index[num][0], BLOCK_HEADER_BYTES))
+        if lengths is None:
+            raise ValueError(f"Block {num} has no code-length table")
+        dtable = canonical_decode_table(lengths)
+        self.tables[num] = dtable
+        if len(self.tables) > TABLE_CACHE:
+            self.tables.popitem(last=False)
+        return dtable
+
+    def decode(self, num: int) -> ByteData:
+        """
+        decode(self, num: int) -> ByteData:
+
+        Decodes a block (reads a stored block), keeping the last decoded
+        block for reads next to each other
+
+        :param num: block number
+        :return: original data of the block
+        """
+        if num == self.block:
+            return self.block_data
+        pos, _, raw_size, table_block = self.index[num]
+        _, lengths, comp_size, header_size = unpack_block_header(
+            self.read_at(pos, BLOCK_HEADER_BYTES))
+        payload: bytes = self.read_at(pos + header_size, comp_size)
+        if len(payload) < comp_size:
+            raise EOFError("Truncated block")
+        res: ByteData = payload
+        if lengths != {}:
+            res = decode_bits(self.table(table_block), payload,
+                              8 * comp_size)
+            del res[raw_size:]  # terms decoded from padding bits
+        self.block, self.block_data = num, res
+        return res
+
+    def read_range(self, offset: int, length: int) -> bytes:
+        """
+        read_range(self, offset: int, length: int) -> bytes:
+
+        Reads a range of the original data, decoding only the blocks it
+        touches. The current position does not move.
+
+        :param offset: offset in the original data
+        :param length: number of bytes (fewer are returned at the end)
+        :return: original data
+        """
+        if offset < 0 or length < 0:
+            raise ValueError("Negative offset or length")
+        if self.stored:
+            return self.read_at(STORED_HEADER_BYTES + offset, length)
+        if not self.blocks:
+            return bytes(self.whole()[offset: offset + length])
+        end = min(offset + length, self.size)
+        res = bytearray()
+        num = bisect_right(self.offsets, offset) - 1
+        while offset < end:
+            block_offset = self.offsets[num]
+            block: ByteData = self.decode(num)
+            res += block[offset - block_offset: end - block_offset]
+            offset = block_offset + len(block)
+            num += 1
+        return bytes(res)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buf) -> int:
+        """
+        readinto(self, buf) -> int:
+
+        Reads from the current position into buf, moving the position
+
+        :param buf: writable buffer
+        :return: number of bytes read (0 at the end)
+        """
+        res: bytes = self.read_range(self.pos, len(buf))
+        memoryview(buf).cast("B")[:len(res)] = res
+        self.pos += len(res)
+        return len(res)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        """
+        seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+
+        Moves the current position in the original data
+
+        :param offset: offset relative to whence
+        :param whence: io.SEEK_SET, io.SEEK_CUR or io.SEEK_END
+        :return: new position
+        """
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self.pos + offset
+        elif whence == io.SEEK_END:
+            pos = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence {whence}")
+        if pos < 0:
+            raise ValueError(f"Negative seek position {pos}")
+        self.pos = pos
+        return pos
+
+    def tell(self) -> int:
+        return self.pos
+
+    def close(self):
+        if not self.closed:
+            self.f.close()
+            self.tables.clear()
+            self.block, self.block_data, self.data = -1, bytearray(), None
+        super().close()
+
+
+def open(path: str) -> HacFile:
+    """
+    Opens a compressed file for reading its original data, with random
+    access decoding only the blocks read for files in the blocks format
+
+    :param path: compressed file
+    :return: HacFile (a binary file object, usable in a with statement)
+    """
+    return HacFile(path)
@@ -0,0 +1,229 @@
+"""
+    (c) 2021 Usman Ahmad https://github.com/selphaware
+
+    parallel.py
+
+    Contains the process pool used to compress and decompress blocks on
+    several cores. The input is shared with the worker processes rather
+    than pickled to them: bytes are copied once into shared memory, files
+    are memory mapped by every worker, and each task only names the slice
+    of the input it works on. Workers can also write their results straight
+    to a shared output (shared memory, or a file) at offsets known in
+    advance. Results come back in input order, with a bounded number of
+    tasks in flight so memory stays bounded too.
+"""
+
+import mmap
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import (
+    Any, Callable, Deque, Iterable, Iterator, List, Optional, Tuple
+    )
+
+# input or output shared with the workers: ("shm", shared memory name) or
+# ("file", path of a file to memory map or write to)
+Source = Tuple[str, str]
+
+# task: (start, end) of the slice of the input, and further arguments
+Task = Tuple[int, int, tuple]
+
+TASKS_PER_WORKER = 2  # tasks in flight per worker
+
+_handle: Any = None  # shared memory or mmap attached by a worker process
+_view: Optional[memoryview] = None  # view of the input in a worker process
+_out_handle: Any = None  # shared memory of the output in a worker process
+_out: Any = None  # view of, or path of the file of, the output
+
+
+def attach(source: Source, target: Optional[Source] = None):
+    """
+    Attaches a worker process to the shared input and output (pool
+    initializer)
+
+    :param source: shared input
+    :param target: shared output (optional)
+    """
+    global _handle, _view, _out_handle, _out
+    kind, name = source
+    if kind == "shm":
+        # the resource tracker is shared with the creating process, which
+        # unlinks the shared memory (and unregisters it) when done
+        _handle = shared_memory.SharedMemory(name=name)
+        _view = _handle.buf
+    elif kind == "file":
+        with open(name, "rb") as f:
+            _handle = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        _view = memoryview(_handle)
+    else:
+        raise ValueError(f"Unknown shared input kind {kind}")
+    if target is None:
+        return
+    kind, name = target
+    if kind == "shm":
+        _out_handle = shared_memory.SharedMemory(name=name)
+        _out = _out_handle.buf
+    elif kind == "file":
+        _out = name
+    else:
+        raise ValueError(f"Unknown shared output kind {kind}")
+
+
+def write_output(offset: int, data: bytes):
+    """
+    Writes data to the shared output at a given offset (in a worker
+    process). A file output is opened for every write, so no descriptor
+    outlives the write, and written with positional writes where the
+    platform has them (seek and write otherwise, e.g. on Windows).
+
+    :param offset: output offset
+    :param data: data to write
+    """
+    assert _out is not None, "worker not attached to a shared output"
+    if not isinstance(_out, str):
+        _out[offset: offset + len(data)] = data
+    elif hasattr(os, "pwrite"):
+        fd = os.open(_out, os.O_WRONLY)
+        try:
+            view = memoryview(data)
+            while len(view):
+                written = os.pwrite(fd, view, offset)
+                view = view[written:]
+                offset += written
+        finally:
+            os.close(fd)
+    else:
+        with open(_out, "r+b") as f:
+            f.seek(offset)
+            f.write(data)
+
+
+def call_slice(fun: Callable, start: int, end: int, args: tuple) -> Any:
+    """
+    Calls fun on a slice of the shared input (in a worker process)
+
+    :param fun: module level function taking the slice and args
+    :param start: slice start
+    :param end: slice end
+    :param args: further arguments of fun
+    :return: result of fun
+    """
+    assert _view is not None, "worker not attached to the shared input"
+    return fun(_view[start: end], *args)
+
+
+def map_slices(fun: Callable, source: Source, tasks: Iterable[Task],
+               workers: int,
+               target: Optional[Source] = None) -> Iterator[Any]:
+    """
+    Calls fun on slices of the shared input in a pool of worker processes
+
+    :param fun: module level function taking a slice (memoryview) and the
+                further arguments of the task
+    :param source: shared input
+    :param tasks: (start, end, further arguments) of every slice
+    :param workers: number of worker processes
+    :param target: shared output the workers write to (optional)
+    :return: iterator of results, in the order of the tasks
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=attach,
+                             initargs=(source, target)) as pool:
+        pending: Deque[Future] = deque()
+        for start, end, args in tasks:
+            if len(pending) >= TASKS_PER_WORKER * workers:
+                yield pending.popleft().result()
+            pending.append(pool.submit(call_slice, fun, start, end, args))
+        while pending:
+            yield pending.popleft().result()
+
+
+def block_slices(size: int, block_size: int) -> List[Tuple[int, int]]:
+    """
+    Splits input of a given size into blocks
+
+    :param size: input size
+    :param block_size: block size
+    :return: (start, end) of every block
+    """
+    return [(start, min(start + block_size, size))
+            for start in range(0, size, block_size)]
+
+
+@contextmanager
+def share_bytes(data: bytes) -> Iterator[Source]:
+    """
+    Copies data into shared memory, unlinked on exit
+
+    :param data: data to share (not empty)
+    :return: shared input
+    """
+    shm = shared_memory.SharedMemory(create=True, size=len(data))
+    try:
+        shm.buf[:len(data)] = data
+        yield "shm", shm.name
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+@contextmanager
+def share_output(size: int) -> Iterator[Tuple[Source, memoryview]]:
+    """
+    Creates shared memory for workers to write their output to, unlinked
+    on exit (copy the output out of the view before then)
+
+    :param size: output size (not 0)
+    :return: (shared output, view of the output)
+    """
+    shm = shared_memory.SharedMemory(create=True, size=size)
+    try:
+        yield ("shm", shm.name), shm.buf
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def map_bytes(fun: Callable, data: bytes, block_size: int, workers: int,
+              *args) -> Iterator[Any]:
+    """
+    Calls fun on every block of data in a pool of worker processes, sharing
+    data with them through shared memory
+
+    :param fun: module level function taking a block (memoryview) and args
+    :param data: input data
+    :param block_size: block size
+    :param workers: number of worker processes
+    :param args: further arguments of fun
+    :return: iterator of results, in the order of the blocks
+    """
+    if not len(data):
+        return
+    with share_bytes(data) as source:
+        yield from map_slices(fun, source,
+                              [(start, end, args) for start, end in
+                               block_slices(len(data), block_size)],
+                              workers)
+
+
+def map_file(fun: Callable, path: str, block_size: int, workers: int,
+             *args) -> Iterator[Any]:
+    """
+    Calls fun on every block of a file in a pool of worker processes, which
+    memory map the file
+
+    :param fun: module level function taking a block (memoryview) and args
+    :param path: input file
+    :param block_size: block size
+    :param workers: number of worker processes
+    :param args: further arguments of fun
+    :return: iterator of results, in the order of the blocks
+    """
+    size = os.path.getsize(path)
+    if not size:
+        return
+    yield from map_slices(fun, ("file", path),
+                          [(start, end, args) for start, end in
+                           block_slices(size, block_size)],
+                          workers)
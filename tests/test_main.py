@@ -7,7 +7,9 @@
 """
 
 import unittest
-from tests.tfuncs import string_test, compress_test  # type: ignore
+from tests.tfuncs import string_test, compress_test, \
+    stream_test, legacy_stream_test, archive_test  # type: ignore
+from huffpress.auxi.modes import Format  # type: ignore
 from os import remove
 
 
@@ -32,6 +34,86 @@ class TestHuffPress(unittest.TestCase):
         remove("../tests/files/u.exe.bak")
         remove("../tests/files/u.exe.hac")
 
+    def test_j_txt_canonical(self):
+        self.assertEqual(compress_test("../tests/files/j.txt",
+                                       fmt=Format.CANONICAL), True)
+        remove("../tests/files/j.txt.bak")
+        remove("../tests/files/j.txt.hac")
+
+    def test_u_exe_canonical(self):
+        self.assertEqual(compress_test("../tests/files/u.exe",
+                                       fmt=Format.CANONICAL), True)
+        remove("../tests/files/u.exe.bak")
+        remove("../tests/files/u.exe.hac")
+
+    def test_d_txt_stream(self):
+        self.assertEqual(stream_test("../tests/files/d.txt"), (True, True))
+        remove("../tests/files/d.txt.bak")
+        remove("../tests/files/d.txt.hac")
+
+    def test_u_exe_stream_canonical(self):
+        self.assertEqual(stream_test("../tests/files/u.exe",
+                                     fmt=Format.CANONICAL), (True, True))
+        remove("../tests/files/u.exe.bak")
+        remove("../tests/files/u.exe.hac")
+
+    def test_d_txt_blocks(self):
+        self.assertEqual(compress_test("../tests/files/d.txt",
+                                       fmt=Format.BLOCKS), True)
+        remove("../tests/files/d.txt.bak")
+        remove("../tests/files/d.txt.hac")
+
+    def test_u_exe_stream_blocks(self):
+        self.assertEqual(stream_test("../tests/files/u.exe",
+                                     fmt=Format.BLOCKS,
+                                     block_size=100000), (True, True))
+        remove("../tests/files/u.exe.bak")
+        remove("../tests/files/u.exe.hac")
+
+    def test_d_txt_blocks_workers(self):
+        self.assertEqual(stream_test("../tests/files/d.txt",
+                                     fmt=Format.BLOCKS, block_size=65536,
+                                     workers=2), (True, True))
+        remove("../tests/files/d.txt.bak")
+        remove("../tests/files/d.txt.hac")
+
+    def test_d_txt_stream_context(self):
+        self.assertEqual(stream_test("../tests/files/d.txt",
+                                     fmt=Format.CONTEXT), (True, True))
+        remove("../tests/files/d.txt.bak")
+        remove("../tests/files/d.txt.hac")
+
+    def test_j_txt_stream_digram(self):
+        self.assertEqual(stream_test("../tests/files/j.txt",
+                                     fmt=Format.DIGRAM), (True, True))
+        remove("../tests/files/j.txt.bak")
+        remove("../tests/files/j.txt.hac")
+
+    def test_u_exe_stream_digram_limited(self):
+        self.assertEqual(stream_test("../tests/files/u.exe",
+                                     fmt=Format.DIGRAM, max_code_len=11),
+                         (True, True))
+        remove("../tests/files/u.exe.bak")
+        remove("../tests/files/u.exe.hac")
+
+    def test_files_archive(self):
+        names, same, _ = archive_test("../tests/files")
+        self.assertEqual(names, ["files/d.txt", "files/i.txt",
+                                 "files/j.txt", "files/u.exe"])
+        self.assertTrue(same)
+        self.assertEqual(archive_test("../tests/files", solid=True)[:2],
+                         (names, True))
+
+    def test_i_txt_stream_stored(self):
+        self.assertEqual(stream_test("../tests/files/i.txt"), (True, True))
+        remove("../tests/files/i.txt.bak")
+        remove("../tests/files/i.txt.hac")
+
+    def test_j_txt_stream_legacy(self):
+        self.assertEqual(legacy_stream_test("../tests/files/j.txt"), True)
+        remove("../tests/files/j.txt.bak")
+        remove("../tests/files/j.txt.hac")
+
     def test_string1(self):
         in_txt = "A_DEAD_DAD_CEDED_A_BAD_BABE_A_BEADED_ABACA_BED"
         com_dat, decom_dat = string_test(in_txt)
@@ -71,3 +153,10 @@ class TestHuffPress(unittest.TestCase):
         in_txt = "A "
         com_dat, decom_dat = string_test(in_txt)
         self.assertEqual(com_dat, decom_dat)
+
+    def test_strings_canonical(self):
+        for in_txt in ["A_DEAD_DAD_CEDED_A_BAD_BABE_A_BEADED_ABACA_BED",
+                       "AABBCC", "AAA", "A", "AB", "A ", "",
+                       "!\"£$%^&*()_+{}:@~<>?,./;'#[]789654321/*-+\\`¬|"]:
+            com_dat, decom_dat = string_test(in_txt, fmt=Format.CANONICAL)
+            self.assertEqual(com_dat, decom_dat)
@@ -6,14 +6,49 @@
     Testing mainly string compressions, term frequencies, and a decorator test
 """
 
+import asyncio
+import os
+import random
+import tempfile
 import unittest
+from shutil import rmtree
 from tests.tfuncs import string_test, decorator_comp_test, \
-    decorator_decomp_test, print_test  # type: ignore
+    decorator_decomp_test, print_test, engine_test, \
+    code_table_test, random_access_test, strip_block_index, \
+    async_stream_test, archive_test  # type: ignore
 from tests.consts import LONG_TEXT  # type: ignore
-from huffpress.huff.hfunctions import calc_term_freq  # type: ignore
+from huffpress.huff.hfunctions import calc_term_freq, \
+    canonical_codes, limit_code_lengths, length_limit_cost, \
+    calc_term_freq_chunks, build_huff_tree, build_code_table, \
+    build_tree, sort_tree, build_leaves, \
+    print_node, enable_tree_cache, disable_tree_cache, \
+    get_tree_cache  # type: ignore
+from huffpress.huff.HuffTree import HuffTree  # type: ignore
+import huffpress  # type: ignore
+import huffpress.auxi.histogram as histogram  # type: ignore
+import huffpress.press.parallel as parallel  # type: ignore
+from huffpress.auxi.histogram import PairHistogram, digrams  # type: ignore
+from huffpress.huff.hcontext import cluster_contexts  # type: ignore
+from huffpress.press.compress import compress_string, \
+    compress_bytes, add_huff_map, Compressor  # type: ignore
+from huffpress.press.decompress import decompress_bytes, \
+    reverse_huff_sequence, reverse_final_sequence, \
+    read_huff_map, iter_blocks, Decompressor  # type: ignore
+from huffpress.huff.hdecode import build_decode_table, \
+    decode_bits  # type: ignore
+from huffpress.huff.htypes import HuffCode, HuffTable  # type: ignore
+from huffpress.press.container import pack_code_lengths, \
+    unpack_code_lengths, pack_varint, unpack_varint, \
+    read_format, pack_wide_code_lengths, \
+    unpack_wide_code_lengths  # type: ignore
+from huffpress.auxi.modes import Format  # type: ignore
+from huffpress.auxi.bitio import BitWriter, BitReader  # type: ignore
 from huffpress.huff.htypes import InputData, TermFreq  # type: ignore
 from huffpress.auxi.basen import basen  # type: ignore
 from huffpress.auxi.idict import IDict  # type: ignore
+from huffpress import aio  # type: ignore
+from huffpress.press.codec import Codec, Dictionary, train  # type: ignore
+from huffpress.press.archive import check_name  # type: ignore
 
 
 class TestHuffPressSimple(unittest.TestCase):
@@ -50,6 +85,526 @@ class TestHuffPressSimple(unittest.TestCase):
                                        "BABE_A_BEADED_ABACA_BED")
         self.assertEqual(print_res, actual)
 
+    def test_tree_engines(self):
+        for filename in ["i.txt", "j.txt", "u.exe"]:
+            heap_codes, sorted_codes, compact_codes = engine_test(
+                f"../tests/files/{filename}")
+            self.assertEqual(heap_codes, sorted_codes)
+            self.assertEqual(heap_codes, compact_codes)
+
+    def test_code_table(self):
+        codes, per_term, table = code_table_test(LONG_TEXT)
+        self.assertEqual(codes, per_term)
+        for term, (code, length) in table.data.items():
+            self.assertEqual(format(code, f"0{length}b"), codes.data[term])
+
+    def test_code_table_single(self):
+        codes, per_term, table = code_table_test("AAA")
+        self.assertEqual(codes.data, {65: "0"})
+        self.assertEqual(per_term, codes)
+        self.assertEqual(table.data, {65: (0, 1)})
+
+    def test_canonical_codes(self):
+        table = canonical_codes({68: 3, 65: 1, 67: 3, 66: 2})
+        self.assertEqual(table.data, {65: (0, 1), 66: (2, 2),
+                                      67: (6, 3), 68: (7, 3)})
+
+    def test_code_lengths_packing(self):
+        for lengths in [{}, {65: 1}, {65: 1, 66: 2, 67: 2},
+                        {x: 8 for x in range(256)},
+                        {x: 1 + x % 20 for x in range(0, 256, 3)}]:
+            packed = pack_code_lengths(lengths)
+            self.assertEqual(unpack_code_lengths(packed),
+                             (lengths, len(packed)))
+        self.assertEqual(len(pack_code_lengths({x: 8 for x in range(256)})),
+                         1 + 32 + 128)
+
+    def test_varint(self):
+        for val in [0, 1, 127, 128, 300, 2 ** 40]:
+            packed = pack_varint(val)
+            self.assertEqual(unpack_varint(packed), (val, len(packed)))
+
+    def test_canonical_header_size(self):
+        in_txt = "A_DEAD_DAD_CEDED_A_BAD_BABE_A_BEADED_ABACA_BED"
+        self.assertLess(len(compress_string(in_txt, fmt=Format.CANONICAL)),
+                        len(in_txt))
+
+    def test_limit_code_lengths(self):
+        fib = [1, 1]
+        while len(fib) < 25:
+            fib.append(fib[-1] + fib[-2])
+        term_freq = TermFreq(tf={65 + i: freq for i, freq in enumerate(fib)})
+        for max_len in [5, 8, 12, 15]:
+            lengths = limit_code_lengths(term_freq, max_len)
+            self.assertEqual(max(lengths.values()), max_len)
+            self.assertEqual(sum(2 ** -x for x in lengths.values()), 1)
+        optimal, limited = length_limit_cost(term_freq, 24)
+        self.assertEqual(optimal, limited)
+        optimal, limited = length_limit_cost(term_freq, 12)
+        self.assertLess(optimal, limited)
+        self.assertRaises(ValueError, limit_code_lengths, term_freq, 4)
+
+    def test_max_code_len(self):
+        inp_bytes = b"".join(bytes([65 + i]) * (2 ** i) for i in range(16))
+        for fmt in [Format.JSON, Format.CANONICAL, Format.BLOCKS,
+                    Format.STORED, Format.CONTEXT, Format.DIGRAM]:
+            comp = compress_bytes(inp_bytes, fmt=fmt, max_code_len=11)
+            self.assertEqual(decompress_bytes(comp), inp_bytes)
+        for fmt in [Format.CODEC, Format.ARCHIVE]:
+            self.assertRaises(ValueError, compress_bytes, inp_bytes, fmt=fmt)
+
+    def test_reverse_huff_sequence(self):
+        huff_map = HuffCode(data={65: "0", 66: "10", 67: "110", 68: "111"})
+        self.assertEqual(reverse_huff_sequence(huff_map, "0101101110"),
+                         bytearray(b"ABCDA"))
+        self.assertEqual(reverse_huff_sequence(huff_map, ""), bytearray())
+
+    def test_decode_table_levels(self):
+        table = HuffTable(data={65: (0, 1), 66: (2, 2), 67: (6, 3),
+                                68: (14, 4), 69: (30, 5), 70: (31, 5)})
+        seq = "0" + "10" + "110" + "1110" + "11110" + "11111" + "0"
+        num_bits = len(seq)
+        data = int(seq.ljust(24, "0"), 2).to_bytes(3, "big")
+        for bits in [1, 2, 3, 5, 12]:
+            dtable = build_decode_table(table, bits=bits)
+            self.assertEqual(decode_bits(dtable, data, num_bits),
+                             bytearray(b"ABCDEFA"))
+
+    def test_bit_writer(self):
+        writer = BitWriter(2)
+        writer.write(0b101, 3)
+        writer.write(0b1, 1)
+        writer.write(0b0110011, 7)
+        self.assertEqual(writer.num_bits, 11)
+        self.assertEqual(bytes(writer.getvalue()),
+                         bytes([0b10110110, 0b01100000]))
+        writer = BitWriter()
+        writer.write(0, 1)
+        writer.write_bytes(b"\xff")
+        writer.write(int("1" * 100, 2), 100)
+        self.assertEqual(bytes(writer.getvalue()),
+                         b"\x7f" + b"\xff" * 12 + b"\xf8")
+
+    def test_bit_reader(self):
+        reader = BitReader(b"\x00\xb6\x60\xff", num_bits=11, start=1)
+        self.assertEqual(reader.bits_left, 11)
+        self.assertEqual(reader.read(3), 0b101)
+        self.assertEqual(reader.read(1), 0b1)
+        self.assertEqual(reader.read(7), 0b0110011)
+        self.assertEqual(reader.bits_left, 0)
+        self.assertRaises(EOFError, reader.read, 1)
+        reader = BitReader.legacy(memoryview(b"\x05\xb6\x60"))
+        self.assertEqual(reader.bits_left, 11)
+        self.assertEqual(reverse_final_sequence(b"\x05\xb6\x60"),
+                         "10110110011")
+        self.assertEqual(reverse_final_sequence(b"\x08\xb6\x00"),
+                         "10110110")
+
+    def test_json_header(self):
+        comp = bytes(compress_bytes(LONG_TEXT.encode()))
+        self.assertEqual(read_format(comp), Format.JSON)
+        huff_map, seq = read_huff_map(comp)
+        self.assertEqual(seq.obj, comp)  # a view, not a copy
+        # layout from before the header: sequence, map, radix-36 map length
+        legacy = bytes(add_huff_map(bytearray(seq), huff_map))
+        self.assertIsNone(read_format(legacy))
+        legacy_map, legacy_seq = read_huff_map(legacy)
+        self.assertEqual(legacy_map, huff_map)
+        self.assertEqual(legacy_seq, seq)
+        self.assertEqual(decompress_bytes(legacy), LONG_TEXT.encode())
+
+    def test_blocks(self):
+        data = LONG_TEXT.encode()
+        comp = compress_bytes(data, fmt=Format.BLOCKS, block_size=100)
+        self.assertEqual(read_format(comp), Format.BLOCKS)
+        sizes = [raw_size for raw_size, _, _ in iter_blocks(comp)]
+        self.assertEqual(sizes, [100] * (len(data) // 100) +
+                         ([len(data) % 100] if len(data) % 100 else []))
+        self.assertEqual(decompress_bytes(comp), data)
+        for inp in [b"", b"A", b"AAAAAAAAAAB"]:
+            comp = compress_bytes(inp, fmt=Format.BLOCKS, block_size=4)
+            self.assertEqual(decompress_bytes(comp), inp)
+
+    def test_blocks_shared_table(self):
+        data = b"AAAAAAAB" * 64 + b"ABCD" * 16
+        comp = compress_bytes(data, fmt=Format.BLOCKS, block_size=64)
+        blocks = list(iter_blocks(comp))
+        self.assertTrue(blocks[0][1])
+        self.assertEqual([lengths for _, lengths, _ in blocks[1:8]],
+                         [None] * 7)
+        self.assertTrue(blocks[8][1])
+        self.assertEqual(decompress_bytes(comp), data)
+
+    def test_blocks_workers(self):
+        data = (LONG_TEXT * 4).encode()
+        serial = compress_bytes(data, fmt=Format.BLOCKS, block_size=1000)
+        self.assertEqual(compress_bytes(data, fmt=Format.BLOCKS,
+                                        block_size=1000, workers=2), serial)
+        self.assertEqual(compress_bytes(b"", fmt=Format.BLOCKS, workers=2),
+                         compress_bytes(b"", fmt=Format.BLOCKS))
+        self.assertEqual(compress_bytes(data, block_size=1000, workers=2),
+                         serial)
+        self.assertRaises(ValueError, compress_bytes, data, fmt=Format.JSON,
+                          workers=2)
+        self.assertEqual(decompress_bytes(serial, workers=2), data)
+        self.assertEqual(decompress_bytes(compress_bytes(data), workers=2),
+                         data)
+        self.assertEqual(decompress_bytes(compress_bytes(
+            b"", fmt=Format.BLOCKS), workers=2), b"")
+
+    def test_write_output(self):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        pwrite = getattr(os, "pwrite", None)
+        try:
+            with open(path, "wb") as f:
+                f.truncate(8)
+            parallel.attach(("file", path), ("file", path))
+            parallel.write_output(2, b"AB")
+            if pwrite is not None:
+                del os.pwrite
+            parallel.write_output(5, b"CD")
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), b"\0\0AB\0CD\0")
+        finally:
+            if pwrite is not None:
+                os.pwrite = pwrite
+            parallel._view.release()
+            parallel._handle.close()
+            parallel._handle = parallel._view = parallel._out = None
+            os.remove(path)
+
+    def test_random_access(self):
+        data = (LONG_TEXT * 3).encode()
+        ranges = [(0, 10), (95, 10), (250, 1000), (len(data) - 5, 50),
+                  (len(data) + 10, 5), (300, 0)]
+        expected = [data[offset: offset + length]
+                    for offset, length in ranges]
+        expected += [data[:10], data[-10:], len(data)]
+        comp = compress_bytes(data, fmt=Format.BLOCKS, block_size=100)
+        self.assertEqual(random_access_test(comp, ranges), expected)
+        v1 = strip_block_index(comp)
+        self.assertEqual(decompress_bytes(v1), data)
+        self.assertEqual(random_access_test(v1, ranges), expected)
+        for fmt in [Format.JSON, Format.CANONICAL]:
+            self.assertEqual(random_access_test(
+                compress_bytes(data, fmt=fmt), ranges), expected)
+        data = b"AAAAAAAB" * 64 + b"ABCD" * 16  # blocks sharing a table
+        comp = compress_bytes(data, fmt=Format.BLOCKS, block_size=64)
+        self.assertEqual(random_access_test(comp, [(60, 400)]),
+                         [data[60:460], data[60:460], data[-400:],
+                          len(data)])
+
+    def test_stored(self):
+        for fmt in [Format.JSON, Format.CANONICAL, Format.STORED]:
+            comp = compress_bytes(b"Hello", fmt=fmt)
+            self.assertEqual(read_format(comp), Format.STORED)
+            self.assertEqual(len(comp), len(b"Hello") + 4)
+            self.assertEqual(decompress_bytes(comp), b"Hello")
+        noise = bytes(range(256)) * 8
+        self.assertEqual(read_format(compress_bytes(noise)), Format.STORED)
+        data = noise + LONG_TEXT.encode() + noise
+        comp = compress_bytes(data, fmt=Format.BLOCKS, block_size=2048)
+        lengths = [lengths for _, lengths, _ in iter_blocks(comp)]
+        self.assertEqual(lengths[0], {})
+        self.assertTrue(lengths[1])
+        self.assertEqual(lengths[-1], {})
+        self.assertEqual(decompress_bytes(comp), data)
+        self.assertEqual(decompress_bytes(comp, workers=2), data)
+        decomp = Decompressor()
+        self.assertEqual(decomp.decompress(comp[:3000]) +
+                         decomp.decompress(comp[3000:]) + decomp.flush(),
+                         data)
+        self.assertEqual(random_access_test(comp, [(2000, 100)]),
+                         [data[2000:2100], data[2000:2100], data[-100:],
+                          len(data)])
+        comp = compress_bytes(noise, fmt=Format.STORED)
+        decomp = Decompressor()
+        self.assertEqual(decomp.decompress(comp[:2]) +
+                         decomp.decompress(comp[2:10]) +
+                         decomp.decompress(comp[10:]) + decomp.flush(),
+                         noise)
+        self.assertEqual(random_access_test(comp, [(10, 20)]),
+                         [noise[10:30], noise[10:30], noise[-20:],
+                          len(noise)])
+
+    def test_codec(self):
+        messages = [f'{{"id": {i}, "event": "click", "ok": true}}'.encode()
+                    for i in range(50)]
+        codec = Codec.from_sample(b"".join(messages))
+        self.assertEqual(len(codec.lengths), 256)
+        for msg in messages + [b"", b"\x00\xff", bytes(range(256))]:
+            self.assertEqual(codec.decode(codec.encode(msg)), msg)
+        enc = codec.encode(messages[7])
+        self.assertEqual(read_format(enc), Format.CODEC)
+        self.assertLess(len(enc), len(messages[7]))
+        self.assertEqual(read_format(codec.encode(bytes(range(256)))),
+                         Format.STORED)
+        same = Codec.from_histogram(calc_term_freq(
+            InputData(data=b"".join(messages))))
+        self.assertEqual(same.id, codec.id)
+        self.assertEqual(same.encode(messages[7]), enc)
+        other = Codec.from_histogram({ord("A"): 100})
+        self.assertRaises(ValueError, other.decode, enc)
+        self.assertRaises(ValueError, decompress_bytes, enc)
+        self.assertRaises(ValueError, Codec, {65: 1, 66: 1})
+
+    def test_dictionary(self):
+        lines = [LONG_TEXT[start: start + 80].encode()
+                 for start in range(0, len(LONG_TEXT), 80)]
+        dictionary = train(lines[::2])
+        self.assertIsInstance(dictionary, Dictionary)
+        fd, path = tempfile.mkstemp(suffix=".hacd")
+        os.close(fd)
+        try:
+            dictionary.save(path)
+            self.assertLess(os.path.getsize(path), 200)
+            loaded = Dictionary.load(path)
+        finally:
+            os.remove(path)
+        self.assertEqual(loaded.id, dictionary.id)
+        self.assertEqual(loaded.lengths, dictionary.lengths)
+        for line in lines[1::2]:
+            comp = compress_bytes(line, dictionary=loaded)
+            self.assertEqual(decompress_bytes(comp, dictionary=dictionary),
+                             line)
+            self.assertLessEqual(len(comp), len(compress_bytes(
+                line, fmt=Format.CANONICAL)))
+        comp = compress_bytes(lines[1], dictionary=dictionary)
+        self.assertEqual(read_format(comp), Format.CODEC)
+        self.assertRaises(ValueError, decompress_bytes, comp)
+        self.assertRaises(ValueError, decompress_bytes, comp,
+                          dictionary=train([b"AAAB"]))
+        self.assertRaises(ValueError, Dictionary.from_bytes, b"HACX\x01")
+
+    def test_tree_cache(self):
+        data = (LONG_TEXT * 2).encode()
+        plain = compress_bytes(data, fmt=Format.BLOCKS, block_size=256)
+        cache = enable_tree_cache(maxsize=4)
+        try:
+            comp = compress_bytes(data, fmt=Format.BLOCKS, block_size=256)
+            self.assertEqual(comp, plain)
+            self.assertGreater(cache.misses, 0)
+            self.assertLessEqual(len(cache), 4)
+            misses = cache.misses
+            self.assertEqual(compress_bytes(data[:256], fmt=Format.CANONICAL),
+                             compress_bytes(data[:256], fmt=Format.CANONICAL))
+            self.assertEqual(cache.misses, misses + 1)
+            self.assertGreater(cache.hits, 0)
+            self.assertEqual(decompress_bytes(comp), data)
+            cache.clear()
+            self.assertEqual((len(cache), cache.hits, cache.misses), (0, 0, 0))
+            disable_tree_cache()
+            json_comp = compress_bytes(b"cbbaaa" * 50)
+            cache = enable_tree_cache(maxsize=4)
+            compress_bytes(b"aaabbc" * 50)
+            self.assertEqual(compress_bytes(b"cbbaaa" * 50), json_comp)
+            tf_a = TermFreq(tf={65: 1000, 66: 500, 67: 250})
+            tf_b = TermFreq(tf={65: 1001, 66: 499, 67: 250})
+            self.assertNotEqual(cache.histogram_key(tf_a),
+                                cache.histogram_key(tf_b))
+            cache = enable_tree_cache(quantize=4)
+            self.assertIs(get_tree_cache(), cache)
+            self.assertEqual(cache.histogram_key(tf_a),
+                             cache.histogram_key(tf_b))
+            self.assertNotEqual(cache.histogram_key(tf_a),
+                                cache.histogram_key(TermFreq(tf={65: 1000,
+                                                                 66: 500})))
+            self.assertRaises(ValueError, enable_tree_cache, 0)
+        finally:
+            disable_tree_cache()
+        self.assertIsNone(get_tree_cache())
+
+    def test_context(self):
+        data = (LONG_TEXT * 2).encode()
+        comp = compress_bytes(data, fmt=Format.CONTEXT)
+        self.assertEqual(read_format(comp), Format.CONTEXT)
+        self.assertEqual(decompress_bytes(comp), data)
+        self.assertLess(len(comp), len(compress_bytes(
+            data, fmt=Format.CANONICAL)))
+        one = compress_bytes(data, fmt=Format.CONTEXT, context_tables=1)
+        self.assertEqual(decompress_bytes(one), data)
+        self.assertLess(len(comp), len(one))
+        for inp in [b"", b"A", b"AB" * 300, bytes(range(256)) * 3]:
+            self.assertEqual(decompress_bytes(
+                compress_bytes(inp, fmt=Format.CONTEXT)), inp)
+        self.assertRaises(ValueError, compress_bytes, data,
+                          fmt=Format.CONTEXT, context_tables=0)
+        pairs = PairHistogram(data[:100]).update(data[100:])
+        self.assertEqual(sum(pairs.counts), len(data))
+        self.assertEqual(pairs.row(ord("q")), {ord("u"): data.count(b"qu")})
+        context_map, tables = cluster_contexts(pairs, 4)
+        self.assertLessEqual(len(tables), 4)
+        self.assertEqual(sum(sum(table.tf.values()) for table in tables),
+                         len(data))
+        self.assertEqual(len(context_map), 256)
+
+    def test_digram(self):
+        data = (LONG_TEXT * 8).encode() + b"!"
+        comp = compress_bytes(data, fmt=Format.DIGRAM)
+        self.assertEqual(read_format(comp), Format.DIGRAM)
+        self.assertEqual(decompress_bytes(comp), data)
+        self.assertLess(len(comp), len(compress_bytes(
+            data, fmt=Format.CANONICAL)))
+        for inp in [b"", b"A", b"AB", b"ABC", b"AB" * 300 + b"C",
+                    bytes(range(256)) * 300]:
+            self.assertEqual(decompress_bytes(
+                compress_bytes(inp, fmt=Format.DIGRAM)), inp)
+        data = bytes(random.Random(0).choices(range(48, 112),
+                                              weights=range(1, 65),
+                                              k=1 << 15))
+        for max_code_len in [11, None]:
+            comp = compress_bytes(data, fmt=Format.DIGRAM,
+                                  max_code_len=max_code_len)
+            self.assertEqual(read_format(comp), Format.CANONICAL
+                             if max_code_len else Format.DIGRAM)
+            self.assertEqual(decompress_bytes(comp), data)
+        data = os.urandom(1 << 16)
+        self.assertEqual(decompress_bytes(compress_bytes(
+            data, fmt=Format.DIGRAM, max_code_len=11)), data)
+        self.assertEqual(list(digrams(b"ABCDE")),
+                         [ord("A") | ord("B") << 8, ord("C") | ord("D") << 8])
+        lengths = {symbol: 1 + symbol % 20 for symbol in range(0, 65536, 7)}
+        packed = pack_wide_code_lengths(lengths)
+        self.assertEqual(unpack_wide_code_lengths(packed + b"x"),
+                         (lengths, len(packed)))
+        term_freq = TermFreq(tf={symbol: 1 + symbol % 97
+                                 for symbol in range(0, 65536, 3)})
+        tree = build_huff_tree(term_freq)
+        self.assertEqual(build_code_table(tree).data, build_code_table(
+            build_tree(sort_tree(build_leaves(term_freq)))).data)
+
+    def test_archive(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            os.makedirs(os.path.join(tmp, "d", "sub"))
+            for num in range(50):
+                with open(os.path.join(tmp, "d", "sub", f"{num}.json"),
+                          "w") as f:
+                    f.write(f'{{"id": {num}, "name": "item {num * 7}"}}')
+            for name, data in [("empty", b""), ("one", b"A" * 100),
+                               ("text.txt", LONG_TEXT.encode()),
+                               ("random", bytes(range(256)))]:
+                with open(os.path.join(tmp, "d", name), "wb") as f:
+                    f.write(data)
+            names, same, size = archive_test(os.path.join(tmp, "d"))
+            self.assertTrue(same)
+            self.assertEqual(names[:5], ["d/empty", "d/one", "d/random",
+                                         "d/text.txt", "d/sub/0.json"])
+            self.assertEqual(len(names), 54)
+            solid_names, same, solid_size = archive_test(
+                os.path.join(tmp, "d"), solid=True)
+            self.assertTrue(same)
+            self.assertEqual(solid_names, names)
+            self.assertLess(solid_size, size)
+
+            path = huffpress.create_archive(
+                [os.path.join(tmp, "d", "one"),
+                 os.path.join(tmp, "d", "sub")],
+                os.path.join(tmp, "t.hac"), solid=True)
+            with huffpress.open_archive(path) as arc:
+                self.assertEqual(len(arc), 51)
+                self.assertIn("sub/7.json", arc)
+                self.assertEqual(arc.read("sub/7.json"),
+                                 b'{"id": 7, "name": "item 49"}')
+                self.assertEqual(arc.read("one"), b"A" * 100)
+                self.assertEqual(arc.getmember("sub/7.json").table,
+                                 arc.getmember("sub/8.json").table)
+                self.assertRaises(KeyError, arc.read, "two")
+            with open(path, "rb") as f:
+                self.assertRaises(ValueError, decompress_bytes, f.read())
+            self.assertRaises(ValueError, huffpress.open_archive,
+                              os.path.join(tmp, "d", "one"))
+        finally:
+            rmtree(tmp)
+        for name in ["", "/a", "a/../b", "a//b", "./a", "C:/a", "a\\b"]:
+            self.assertRaises(ValueError, check_name, name)
+        self.assertEqual(check_name("a/b.txt"), "a/b.txt")
+
+    def test_compressor(self):
+        data = (LONG_TEXT * 3).encode()
+        comp = Compressor(block_size=100)
+        res = b"".join(comp.compress(data[start: start + size])
+                       for start, size in [(0, 1), (1, 99), (100, 250),
+                                           (350, 0), (350, len(data))])
+        self.assertEqual(res + comp.flush(),
+                         compress_bytes(data, fmt=Format.BLOCKS,
+                                        block_size=100))
+        self.assertRaises(ValueError, comp.compress, b"A")
+        comp = Compressor()
+        self.assertEqual(comp.flush(), compress_bytes(b"",
+                                                      fmt=Format.BLOCKS))
+        comp = Compressor()
+        msg = comp.compress(b"AAB") + comp.flush(finish=False)
+        self.assertEqual(decompress_bytes(msg + comp.flush()), b"AAB")
+
+    def test_decompressor(self):
+        data = (LONG_TEXT * 3).encode()
+        comp = compress_bytes(data, fmt=Format.BLOCKS, block_size=100)
+        for size in [1, 50, 1000, len(comp) + 4]:
+            decomp = Decompressor()
+            chunks = [(comp + b"MORE")[start: start + size]
+                      for start in range(0, len(comp) + 4, size)]
+            res = b"".join(decomp.decompress(chunk) for chunk in chunks)
+            self.assertEqual(res + decomp.flush(), data)
+            self.assertTrue(decomp.eof)
+            self.assertEqual(decomp.unused_data, b"MORE")
+        decomp = Decompressor()
+        decomp.decompress(comp[:-1])
+        self.assertRaises(EOFError, decomp.flush)
+        for fmt in [Format.JSON, Format.CANONICAL, Format.CONTEXT,
+                    Format.DIGRAM]:
+            comp = compress_bytes(data + b"!", fmt=fmt)
+            self.assertEqual(read_format(comp), fmt)
+            for size in [1, 7, 300]:
+                decomp = Decompressor()
+                res = b""
+                for start in range(0, len(comp), size):
+                    res += decomp.decompress(comp[start: start + size])
+                    if start > len(comp) // 2:
+                        # bitstream decoded as it arrives, not buffered
+                        self.assertGreater(len(res), len(data) // 4)
+                        self.assertLessEqual(len(decomp.buf), 1)
+                self.assertEqual(res + decomp.flush(), data + b"!")
+        data = bytes(random.Random(1).choice(b"ab") for _ in range(1001))
+        comp = compress_bytes(data, fmt=Format.DIGRAM)
+        for size in range(1, 20):
+            decomp = Decompressor()
+            res = b"".join(decomp.decompress(comp[start: start + size])
+                           for start in range(0, len(comp), size))
+            self.assertEqual(res + decomp.flush(), data)
+        writer, size = async_stream_test(aio.decompress_stream, comp,
+                                         buffer_size=17)
+        self.assertEqual(writer.data, data)
+
+    def test_aio(self):
+        data = (LONG_TEXT * 3).encode()
+        comp = compress_bytes(data, fmt=Format.BLOCKS, block_size=100)
+        writer, size = async_stream_test(aio.compress_stream, data,
+                                         block_size=100, buffer_size=33)
+        self.assertEqual(writer.data, comp)
+        self.assertEqual(size, len(comp))
+        self.assertGreater(writer.drains, len(data) // 100)
+        for inp in [comp, compress_bytes(data, fmt=Format.CANONICAL)]:
+            writer, size = async_stream_test(aio.decompress_stream, inp,
+                                             buffer_size=33, max_pending=2)
+            self.assertEqual(writer.data, data)
+            self.assertEqual(size, len(data))
+        comp = asyncio.run(aio.compress_bytes_async(data))
+        self.assertEqual(comp, compress_bytes(data))
+        self.assertEqual(asyncio.run(aio.decompress_bytes_async(comp)), data)
+
+    def test_compact_tree(self):
+        term_freq = calc_term_freq(InputData(data=LONG_TEXT))
+        tree = build_huff_tree(term_freq)
+        self.assertIsInstance(tree, HuffTree)
+        self.assertEqual(tree.freq, len(LONG_TEXT))
+        self.assertEqual(build_code_table(tree),
+                         build_code_table(tree.node))
+        self.assertEqual(tree.node.left_child, tree.left_child)
+        self.assertEqual(print_node(build_huff_tree(TermFreq(tf={})),
+                                    verbose=False), "")
+
     def test_calc_termfreq(self):
         ctf = calc_term_freq(InputData(data="Hello World Hi"))
         self.assertEqual(
@@ -67,6 +622,26 @@ class TestHuffPressSimple(unittest.TestCase):
             TermFreq(tf={65: 1, 66: 1, 67: 2, 68: 4})
         )
 
+    def test_calc_termfreq_chunks(self):
+        inp_dat = b"ABCCDDDD" * 3 + b"\x00\xff"
+        ctf = calc_term_freq(InputData(data=inp_dat))
+        chunked = calc_term_freq_chunks(
+            [inp_dat[i: i + 5] for i in range(0, len(inp_dat), 5)])
+        self.assertEqual(ctf, chunked)
+        self.assertEqual(list(ctf.tf), [65, 66, 67, 68, 0, 255])
+        self.assertEqual(list(chunked.tf), [65, 66, 67, 68, 0, 255])
+        self.assertEqual(ctf.tf.counts[68], 12)
+
+    def test_calc_termfreq_pure_python(self):
+        numpy = histogram.np
+        histogram.np = None
+        try:
+            ctf = calc_term_freq(InputData(data=memoryview(b"BAABCC")))
+        finally:
+            histogram.np = numpy
+        self.assertEqual(ctf, TermFreq(tf={65: 2, 66: 2, 67: 2}))
+        self.assertEqual(list(ctf.tf), [66, 65, 67])
+
     def test_basen1(self):
         val = basen(["5", "3", "6", "4", "1", "3", "5", "4", "3", "5", "4"],
                     7, 25)
@@ -6,19 +6,29 @@
     Testing functionality used in main_test and simple_test
 """
 
+import asyncio
 import filecmp
-from shutil import copyfile
-from huffpress.press.compress import compress  # type: ignore
-from huffpress.press.decompress import decompress  # type: ignore
+import os
+import tempfile
+from shutil import copyfile, rmtree
+import huffpress
+from huffpress.press.compress import compress, compress_bytes, \
+    compress_file, add_huff_map, BLOCK_SIZE  # type: ignore
+from huffpress.press.decompress import decompress, decompress_file, \
+    read_huff_map  # type: ignore
 from huffpress.press.decorators import comp, decomp  # type: ignore
-from huffpress.auxi.modes import Mode  # type: ignore
-from huffpress.huff.hfunctions import create_huff_tree, print_node  # type: ignore
-from huffpress.huff.htypes import InputData  # type: ignore
+from huffpress.auxi.modes import Mode, Engine, Format  # type: ignore
+from huffpress.huff.hfunctions import create_huff_tree, print_node, \
+    build_code_table, encode  # type: ignore
+from huffpress.huff.htypes import InputData, HuffCode  # type: ignore
+from huffpress.press.archive import archive_files  # type: ignore
+from huffpress.press.container import MAGIC, INDEX_TRAILER_BYTES, \
+    read_index_trailer  # type: ignore
 from tests.consts import LONG_TEXT, PRINT_RES_1
 
 
-def string_test(inp_txt):
-    comp_var = compress(inp_txt)
+def string_test(inp_txt, fmt=Format.JSON):
+    comp_var = compress(inp_txt, fmt=fmt)
     decomp_var = decompress(comp_var)
     dec_txt = "".join(map(chr, list(decomp_var)))
     return inp_txt, dec_txt
@@ -29,6 +39,22 @@ def print_test(inp_txt):
     return print_node(tree, verbose=False), PRINT_RES_1
 
 
+def engine_test(filename):
+    with open(filename, "rb") as f:
+        inp_data = InputData(data=f.read())
+    return [create_huff_tree(inp_data, engine=engine)[0]
+            for engine in Engine]
+
+
+def code_table_test(inp_txt):
+    codes, tree = create_huff_tree(InputData(data=inp_txt))
+    per_term = HuffCode(data={})
+    for term in codes.data:
+        per_term.data.update(encode(term, tree).data)
+    table = build_code_table(tree)
+    return codes, per_term, table
+
+
 @comp
 def decorator_comp_test():
     return LONG_TEXT
@@ -39,8 +65,98 @@ def decorator_decomp_test(in_var):
     return in_var
 
 
-def compress_test(filename, mode=Mode.DEFAULT):
+def compress_test(filename, mode=Mode.DEFAULT, fmt=Format.JSON):
     copyfile(filename, f"{filename}.bak")
-    compress(filename, mode=mode, verbose=True)
+    compress(filename, mode=mode, verbose=True, fmt=fmt)
     decompress(f"{filename}.hac", verbose=True)
     return filecmp.cmp(f"{filename}.bak", filename)
+
+
+def stream_test(filename, fmt=Format.JSON, buffer_size=4099,
+                block_size=BLOCK_SIZE, workers=None, max_code_len=None):
+    copyfile(filename, f"{filename}.bak")
+    with open(filename, "rb") as f:
+        comp_var = compress_bytes(f.read(), fmt=fmt, block_size=block_size,
+                                  max_code_len=max_code_len)
+    compress_file(filename, fmt=fmt, buffer_size=buffer_size, stream=True,
+                  block_size=block_size, workers=workers,
+                  max_code_len=max_code_len)
+    with open(f"{filename}.hac", "rb") as f:
+        same_output = f.read() == comp_var
+    decompress_file(f"{filename}.hac", buffer_size=buffer_size, stream=True,
+                    workers=workers)
+    return same_output, filecmp.cmp(f"{filename}.bak", filename)
+
+
+def legacy_stream_test(filename, buffer_size=4099):
+    copyfile(filename, f"{filename}.bak")
+    with open(filename, "rb") as f:
+        huff_map, seq = read_huff_map(compress_bytes(f.read()))
+    with open(f"{filename}.hac", "wb") as f:
+        f.write(add_huff_map(bytearray(seq), huff_map))
+    decompress_file(f"{filename}.hac", buffer_size=buffer_size, stream=True)
+    return filecmp.cmp(f"{filename}.bak", filename)
+
+
+def strip_block_index(comp_var):
+    # blocks format version 1: no index after the end marker
+    index_pos = read_index_trailer(comp_var[-INDEX_TRAILER_BYTES:])
+    res = bytearray(comp_var[:index_pos])
+    res[len(MAGIC) + 1] = 1
+    return bytes(res)
+
+
+def random_access_test(comp_var, ranges):
+    fd, path = tempfile.mkstemp(suffix=".hac")
+    with os.fdopen(fd, "wb") as f:
+        f.write(comp_var)
+    try:
+        with huffpress.open(path) as f:
+            res = [f.read_range(offset, length) for offset, length in ranges]
+            f.seek(ranges[0][0])
+            res.append(f.read(ranges[0][1]))
+            f.seek(-ranges[0][1], os.SEEK_END)
+            res.append(f.read())
+            res.append(f.size)
+        return res
+    finally:
+        os.remove(path)
+
+
+class BytesWriter:
+    # stands in for asyncio.StreamWriter
+    def __init__(self):
+        self.data = bytearray()
+        self.drains = 0
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        self.drains += 1
+
+
+def async_stream_test(fun, data, **kwargs):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return await fun(reader, writer, **kwargs)
+
+    writer = BytesWriter()
+    return writer, asyncio.run(run())
+
+
+def archive_test(inputs, solid=False):
+    tmp = tempfile.mkdtemp()
+    try:
+        path = huffpress.create_archive(inputs, os.path.join(tmp, "t.hac"),
+                                        solid=solid)
+        with huffpress.open_archive(path) as arc:
+            names = arc.names()
+            extracted = arc.extractall(os.path.join(tmp, "out"))
+        same = all(filecmp.cmp(src, dst, shallow=False) for (src, _), dst
+                   in zip(archive_files(inputs), extracted))
+        return names, same, os.path.getsize(path)
+    finally:
+        rmtree(tmp)